@@ -19,26 +19,47 @@ import base64
 from io import BytesIO
 from PIL import Image
 
-from unified_agricultural_detector import UnifiedAgriculturalDetector
+from unified_agricultural_detector import YOLO_BACKENDS
+from detector_pool import DetectorPool, PoolBusyError
+from crop_cache import CropClassificationCache
+from farm_report import FarmReportAccumulator
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
-# Global detector instance
-detector = None
+# Global detector pool (each request checks out its own detector)
+detector_pool = None
+
+# Crop classification cache shared by the pool (optional)
+crop_cache = None
 
 
 def initialize_detector(weed_model: str, pest_model: str, disease_model: str, 
-                        disease_classes: List[str] = None, plant_detector: str = None):
-    """Initialize the unified detector"""
-    global detector
-    detector = UnifiedAgriculturalDetector(
-        weed_model_path=weed_model,
-        pest_model_path=pest_model,
-        disease_model_path=disease_model,
-        disease_class_names=disease_classes,
-        conf_threshold=0.25,
-        plant_detector_model=plant_detector
+                        disease_classes: List[str] = None, plant_detector: str = None,
+                        backend: str = 'torch', lazy_load: bool = False, warmup: bool = True,
+                        pool_size: int = None, per_thread: bool = False,
+                        max_waiting: int = None, acquire_timeout: float = None,
+                        crop_cache: CropClassificationCache = None):
+    """Initialize the pool of unified detectors (models load concurrently and are warmed up once)"""
+    global detector_pool
+    detector_pool = DetectorPool(
+        {
+            'weed_model_path': weed_model,
+            'pest_model_path': pest_model,
+            'disease_model_path': disease_model,
+            'disease_class_names': disease_classes,
+            'conf_threshold': 0.25,
+            'plant_detector_model': plant_detector,
+            'backend': backend,
+            'lazy_load': lazy_load,
+            'warmup': warmup,
+            # One cache shared by every detector in the pool
+            'crop_cache': crop_cache
+        },
+        size=pool_size,
+        per_thread=per_thread,
+        max_waiting=max_waiting,
+        acquire_timeout=acquire_timeout
     )
     print("✅ Detector initialized")
 
@@ -54,167 +75,9 @@ def generate_farm_health_report(detections: Dict, image_path: str = None) -> Dic
     Returns:
         Detailed farm health report
     """
-    # Analyze detections
-    weed_count = len(detections.get('weeds', []))
-    pest_count = len(detections.get('pests', []))
-    disease_count = len(detections.get('diseases', []))
-    
-    # Calculate severity levels
-    weed_severity = 'none'
-    if weed_count > 15:
-        weed_severity = 'high'
-    elif weed_count > 8:
-        weed_severity = 'medium'
-    elif weed_count > 0:
-        weed_severity = 'low'
-    
-    pest_severity = 'none'
-    if pest_count > 10:
-        pest_severity = 'high'
-    elif pest_count > 5:
-        pest_severity = 'medium'
-    elif pest_count > 0:
-        pest_severity = 'low'
-    
-    disease_severity = 'none'
-    disease_labels = []
-    if disease_count > 0:
-        for disease in detections.get('diseases', []):
-            disease_labels.append({
-                'name': disease.get('label', 'Unknown'),
-                'confidence': disease.get('confidence', 0.0)
-            })
-        # Check if any disease has high confidence
-        max_disease_conf = max([d.get('confidence', 0.0) for d in disease_labels]) if disease_labels else 0.0
-        if max_disease_conf > 0.7:
-            disease_severity = 'high'
-        elif max_disease_conf > 0.5:
-            disease_severity = 'medium'
-        else:
-            disease_severity = 'low'
-    
-    # Calculate overall health score (0-100)
-    health_score = 100
-    if weed_severity == 'high':
-        health_score -= 30
-    elif weed_severity == 'medium':
-        health_score -= 15
-    elif weed_severity == 'low':
-        health_score -= 5
-    
-    if pest_severity == 'high':
-        health_score -= 30
-    elif pest_severity == 'medium':
-        health_score -= 15
-    elif pest_severity == 'low':
-        health_score -= 5
-    
-    if disease_severity == 'high':
-        health_score -= 30
-    elif disease_severity == 'medium':
-        health_score -= 15
-    elif disease_severity == 'low':
-        health_score -= 5
-    
-    health_score = max(0, health_score)
-    
-    # Generate recommendations
-    recommendations = []
-    
-    if weed_severity == 'high':
-        recommendations.append({
-            'priority': 'high',
-            'category': 'weed_control',
-            'action': 'Immediate weed control required. Consider mechanical or chemical weed management.',
-            'urgency': 'urgent'
-        })
-    elif weed_severity == 'medium':
-        recommendations.append({
-            'priority': 'medium',
-            'category': 'weed_control',
-            'action': 'Moderate weed growth detected. Plan weed control measures.',
-            'urgency': 'moderate'
-        })
-    
-    if pest_severity == 'high':
-        recommendations.append({
-            'priority': 'high',
-            'category': 'pest_control',
-            'action': 'Severe pest infestation detected. Immediate pest control required.',
-            'urgency': 'urgent'
-        })
-    elif pest_severity == 'medium':
-        recommendations.append({
-            'priority': 'medium',
-            'category': 'pest_control',
-            'action': 'Moderate pest activity detected. Monitor closely and consider treatment.',
-            'urgency': 'moderate'
-        })
-    
-    if disease_severity == 'high':
-        recommendations.append({
-            'priority': 'high',
-            'category': 'disease_management',
-            'action': 'Disease detected with high confidence. Apply appropriate treatment immediately.',
-            'urgency': 'urgent'
-        })
-    elif disease_severity == 'medium':
-        recommendations.append({
-            'priority': 'medium',
-            'category': 'disease_management',
-            'action': 'Possible disease detected. Monitor and consider preventive treatment.',
-            'urgency': 'moderate'
-        })
-    
-    if health_score > 80:
-        recommendations.append({
-            'priority': 'low',
-            'category': 'maintenance',
-            'action': 'Field condition is good. Maintain current practices.',
-            'urgency': 'low'
-        })
-    
-    # Build report
-    report = {
-        'timestamp': datetime.now().isoformat(),
-        'image_path': image_path,
-        'overall_health_score': health_score,
-        'health_status': 'good' if health_score > 70 else 'fair' if health_score > 50 else 'poor',
-        
-        'detections': {
-            'weeds': {
-                'count': weed_count,
-                'severity': weed_severity,
-                'detections': detections.get('weeds', [])
-            },
-            'pests': {
-                'count': pest_count,
-                'severity': pest_severity,
-                'detections': detections.get('pests', [])
-            },
-            'diseases': {
-                'count': disease_count,
-                'severity': disease_severity,
-                'detections': disease_labels
-            },
-            'water_stress': {
-                'count': len(detections.get('water_stress', [])),
-                'severity': 'none',  # Can be enhanced
-                'detections': detections.get('water_stress', [])
-            }
-        },
-        
-        'recommendations': recommendations,
-        
-        'summary': {
-            'total_issues': weed_count + pest_count + disease_count,
-            'critical_issues': len([r for r in recommendations if r['priority'] == 'high']),
-            'moderate_issues': len([r for r in recommendations if r['priority'] == 'medium']),
-            'action_required': len([r for r in recommendations if r['urgency'] == 'urgent'])
-        }
-    }
-    
-    return report
+    report = FarmReportAccumulator(keep_detections=True)
+    report.add(detections)
+    return report.health_report(image_path)
 
 
 @app.route('/health', methods=['GET'])
@@ -222,7 +85,10 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'detector_loaded': detector is not None
+        'detector_loaded': detector_pool is not None,
+        'models': detector_pool.model_status_report() if detector_pool is not None else None,
+        'pool': detector_pool.stats() if detector_pool is not None else None,
+        'crop_cache': crop_cache.stats() if crop_cache is not None else None
     })
 
 
@@ -238,7 +104,7 @@ def analyze_image():
     Response:
         - Farm health report with detections and recommendations
     """
-    if detector is None:
+    if detector_pool is None:
         return jsonify({'error': 'Detector not initialized'}), 500
     
     try:
@@ -266,22 +132,26 @@ def analyze_image():
         else:
             return jsonify({'error': 'No image provided'}), 400
         
-        # Run detections
-        detections = detector.detect_all(image)
-        
-        # Generate report
-        report = generate_farm_health_report(detections)
-        
-        # Optionally save annotated image
-        if 'save_annotated' in request.json and request.json['save_annotated']:
-            annotated = detector.draw_detections(image, detections)
-            output_path = f"outputs/report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-            os.makedirs('outputs', exist_ok=True)
-            cv2.imwrite(output_path, annotated)
-            report['annotated_image_path'] = output_path
+        with detector_pool.detector() as detector:
+            # Run detections
+            detections = detector.detect_all(image)
+            
+            # Generate report
+            report = generate_farm_health_report(detections)
+            
+            # Optionally save annotated image
+            if 'save_annotated' in request.json and request.json['save_annotated']:
+                annotated = detector.draw_detections(image, detections)
+                # Microseconds keep concurrent requests from overwriting each other's image
+                output_path = f"outputs/report_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+                os.makedirs('outputs', exist_ok=True)
+                cv2.imwrite(output_path, annotated)
+                report['annotated_image_path'] = output_path
         
         return jsonify(report), 200
         
+    except PoolBusyError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -297,35 +167,32 @@ def analyze_batch():
     Response:
         - Combined farm health report
     """
-    if detector is None:
+    if detector_pool is None:
         return jsonify({'error': 'Detector not initialized'}), 500
     
     try:
         data = request.json
         image_paths = data.get('images', [])
         
-        all_detections = {
-            'weeds': [],
-            'pests': [],
-            'diseases': [],
-            'water_stress': []
-        }
+        # The report lists every detection, so they are kept as they are added
+        farm_report = FarmReportAccumulator(keep_detections=True)
         
-        for img_path in image_paths:
-            image = cv2.imread(img_path)
-            if image is not None:
-                detections = detector.detect_all(image)
-                all_detections['weeds'].extend(detections.get('weeds', []))
-                all_detections['pests'].extend(detections.get('pests', []))
-                all_detections['diseases'].extend(detections.get('diseases', []))
-                all_detections['water_stress'].extend(detections.get('water_stress', []))
+        with detector_pool.detector() as detector:
+            # Load and detect in chunks so only one batch of images is in memory
+            for start in range(0, len(image_paths), detector.batch_size):
+                images = [cv2.imread(img_path) for img_path in image_paths[start:start + detector.batch_size]]
+                images = [image for image in images if image is not None]
+                for detections in detector.detect_batch(images):
+                    farm_report.add(detections)
         
         # Generate combined report
-        report = generate_farm_health_report(all_detections)
+        report = farm_report.health_report()
         report['images_analyzed'] = len(image_paths)
         
         return jsonify(report), 200
         
+    except PoolBusyError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -355,6 +222,7 @@ def generate_report():
 
 if __name__ == '__main__':
     import argparse
+    import atexit
     
     parser = argparse.ArgumentParser(description='Farm Health Backend API')
     parser.add_argument('--weed-model', type=str, required=True,
@@ -362,11 +230,29 @@ if __name__ == '__main__':
     parser.add_argument('--pest-model', type=str, required=True,
                        help='Path to pest detection YOLO model')
     parser.add_argument('--disease-model', type=str, required=True,
-                       help='Path to disease classification TensorFlow model')
+                       help='Path to disease classification TensorFlow model (SavedModel or .tflite)')
     parser.add_argument('--classes', type=str, default='plant_village_classes.txt',
                        help='Path to disease class names file (default: plant_village_classes.txt)')
     parser.add_argument('--plant-detector', type=str, default=None,
                        help='Path to plant detection YOLO model (if None, uses pest model)')
+    parser.add_argument('--backend', type=str, choices=YOLO_BACKENDS, default='torch',
+                       help='Inference runtime for the YOLO models (default: torch)')
+    parser.add_argument('--lazy-load', action='store_true',
+                       help='Load models on the first request instead of at startup')
+    parser.add_argument('--no-warmup', action='store_true',
+                       help='Skip the warm-up inference after loading the models')
+    parser.add_argument('--crop-cache', type=str, default=None, metavar='PATH',
+                       help='Cache plant crop classifications in this file (saved on shutdown)')
+    parser.add_argument('--crop-cache-size', type=int, default=10000,
+                       help='Maximum number of cached crop classifications (default: 10000)')
+    parser.add_argument('--pool-size', type=int, default=None,
+                       help='Number of detections served concurrently (default: one per 4 CPU cores)')
+    parser.add_argument('--per-thread', action='store_true',
+                       help='Prefer the detector a server thread used last (instances stay capped at --pool-size)')
+    parser.add_argument('--max-waiting', type=int, default=None,
+                       help='Maximum requests queued for a detector before returning 503 (default: unbounded)')
+    parser.add_argument('--acquire-timeout', type=float, default=None,
+                       help='Seconds a request waits for a detector before returning 503 (default: forever)')
     parser.add_argument('--host', type=str, default='0.0.0.0',
                        help='Host to bind to (default: 0.0.0.0)')
     parser.add_argument('--port', type=int, default=5000,
@@ -380,6 +266,15 @@ if __name__ == '__main__':
         with open(args.classes, 'r') as f:
             disease_classes = [line.strip() for line in f.readlines()]
     
+    # Crop cache is written back when the server exits
+    if args.crop_cache:
+        crop_cache = CropClassificationCache(
+            max_size=args.crop_cache_size,
+            path=args.crop_cache,
+            model_id=os.path.realpath(args.disease_model)
+        )
+        atexit.register(crop_cache.save)
+    
     # Initialize detector
     print("🚀 Initializing Backend API...")
     initialize_detector(
@@ -387,7 +282,15 @@ if __name__ == '__main__':
         pest_model=args.pest_model,
         disease_model=args.disease_model,
         disease_classes=disease_classes,
-        plant_detector=args.plant_detector
+        plant_detector=args.plant_detector,
+        backend=args.backend,
+        lazy_load=args.lazy_load,
+        warmup=not args.no_warmup,
+        pool_size=args.pool_size,
+        per_thread=args.per_thread,
+        max_waiting=args.max_waiting,
+        acquire_timeout=args.acquire_timeout,
+        crop_cache=crop_cache
     )
     
     print(f"🌐 Starting API server on {args.host}:{args.port}")
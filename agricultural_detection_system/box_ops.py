@@ -0,0 +1,149 @@
+"""
+Vectorized bounding box helpers (numpy)
+Boxes are (N, 4) arrays of x1, y1, x2, y2 in pixel coordinates
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def box_area(boxes: np.ndarray) -> np.ndarray:
+    """
+    Area of each box
+
+    Args:
+        boxes: (N, 4) array of boxes
+
+    Returns:
+        (N,) array of areas (0 for degenerate boxes)
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def _intersection(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise intersection areas of two (N, 4) and (M, 4) float arrays, as an (N, M) array"""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    return wh[..., 0] * wh[..., 1]
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection-over-union between two sets of boxes
+
+    Args:
+        boxes_a: (N, 4) array of boxes
+        boxes_b: (M, 4) array of boxes
+
+    Returns:
+        (N, M) array of IoU values
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    intersection = _intersection(boxes_a, boxes_b)
+
+    union = box_area(boxes_a)[:, None] + box_area(boxes_b)[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0).astype(np.float32)
+
+
+def box_ios(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection over the smaller box's area
+
+    Unlike IoU this is close to 1 when a box cut off at a tile border lies
+    inside the full box of the same object detected in a neighbouring tile.
+
+    Args:
+        boxes_a: (N, 4) array of boxes
+        boxes_b: (M, 4) array of boxes
+
+    Returns:
+        (N, M) array of intersection-over-smaller values
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    intersection = _intersection(boxes_a, boxes_b)
+
+    smaller = np.minimum(box_area(boxes_a)[:, None], box_area(boxes_b)[None, :])
+    return np.where(smaller > 0, intersection / np.maximum(smaller, 1e-9), 0.0).astype(np.float32)
+
+
+def batched_nms(boxes: np.ndarray,
+                scores: np.ndarray,
+                class_ids: np.ndarray,
+                threshold: float = 0.5,
+                metric: str = 'iou') -> np.ndarray:
+    """
+    Class-aware greedy non-maximum suppression
+
+    Args:
+        boxes: (N, 4) array of boxes
+        scores: (N,) confidence per box
+        class_ids: (N,) class per box; boxes of different classes never suppress each other
+        threshold: Overlap above which the lower-scoring box is suppressed
+        metric: 'iou' or 'ios' (intersection over the smaller box, see box_ios)
+
+    Returns:
+        Indices of the kept boxes, highest score first
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=np.int64)
+
+    # Shift each class to its own region so one overlap matrix covers all classes
+    offsets = np.asarray(class_ids, dtype=np.float32).reshape(-1, 1) * (boxes.max() + 1)
+    shifted = boxes + offsets
+
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    overlap = (box_ios if metric == 'ios' else box_iou)(shifted[order], shifted[order])
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        suppressed[i + 1:] |= overlap[i, i + 1:] > threshold
+    return order[~suppressed]
+
+
+def tile_grid(width: int,
+              height: int,
+              tile_size: int,
+              overlap: float = 0.2,
+              max_tiles: Optional[int] = None) -> np.ndarray:
+    """
+    Overlapping square tiles covering an image
+
+    Tiles are spaced tile_size * (1 - overlap) apart; the last row/column is
+    aligned to the image border. If the grid would exceed max_tiles, the
+    tiles are enlarged until it fits.
+
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Tile side length in pixels
+        overlap: Fraction of a tile shared with its neighbour
+        max_tiles: Maximum number of tiles (default: unlimited)
+
+    Returns:
+        (T, 4) int array of tile windows x1, y1, x2, y2
+    """
+    def axis_starts(length, tile, stride):
+        if length <= tile:
+            return [0]
+        count = int(np.ceil((length - tile) / stride)) + 1
+        return [min(i * stride, length - tile) for i in range(count)]
+
+    tile = max(1, int(tile_size))
+    while True:
+        stride = max(1, int(tile * (1 - overlap)))
+        xs = axis_starts(width, tile, stride)
+        ys = axis_starts(height, tile, stride)
+        if max_tiles is None or len(xs) * len(ys) <= max(1, max_tiles):
+            break
+        tile = int(tile * 1.25) + 1
+
+    return np.array([[x, y, min(x + tile, width), min(y + tile, height)]
+                     for y in ys for x in xs], dtype=np.int32)
@@ -0,0 +1,233 @@
+"""
+Perceptual-hash LRU cache for plant crop classifications
+Crops that look the same (overlapping flight lanes, hovering frames, repeated
+uploads) get the cached disease label instead of another model call.
+Keys are a 64-bit DCT perceptual hash of the downscaled crop plus a coarse
+color code, so crops of the same shape but different color (e.g. yellowing
+leaves) never share an entry.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+CACHE_FILE_VERSION = 1
+
+# Hash computation: crop is reduced to HASH_INPUT_SIZE gray, DCT, top-left HASH_SIZE x HASH_SIZE
+HASH_INPUT_SIZE = 32
+HASH_SIZE = 8
+
+# Color code: mean B, G, R quantized to COLOR_LEVELS levels each
+COLOR_LEVELS = 8
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Number of set bits of each uint64"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def crop_key(crop: np.ndarray) -> Tuple[int, int]:
+    """
+    Cache key of a crop
+
+    Args:
+        crop: Plant crop (BGR)
+
+    Returns:
+        (color code, 64-bit perceptual hash)
+    """
+    small = cv2.resize(crop, (HASH_INPUT_SIZE, HASH_INPUT_SIZE), interpolation=cv2.INTER_AREA)
+
+    blue, green, red = cv2.mean(small)[:3]
+    step = 256 // COLOR_LEVELS
+    color = (int(blue) // step * COLOR_LEVELS + int(green) // step) * COLOR_LEVELS + int(red) // step
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    low_frequencies = cv2.dct(gray)[:HASH_SIZE, :HASH_SIZE].reshape(-1)
+    # Skip the DC term for the median so overall brightness does not flip every bit
+    bits = low_frequencies > np.median(low_frequencies[1:])
+    phash = int(np.packbits(bits).view('>u8')[0])
+    return color, phash
+
+
+class CropClassificationCache:
+    """Thread-safe LRU cache of (label, confidence) keyed by crop appearance"""
+
+    def __init__(self,
+                 max_size: int = 10000,
+                 max_distance: int = 2,
+                 path: Optional[str] = None,
+                 model_id: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached crops (least recently used are evicted)
+            max_distance: Hamming distance between hashes still counted as the same crop
+                          (0 = exact hash match only)
+            path: JSON file the cache is loaded from (if it exists) and saved to
+            model_id: Identifies the classifier the entries came from; a saved
+                      cache from a different model is ignored
+        """
+        self.max_size = max(1, max_size)
+        self.max_distance = max_distance
+        self.path = path
+        self.model_id = model_id
+
+        self._entries: 'OrderedDict[Tuple[int, int], Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Key arrays for the Hamming search, rebuilt after the entries change
+        self._colors: Optional[np.ndarray] = None
+        self._hashes: Optional[np.ndarray] = None
+        self._index_keys: List[Tuple[int, int]] = []
+
+        # Statistics
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        if path and os.path.isfile(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _nearest(self, key: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Closest cached key with the same color code within max_distance"""
+        if self._hashes is None:
+            self._index_keys = list(self._entries)
+            self._colors = np.array([color for color, _ in self._index_keys], dtype=np.int64)
+            self._hashes = np.array([phash for _, phash in self._index_keys], dtype=np.uint64)
+        if not self._index_keys:
+            return None
+
+        color, phash = key
+        distances = _popcount(self._hashes ^ np.uint64(phash)).astype(np.int64)
+        distances[self._colors != color] = self.max_distance + 1
+        best = int(np.argmin(distances))
+        if distances[best] > self.max_distance:
+            return None
+        return self._index_keys[best]
+
+    def get(self, key: Tuple[int, int]) -> Optional[Tuple[str, float]]:
+        """
+        Look up a crop key
+
+        Returns:
+            Cached (label, confidence), or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None and self.max_distance > 0:
+                near_key = self._nearest(key)
+                if near_key is not None:
+                    value = self._entries[near_key]
+                    key = near_key
+                    self.near_hits += 1
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[int, int], label: str, confidence: float):
+        """Store the classification of a crop key"""
+        with self._lock:
+            if key not in self._entries:
+                self._hashes = None
+            self._entries[key] = (label, float(confidence))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._hashes = None
+
+    def settings(self) -> Dict:
+        """Identity and settings of the cache; they decide which classifications a lookup returns"""
+        return {
+            'path': os.path.abspath(self.path) if self.path else None,
+            'model_id': self.model_id,
+            'max_size': self.max_size,
+            'max_distance': self.max_distance
+        }
+
+    def stats(self) -> Dict:
+        """Hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def save(self, path: Optional[str] = None) -> str:
+        """
+        Write the cache to a JSON file (atomically)
+
+        Args:
+            path: Output file (default: the path given at construction)
+
+        Returns:
+            Path of the written file
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No cache path given")
+
+        with self._lock:
+            data = {
+                'version': CACHE_FILE_VERSION,
+                'model_id': self.model_id,
+                'entries': [[color, f"{phash:016x}", label, confidence]
+                            for (color, phash), (label, confidence) in self._entries.items()]
+            }
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, path: str) -> int:
+        """
+        Load entries saved with save(), keeping their LRU order
+
+        Returns:
+            Number of entries loaded
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        if data.get('version') != CACHE_FILE_VERSION:
+            print(f"⚠️  Ignoring crop cache with unsupported version: {path}")
+            return 0
+        if self.model_id and data.get('model_id') and data['model_id'] != self.model_id:
+            print(f"⚠️  Ignoring crop cache from a different model: {path}")
+            return 0
+
+        with self._lock:
+            for color, phash, label, confidence in data['entries']:
+                self._entries[(int(color), int(phash, 16))] = (label, float(confidence))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._hashes = None
+
+        print(f"📂 Loaded {len(data['entries'])} cached crop classifications from {path}")
+        return len(data['entries'])
@@ -0,0 +1,284 @@
+"""
+Compact columnar storage for detection results
+Detections are kept in numpy arrays instead of lists of dicts:
+- boxes as int32 (N, 4), confidences as float32
+- class ids and disease label ids as int16
+- healthy/diseased flags precomputed once per disease label
+The dict/JSON form is only built on demand with to_dict()/to_list()
+"""
+
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+# Categories produced by UnifiedAgriculturalDetector, in output order
+DETECTION_KINDS = ('weeds', 'pests', 'diseases', 'water_stress')
+
+
+class LabelVocabulary:
+    """Maps disease label strings to compact ids with precomputed health flags"""
+
+    __slots__ = ('labels', 'healthy', '_ids', '_lock')
+
+    def __init__(self, labels: Optional[Sequence[str]] = None):
+        """
+        Initialize the vocabulary
+
+        Args:
+            labels: Known label names (e.g. the disease class names). Labels
+                    seen later are added on first use.
+        """
+        self.labels: List[str] = []
+        self.healthy = np.zeros((0,), dtype=bool)
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for label in labels or []:
+            self.id_for(label)
+
+    def id_for(self, label: str) -> int:
+        """Return the id of a label, adding it to the vocabulary if needed"""
+        label_id = self._ids.get(label)
+        if label_id is not None:
+            return label_id
+
+        with self._lock:
+            label_id = self._ids.get(label)
+            if label_id is None:
+                label_id = len(self.labels)
+                self.labels.append(label)
+                self.healthy = np.append(self.healthy, 'healthy' in label.lower())
+                self._ids[label] = label_id
+        return label_id
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getstate__(self):
+        # Locks cannot be pickled (detections sent between processes)
+        return self.labels, self.healthy, self._ids
+
+    def __setstate__(self, state):
+        self.labels, self.healthy, self._ids = state
+        self._lock = threading.Lock()
+
+
+class DetectionSet:
+    """Detections of one category (weeds, pests, diseases, ...) in one frame"""
+
+    __slots__ = ('kind', 'boxes', 'confidences', 'class_ids', 'label_ids', 'plant_ids', 'vocabulary')
+
+    def __init__(self,
+                 kind: str,
+                 boxes: np.ndarray,
+                 confidences: np.ndarray,
+                 class_ids: Optional[np.ndarray] = None,
+                 label_ids: Optional[np.ndarray] = None,
+                 plant_ids: Optional[np.ndarray] = None,
+                 vocabulary: Optional[LabelVocabulary] = None):
+        """
+        Initialize a detection set
+
+        Args:
+            kind: Detection category ('weeds', 'pests', 'diseases' or 'water_stress')
+            boxes: Bounding boxes as (N, 4) array of x1, y1, x2, y2
+            confidences: Confidence per detection
+            class_ids: YOLO class id per detection (pests)
+            label_ids: Disease label id per detection, indexing vocabulary (diseases)
+            plant_ids: Plant id per detection, -1 when the detection is not tied to a plant (diseases)
+            vocabulary: Label vocabulary for label_ids
+        """
+        self.kind = kind
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        self.class_ids = None if class_ids is None else np.asarray(class_ids, dtype=np.int16)
+        self.label_ids = None if label_ids is None else np.asarray(label_ids, dtype=np.int16)
+        self.plant_ids = None if plant_ids is None else np.asarray(plant_ids, dtype=np.int32)
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def empty(cls, kind: str, vocabulary: Optional[LabelVocabulary] = None) -> 'DetectionSet':
+        """Create a detection set without detections"""
+        empty = np.zeros((0,), dtype=np.int16)
+        if kind == 'pests':
+            return cls(kind, np.zeros((0, 4)), np.zeros((0,)), class_ids=empty)
+        if kind == 'diseases':
+            return cls(kind, np.zeros((0, 4)), np.zeros((0,)), label_ids=empty,
+                       plant_ids=np.zeros((0,), dtype=np.int32), vocabulary=vocabulary)
+        return cls(kind, np.zeros((0, 4)), np.zeros((0,)))
+
+    def state(self) -> Dict:
+        """Detections as a JSON-serializable dict (see from_state); disease labels as strings"""
+        state = {'boxes': self.boxes.tolist(), 'confidences': self.confidences.tolist()}
+        if self.class_ids is not None:
+            state['class_ids'] = self.class_ids.tolist()
+        if self.label_ids is not None:
+            state['labels'] = self.labels
+        if self.plant_ids is not None:
+            state['plant_ids'] = self.plant_ids.tolist()
+        return state
+
+    @classmethod
+    def from_state(cls, kind: str, state: Dict, vocabulary: Optional[LabelVocabulary] = None) -> 'DetectionSet':
+        """
+        Recreate a detection set from state()
+
+        Args:
+            kind: Detection category
+            state: Output of state()
+            vocabulary: Vocabulary the disease labels are looked up in (diseases)
+        """
+        label_ids = None
+        if 'labels' in state:
+            label_ids = np.array([vocabulary.id_for(label) for label in state['labels']], dtype=np.int16)
+        return cls(kind, np.array(state['boxes']).reshape(-1, 4), np.array(state['confidences']),
+                   class_ids=state.get('class_ids'), label_ids=label_ids,
+                   plant_ids=state.get('plant_ids'), vocabulary=vocabulary if label_ids is not None else None)
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, index: int) -> Dict:
+        """Build the dict form of a single detection"""
+        bbox = self.boxes[index].tolist()
+        confidence = self.confidences[index].item()
+        if self.kind == 'pests':
+            return {'bbox': bbox, 'confidence': confidence, 'class_id': int(self.class_ids[index])}
+        if self.kind == 'diseases':
+            detection = {
+                'label': self.vocabulary.labels[self.label_ids[index]],
+                'confidence': confidence,
+                'bbox': bbox
+            }
+            if self.plant_ids[index] >= 0:
+                detection['plant_id'] = int(self.plant_ids[index])
+            return detection
+        return {'bbox': bbox, 'confidence': confidence}
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over detections in dict form (built lazily, one at a time)"""
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[Dict]:
+        """Return all detections as a list of dicts (the JSON output format)"""
+        return list(self)
+
+    @property
+    def labels(self) -> List[str]:
+        """Disease label string per detection"""
+        if self.label_ids is None:
+            return []
+        return [self.vocabulary.labels[label_id] for label_id in self.label_ids.tolist()]
+
+    def healthy_mask(self) -> np.ndarray:
+        """Boolean array marking detections whose disease label is healthy"""
+        if self.label_ids is None or len(self) == 0:
+            return np.zeros((len(self),), dtype=bool)
+        return self.vocabulary.healthy[self.label_ids]
+
+    def healthy_count(self) -> int:
+        """Number of detections with a healthy label"""
+        return int(np.count_nonzero(self.healthy_mask()))
+
+    def diseased_count(self) -> int:
+        """Number of detections with a non-healthy label"""
+        return len(self) - self.healthy_count()
+
+
+class FrameDetections(Mapping):
+    """
+    All detections of one frame
+
+    Behaves like the read-only dict detect_all used to return
+    ({'weeds': ..., 'pests': ..., 'diseases': ..., 'water_stress': ..., 'timestamp': ...}),
+    with a DetectionSet per category. Use to_dict() for the JSON form.
+    resolution holds the YOLO input size used per model when the detector
+    runs with a latency target (None otherwise).
+    """
+
+    __slots__ = ('weeds', 'pests', 'diseases', 'water_stress', 'timestamp', 'resolution')
+
+    def __init__(self,
+                 weeds: DetectionSet,
+                 pests: DetectionSet,
+                 diseases: DetectionSet,
+                 water_stress: DetectionSet,
+                 timestamp: str,
+                 resolution: Optional[Dict[str, int]] = None):
+        self.weeds = weeds
+        self.pests = pests
+        self.diseases = diseases
+        self.water_stress = water_stress
+        self.timestamp = timestamp
+        self.resolution = resolution
+
+    def __getitem__(self, key: str):
+        if key in DETECTION_KINDS or key == 'timestamp':
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from DETECTION_KINDS
+        yield 'timestamp'
+
+    def __len__(self) -> int:
+        return len(DETECTION_KINDS) + 1
+
+    def to_dict(self) -> Dict:
+        """Return the detections in the original list-of-dicts JSON format"""
+        detections = {
+            'weeds': self.weeds.to_list(),
+            'pests': self.pests.to_list(),
+            'diseases': self.diseases.to_list(),
+            'water_stress': self.water_stress.to_list(),
+            'timestamp': self.timestamp
+        }
+        if self.resolution is not None:
+            detections['resolution'] = dict(self.resolution)
+        return detections
+
+    def state(self) -> Dict:
+        """All detections as a JSON-serializable dict (see from_state)"""
+        state = {kind: getattr(self, kind).state() for kind in DETECTION_KINDS}
+        state['timestamp'] = self.timestamp
+        state['resolution'] = self.resolution
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict, vocabulary: LabelVocabulary) -> 'FrameDetections':
+        """Recreate frame detections from state(), with disease labels in vocabulary"""
+        detection_sets = {kind: DetectionSet.from_state(kind, state[kind], vocabulary) for kind in DETECTION_KINDS}
+        return cls(timestamp=state['timestamp'], resolution=state['resolution'], **detection_sets)
+
+    def adopt_vocabulary(self, vocabulary: LabelVocabulary, mappings: Optional[Dict[int, np.ndarray]] = None):
+        """
+        Re-express disease label ids in another vocabulary (in place)
+
+        Needed for detections made in another process or loaded from disk,
+        which carry their own copy of the vocabulary.
+
+        Args:
+            vocabulary: Vocabulary the label ids should refer to
+            mappings: Cache of id mappings per source vocabulary, shared
+                      between calls for detections from the same source
+        """
+        if mappings is None:
+            mappings = {}
+        for kind in DETECTION_KINDS:
+            detection_set = getattr(self, kind)
+            source = detection_set.vocabulary
+            if source is None or source is vocabulary:
+                continue
+            mapping = mappings.get(id(source))
+            if mapping is None:
+                mapping = np.array([vocabulary.id_for(label) for label in source.labels], dtype=np.int64)
+                mappings[id(source)] = mapping
+            if len(detection_set.label_ids):
+                detection_set.label_ids = mapping[detection_set.label_ids].astype(detection_set.label_ids.dtype)
+            detection_set.vocabulary = vocabulary
@@ -0,0 +1,214 @@
+"""
+Thread-safe pool of UnifiedAgriculturalDetector instances for multi-threaded serving
+Each request checks out its own detector, so concurrent requests never share
+model objects or batch buffers. Concurrency is bounded by the pool size;
+extra requests queue up to max_waiting and are rejected after that.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from unified_agricultural_detector import UnifiedAgriculturalDetector
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when no detector becomes available (queue full or timeout)"""
+
+
+class DetectorPool:
+    """Bounded pool of at most `size` independent detectors"""
+
+    def __init__(self,
+                 detector_kwargs: Dict,
+                 size: Optional[int] = None,
+                 per_thread: bool = False,
+                 max_waiting: Optional[int] = None,
+                 acquire_timeout: Optional[float] = None,
+                 max_threads: Optional[int] = None,
+                 preload: bool = True,
+                 detector_factory: Optional[Callable[..., 'UnifiedAgriculturalDetector']] = None):
+        """
+        Initialize the detector pool
+
+        Args:
+            detector_kwargs: Keyword arguments for UnifiedAgriculturalDetector
+            size: Maximum number of detections running at once
+                  (default: one per 4 CPU cores)
+            per_thread: Hand every thread the detector it used last when that one
+                        is idle (keeps a thread's warm buffers to itself). Detectors
+                        are still returned after each request and shared between
+                        threads, so a server starting a thread per request does not
+                        create more than `size` instances.
+            max_waiting: Maximum number of requests queued for a detector
+                         (default: unbounded)
+            acquire_timeout: Seconds a request may wait for a detector (default: forever)
+            max_threads: Total thread budget split between the instances
+                         (default: number of CPU cores)
+            preload: Create all `size` instances now instead of on first use
+            detector_factory: Creates a detector from detector_kwargs
+                              (default: UnifiedAgriculturalDetector)
+        """
+        total_threads = max_threads or os.cpu_count() or 1
+        self.size = max(1, size or total_threads // 4)
+        self.per_thread = per_thread
+        self.max_waiting = max_waiting
+        self.acquire_timeout = acquire_timeout
+
+        # Split the cores between the instances so they do not oversubscribe them
+        self.threads_per_instance = max(1, total_threads // self.size)
+        self.detector_kwargs = dict(detector_kwargs)
+        self.detector_kwargs.setdefault('max_threads', self.threads_per_instance)
+        if detector_factory is None:
+            from unified_agricultural_detector import UnifiedAgriculturalDetector, configure_torch_threads
+
+            # Once for the whole pool: the setting is process-wide
+            configure_torch_threads(self.detector_kwargs)
+            detector_factory = UnifiedAgriculturalDetector
+        self.detector_factory = detector_factory
+
+        self._slots = threading.BoundedSemaphore(self.size)
+        # Idle detectors, most recently returned last
+        self._idle: List['UnifiedAgriculturalDetector'] = []
+        self._local = threading.local()
+        self._instances: List['UnifiedAgriculturalDetector'] = []
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._in_use = 0
+        self._waiting = 0
+        self._served = 0
+        self._rejected = 0
+        self._wait_total_ms = 0.0
+
+        print(f"🧵 Detector pool: {self.size} concurrent detection(s), "
+              f"{self.threads_per_instance} threads each"
+              + (" (one detector per thread)" if per_thread else ""))
+
+        if preload:
+            for _ in range(self.size):
+                self._idle.append(self._create_detector())
+
+    def _create_detector(self) -> 'UnifiedAgriculturalDetector':
+        """Create a new detector instance"""
+        detector = self.detector_factory(**self.detector_kwargs)
+        with self._lock:
+            self._instances.append(detector)
+        return detector
+
+    def acquire(self, timeout: Optional[float] = None) -> 'UnifiedAgriculturalDetector':
+        """
+        Check out a detector, waiting until one is free
+
+        Args:
+            timeout: Seconds to wait (default: the pool's acquire_timeout)
+
+        Returns:
+            A detector owned by the caller until release()
+
+        Raises:
+            PoolBusyError: If the wait queue is full or the timeout expires
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+
+        with self._lock:
+            if (self.max_waiting is not None and self._in_use >= self.size
+                    and self._waiting >= self.max_waiting):
+                self._rejected += 1
+                raise PoolBusyError(f"Detector pool busy ({self._waiting} requests waiting)")
+            self._waiting += 1
+
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=timeout)
+        wait_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._rejected += 1
+            else:
+                self._in_use += 1
+                self._wait_total_ms += wait_ms
+
+        if not acquired:
+            raise PoolBusyError(f"No detector available within {timeout}s")
+
+        try:
+            return self._checkout()
+        except Exception:
+            self._return_slot()
+            raise
+
+    def _checkout(self) -> 'UnifiedAgriculturalDetector':
+        """Take an idle detector (this thread's last one if possible), creating it if needed"""
+        detector = None
+        with self._lock:
+            preferred = getattr(self._local, 'detector', None) if self.per_thread else None
+            if preferred is not None and any(idle is preferred for idle in self._idle):
+                self._idle = [idle for idle in self._idle if idle is not preferred]
+                detector = preferred
+            elif self._idle:
+                detector = self._idle.pop()
+
+        # At most `size` detectors are checked out, so no idle one means fewer than `size` exist
+        if detector is None:
+            detector = self._create_detector()
+        if self.per_thread:
+            self._local.detector = detector
+        return detector
+
+    def release(self, detector: 'UnifiedAgriculturalDetector'):
+        """Return a detector checked out with acquire()"""
+        with self._lock:
+            self._idle.append(detector)
+            self._served += 1
+        self._return_slot()
+
+    def _return_slot(self):
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    @contextmanager
+    def detector(self, timeout: Optional[float] = None) -> Iterator['UnifiedAgriculturalDetector']:
+        """Context manager form of acquire()/release()"""
+        detector = self.acquire(timeout)
+        try:
+            yield detector
+        finally:
+            self.release(detector)
+
+    def stats(self) -> Dict:
+        """Pool usage statistics"""
+        with self._lock:
+            checkouts = self._served + self._in_use
+            return {
+                'size': self.size,
+                'per_thread': self.per_thread,
+                'instances': len(self._instances),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'served': self._served,
+                'rejected': self._rejected,
+                'mean_wait_ms': round(self._wait_total_ms / checkouts, 1) if checkouts else 0.0
+            }
+
+    def model_status_report(self) -> Dict:
+        """Model load state of every instance (see UnifiedAgriculturalDetector.model_status_report)"""
+        with self._lock:
+            instances = list(self._instances)
+        reports = [detector.model_status_report() for detector in instances]
+        return {
+            'ready': bool(reports) and all(report['ready'] for report in reports),
+            'instances': reports
+        }
+
+    def close(self):
+        """Shut down every detector's worker pools"""
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for detector in instances:
+            detector.close()
@@ -0,0 +1,428 @@
+"""
+Incremental farm health report
+FarmReportAccumulator keeps running aggregates of per-frame detections (counts,
+coverage sums, strongest disease confidence), so adding a frame is O(1) in the
+length of the job and a report can be produced at any point. Accumulators of
+different parts of a video (shards, runs before and after a checkpoint) can be
+merged. The report formats of the video analysis, the AI service and the
+farm health API are all built from it.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+
+
+# Detection categories counted per frame
+REPORT_KINDS = ('weeds', 'pests', 'diseases', 'water_stress')
+
+# Frame-average area coverage fields (from calculate_area_coverage)
+AREA_FIELDS = ('good_crop_percentage', 'bad_crop_percentage', 'weed_percentage')
+
+# Yield per acre the yield percentage is relative to (bushels)
+BASE_YIELD_PER_ACRE = 150.0
+
+
+def _severity(count: int, high: int, medium: int) -> str:
+    """Severity level of a detection count"""
+    if count > high:
+        return 'high'
+    if count > medium:
+        return 'medium'
+    if count > 0:
+        return 'low'
+    return 'none'
+
+
+class FarmReportAccumulator:
+    """Running totals of frame detections, from which all report formats are built"""
+
+    def __init__(self, keep_detections: bool = False):
+        """
+        Initialize an empty accumulator
+
+        Args:
+            keep_detections: Also keep every detection (dict form) for reports that
+                             list them (health_report); memory then grows with the job
+        """
+        self.keep_detections = keep_detections
+
+        self.frames = 0
+        self.frames_with_detections = 0
+        self.counts = {kind: 0 for kind in REPORT_KINDS}
+        self.max_disease_confidence = 0.0
+
+        # Sums over the frames added with area/yield statistics
+        self.area_frames = 0
+        self.area_totals = {field: 0.0 for field in AREA_FIELDS}
+        self.yield_total = 0.0
+
+        self.detections: Optional[Dict[str, List[Dict]]] = (
+            {kind: [] for kind in REPORT_KINDS} if keep_detections else None)
+
+    def add(self,
+            detections: Mapping,
+            area_stats: Optional[Dict] = None,
+            yield_stats: Optional[Dict] = None):
+        """
+        Add the detections of one frame (or image)
+
+        Args:
+            detections: FrameDetections, or a dict with lists of detection dicts
+            area_stats: Area coverage of the frame (calculate_area_coverage)
+            yield_stats: Yield estimate of the frame (estimate_yield)
+        """
+        self.frames += 1
+        for kind in REPORT_KINDS:
+            self.counts[kind] += len(detections.get(kind, []))
+        if detections.get('weeds') or detections.get('pests') or detections.get('diseases'):
+            self.frames_with_detections += 1
+
+        diseases = detections.get('diseases', [])
+        if len(diseases):
+            if hasattr(diseases, 'confidences'):
+                confidence = diseases.confidences.max().item()
+            else:
+                confidence = max(disease.get('confidence', 0.0) for disease in diseases)
+            self.max_disease_confidence = max(self.max_disease_confidence, confidence)
+
+        if area_stats is not None:
+            self.area_frames += 1
+            for field in AREA_FIELDS:
+                self.area_totals[field] += area_stats[field]
+        if yield_stats is not None:
+            self.yield_total += yield_stats['estimated_yield_per_acre']
+
+        if self.detections is not None:
+            for kind in REPORT_KINDS:
+                self.detections[kind].extend(detections.get(kind, []))
+
+    def merge(self, other: 'FarmReportAccumulator') -> 'FarmReportAccumulator':
+        """
+        Add the totals of another accumulator (e.g. of another part of the video)
+
+        Returns:
+            self
+        """
+        self.frames += other.frames
+        self.frames_with_detections += other.frames_with_detections
+        for kind in REPORT_KINDS:
+            self.counts[kind] += other.counts[kind]
+        self.max_disease_confidence = max(self.max_disease_confidence, other.max_disease_confidence)
+
+        self.area_frames += other.area_frames
+        for field in AREA_FIELDS:
+            self.area_totals[field] += other.area_totals[field]
+        self.yield_total += other.yield_total
+
+        if self.detections is not None and other.detections is not None:
+            for kind in REPORT_KINDS:
+                self.detections[kind].extend(other.detections[kind])
+        return self
+
+    def snapshot(self) -> Dict:
+        """Current totals as a JSON-serializable dict (see from_snapshot)"""
+        return {
+            'frames': self.frames,
+            'frames_with_detections': self.frames_with_detections,
+            'counts': dict(self.counts),
+            'max_disease_confidence': self.max_disease_confidence,
+            'area_frames': self.area_frames,
+            'area_totals': dict(self.area_totals),
+            'yield_total': self.yield_total,
+            'detections': ({kind: list(items) for kind, items in self.detections.items()}
+                           if self.detections is not None else None)
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> 'FarmReportAccumulator':
+        """Recreate an accumulator from snapshot()"""
+        accumulator = cls(keep_detections=snapshot['detections'] is not None)
+        accumulator.frames = snapshot['frames']
+        accumulator.frames_with_detections = snapshot['frames_with_detections']
+        accumulator.counts = dict(snapshot['counts'])
+        accumulator.max_disease_confidence = snapshot['max_disease_confidence']
+        accumulator.area_frames = snapshot['area_frames']
+        accumulator.area_totals = dict(snapshot['area_totals'])
+        accumulator.yield_total = snapshot['yield_total']
+        if snapshot['detections'] is not None:
+            accumulator.detections = {kind: list(items) for kind, items in snapshot['detections'].items()}
+        return accumulator
+
+    def video_report(self) -> Dict:
+        """
+        Frame-averaged sections of the drone video report (process_video_file)
+
+        Returns:
+            Dictionary with 'area_coverage', 'yield_estimation' and 'detection_summary'
+        """
+        frames = self.area_frames
+        avg_good = self.area_totals['good_crop_percentage'] / frames if frames > 0 else 0
+        avg_bad = self.area_totals['bad_crop_percentage'] / frames if frames > 0 else 0
+        avg_weed = self.area_totals['weed_percentage'] / frames if frames > 0 else 0
+        avg_yield = self.yield_total / frames if frames > 0 else 0
+
+        weeds, pests, diseases = self.counts['weeds'], self.counts['pests'], self.counts['diseases']
+        return {
+            'area_coverage': {
+                'good_crop_percentage': float(avg_good),
+                'bad_crop_percentage': float(avg_bad),
+                'weed_percentage': float(avg_weed),
+                'remaining_percentage': float(100 - avg_good - avg_bad - avg_weed)
+            },
+            'yield_estimation': {
+                'average_yield_per_acre': float(avg_yield),
+                'yield_percentage': float((avg_yield / BASE_YIELD_PER_ACRE) * 100) if avg_yield > 0 else 0,
+                'base_yield_per_acre': BASE_YIELD_PER_ACRE
+            },
+            'detection_summary': {
+                'total_weeds_detected': weeds,
+                'total_pests_detected': pests,
+                'total_diseases_detected': diseases,
+                'avg_weeds_per_frame': weeds / self.frames if self.frames > 0 else 0,
+                'avg_pests_per_frame': pests / self.frames if self.frames > 0 else 0,
+                'avg_diseases_per_frame': diseases / self.frames if self.frames > 0 else 0
+            }
+        }
+
+    def class_counts(self) -> Dict[str, int]:
+        """Detection counts under the AI service's class names (categories with detections only)"""
+        class_counts = {}
+        for class_name, kind in (('weed', 'weeds'),
+                                 ('pest_presence', 'pests'),
+                                 ('diseased_crop', 'diseases')):
+            if self.counts[kind]:
+                class_counts[class_name] = self.counts[kind]
+        return class_counts
+
+    def service_analysis(self) -> Dict:
+        """Video analysis section of the AI service results"""
+        class_counts = self.class_counts()
+
+        # Parse detection counts from YOLO output
+        weeds_detected = class_counts.get('weed', 0)
+        healthy_crops = class_counts.get('healthy_crop', 0) + class_counts.get('Healthy', 0)
+        unhealthy_crops = class_counts.get('unhealthy_crop', 0) + class_counts.get('Unhealthy', 0)
+        diseases_detected = sum(v for k, v in class_counts.items() if 'disease' in k.lower() or 'corn' in k.lower() or 'tomato' in k.lower())
+
+        total_detections = sum(class_counts.values())
+
+        # Calculate area coverage percentages
+        total_crop_area = max(1, healthy_crops + unhealthy_crops + weeds_detected)
+        good_crop_area = (healthy_crops / total_crop_area) * 100
+        bad_crop_area = (unhealthy_crops / total_crop_area) * 100
+        weed_coverage = (weeds_detected / total_crop_area) * 100
+        disease_coverage = (diseases_detected / total_crop_area) * 100
+
+        # Calculate yield estimation
+        yield_estimation = max(0, min(100, good_crop_area - (weed_coverage * 0.5) - (disease_coverage * 0.3)))
+
+        # Calculate health score
+        health_score = max(0, min(100, good_crop_area - (bad_crop_area * 0.5) - (weed_coverage * 0.3)))
+
+        # Determine farm health status
+        if health_score >= 80:
+            farm_health_status = 'EXCELLENT'
+        elif health_score >= 60:
+            farm_health_status = 'GOOD'
+        elif health_score >= 40:
+            farm_health_status = 'FAIR'
+        elif health_score >= 20:
+            farm_health_status = 'POOR'
+        else:
+            farm_health_status = 'CRITICAL'
+
+        # Calculate detection coverage
+        detection_coverage = (self.frames_with_detections / max(1, self.frames)) * 100
+
+        # Generate recommendations based on REAL detections
+        recommendations = []
+        if weed_coverage > 30:
+            recommendations.append('⚠️ WARNING: Significant weed infestation detected - Implement weed control measures')
+        elif weed_coverage > 15:
+            recommendations.append('Apply targeted weed control in affected areas')
+
+        if disease_coverage > 20:
+            recommendations.append('⚠️ WARNING: Disease presence detected in crops - Apply disease treatment protocols')
+        elif disease_coverage > 10:
+            recommendations.append('Monitor diseased crops for spread prevention')
+
+        if bad_crop_area > 40:
+            recommendations.append('Investigate causes of crop health decline')
+            recommendations.append('Consider soil testing and nutrient analysis')
+
+        if class_counts.get('pest_presence', 0) > 10:
+            recommendations.append('Investigate pest presence and consider pest control measures')
+
+        if health_score < 40:
+            recommendations.append('Review irrigation and fertilization practices')
+
+        if not recommendations:
+            recommendations.append('✅ Crops appear healthy - continue regular monitoring')
+
+        return {
+            'total_detections': total_detections,
+            'healthy_crops': healthy_crops,
+            'unhealthy_crops': unhealthy_crops,
+            'weeds_detected': weeds_detected,
+            'diseases_detected': diseases_detected,
+            'health_score': round(health_score, 1),
+            'yield_estimation': round(yield_estimation, 1),
+            'farm_health_status': farm_health_status,
+            'detection_coverage': round(detection_coverage, 1),
+            'area_coverage': {
+                'good_crop_area': round(good_crop_area, 2),
+                'bad_crop_area': round(bad_crop_area, 2),
+                'weed_coverage': round(weed_coverage, 2),
+                'disease_coverage': round(disease_coverage, 2)
+            },
+            'recommendations': recommendations,
+            'crop_health_issues': {
+                'diseased_crops': diseases_detected,
+                'total_health_issues': diseases_detected + unhealthy_crops,
+                'healthy_crops': healthy_crops,
+                'severity': 'low' if health_score > 70 else 'medium' if health_score > 40 else 'high'
+            },
+            'pest_infestations': {
+                'pest_presence': class_counts.get('pest_presence', 0),
+                'total_pest_issues': class_counts.get('pest_presence', 0),
+                'infestation_level': 'low' if class_counts.get('pest_presence', 0) < 20 else 'medium' if class_counts.get('pest_presence', 0) < 50 else 'high'
+            },
+            'weed_growth': {
+                'weeds': weeds_detected,
+                'total_weeds': weeds_detected,
+                'infestation_level': 'low' if weed_coverage < 20 else 'medium' if weed_coverage < 40 else 'high'
+            }
+        }
+
+    def health_report(self, image_path: Optional[str] = None) -> Dict:
+        """
+        Farm health report with severities and recommendations (farm health API)
+
+        The per-category detection lists are only filled with keep_detections.
+
+        Args:
+            image_path: Optional path to the analyzed image
+        """
+        weed_count = self.counts['weeds']
+        pest_count = self.counts['pests']
+        disease_count = self.counts['diseases']
+        kept = self.detections or {kind: [] for kind in REPORT_KINDS}
+
+        # Calculate severity levels
+        weed_severity = _severity(weed_count, high=15, medium=8)
+        pest_severity = _severity(pest_count, high=10, medium=5)
+
+        disease_severity = 'none'
+        if disease_count > 0:
+            # Severity follows the most confident disease detection
+            if self.max_disease_confidence > 0.7:
+                disease_severity = 'high'
+            elif self.max_disease_confidence > 0.5:
+                disease_severity = 'medium'
+            else:
+                disease_severity = 'low'
+        disease_labels = [{'name': disease.get('label', 'Unknown'), 'confidence': disease.get('confidence', 0.0)}
+                          for disease in kept['diseases']]
+
+        # Calculate overall health score (0-100)
+        penalties = {'high': 30, 'medium': 15, 'low': 5, 'none': 0}
+        health_score = 100
+        for severity in (weed_severity, pest_severity, disease_severity):
+            health_score -= penalties[severity]
+        health_score = max(0, health_score)
+
+        # Generate recommendations
+        recommendations = []
+
+        if weed_severity == 'high':
+            recommendations.append({
+                'priority': 'high',
+                'category': 'weed_control',
+                'action': 'Immediate weed control required. Consider mechanical or chemical weed management.',
+                'urgency': 'urgent'
+            })
+        elif weed_severity == 'medium':
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'weed_control',
+                'action': 'Moderate weed growth detected. Plan weed control measures.',
+                'urgency': 'moderate'
+            })
+
+        if pest_severity == 'high':
+            recommendations.append({
+                'priority': 'high',
+                'category': 'pest_control',
+                'action': 'Severe pest infestation detected. Immediate pest control required.',
+                'urgency': 'urgent'
+            })
+        elif pest_severity == 'medium':
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'pest_control',
+                'action': 'Moderate pest activity detected. Monitor closely and consider treatment.',
+                'urgency': 'moderate'
+            })
+
+        if disease_severity == 'high':
+            recommendations.append({
+                'priority': 'high',
+                'category': 'disease_management',
+                'action': 'Disease detected with high confidence. Apply appropriate treatment immediately.',
+                'urgency': 'urgent'
+            })
+        elif disease_severity == 'medium':
+            recommendations.append({
+                'priority': 'medium',
+                'category': 'disease_management',
+                'action': 'Possible disease detected. Monitor and consider preventive treatment.',
+                'urgency': 'moderate'
+            })
+
+        if health_score > 80:
+            recommendations.append({
+                'priority': 'low',
+                'category': 'maintenance',
+                'action': 'Field condition is good. Maintain current practices.',
+                'urgency': 'low'
+            })
+
+        # Build report
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'image_path': image_path,
+            'overall_health_score': health_score,
+            'health_status': 'good' if health_score > 70 else 'fair' if health_score > 50 else 'poor',
+
+            'detections': {
+                'weeds': {
+                    'count': weed_count,
+                    'severity': weed_severity,
+                    'detections': kept['weeds']
+                },
+                'pests': {
+                    'count': pest_count,
+                    'severity': pest_severity,
+                    'detections': kept['pests']
+                },
+                'diseases': {
+                    'count': disease_count,
+                    'severity': disease_severity,
+                    'detections': disease_labels
+                },
+                'water_stress': {
+                    'count': self.counts['water_stress'],
+                    'severity': 'none',  # Can be enhanced
+                    'detections': kept['water_stress']
+                }
+            },
+
+            'recommendations': recommendations,
+
+            'summary': {
+                'total_issues': weed_count + pest_count + disease_count,
+                'critical_issues': len([r for r in recommendations if r['priority'] == 'high']),
+                'moderate_issues': len([r for r in recommendations if r['priority'] == 'medium']),
+                'action_required': len([r for r in recommendations if r['urgency'] == 'urgent'])
+            }
+        }
@@ -0,0 +1,145 @@
+"""
+Online selection of curated video frames
+Keeps the top N frames of each curation category in a bounded heap while the
+video is processed, so memory does not grow with the video length. Frames are
+ranked exactly like UnifiedAgriculturalDetector.get_curated_images ranks them.
+"""
+
+import heapq
+from typing import Callable, Dict, List, Tuple
+
+
+def _diseased_count(frame_data: Dict) -> int:
+    return frame_data['detections']['diseases'].diseased_count()
+
+
+# Sort key per category; larger keys are curated first
+CURATION_KEYS: Dict[str, Callable[[Dict], Tuple]] = {
+    'worst_infected': lambda x: (
+        _diseased_count(x),
+        -x.get('area_stats', {}).get('good_crop_percentage', 0)
+    ),
+    'most_weeds': lambda x: (
+        len(x['detections']['weeds']),
+        x.get('area_stats', {}).get('weed_percentage', 0)
+    ),
+    'healthiest': lambda x: (
+        x.get('area_stats', {}).get('good_crop_percentage', 0),
+        -_diseased_count(x),
+        -len(x['detections']['weeds'])
+    )
+}
+
+
+# Frame data entries holding images (not saved in checkpoints)
+CURATION_IMAGE_FIELDS = ('frame', 'annotated_frame')
+
+
+class TopFrames:
+    """Bounded top-N of frames by key; among equal keys the earlier frame wins (as a stable sort)"""
+
+    def __init__(self, top_n: int):
+        self.top_n = top_n
+        # Min-heap of (key, -arrival, frame_data): the root is the frame to evict next
+        self._heap: List[Tuple[Tuple, int, Dict]] = []
+
+    def accepts(self, key: Tuple, arrival: int) -> bool:
+        """Whether a frame with this key, arriving after all kept frames, would be kept"""
+        if self.top_n <= 0:
+            return False
+        if len(self._heap) < self.top_n:
+            return True
+        return (key, -arrival) > self._heap[0][:2]
+
+    def push(self, key: Tuple, arrival: int, frame_data: Dict):
+        """Keep a frame, evicting the lowest-ranked one if full (call only if accepts())"""
+        entry = (key, -arrival, frame_data)
+        if len(self._heap) < self.top_n:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+
+    def frames(self) -> List[Dict]:
+        """Kept frames, best first"""
+        return [frame_data for _, _, frame_data in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class FrameCurator:
+    """Streaming replacement for collecting every frame and calling get_curated_images"""
+
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        self._categories = {name: TopFrames(top_n) for name in CURATION_KEYS}
+        self._arrivals = 0
+
+    def offer(self, frame_data: Dict, images: Callable[[], Dict]) -> bool:
+        """
+        Consider a processed frame for curation
+
+        Args:
+            frame_data: Frame dictionary with 'frame_number', 'detections' and 'area_stats'
+            images: Called only if the frame is kept; returns the entries to add to it
+                    (e.g. copies of 'frame' and 'annotated_frame')
+
+        Returns:
+            True if the frame was kept in at least one category
+        """
+        arrival = self._arrivals
+        self._arrivals += 1
+        keys = {name: key_fn(frame_data) for name, key_fn in CURATION_KEYS.items()}
+        accepting = [name for name, key in keys.items() if self._categories[name].accepts(key, arrival)]
+        if not accepting:
+            return False
+
+        frame_data = {**frame_data, **images()}
+        for name in accepting:
+            self._categories[name].push(keys[name], arrival, frame_data)
+        return True
+
+    def state(self, encode: Callable[[Dict], Dict]) -> Dict:
+        """
+        Kept frames as a JSON-serializable dict (see from_state)
+
+        Checkpoints keep only the frame data; the images are rendered again
+        from the video.
+
+        Args:
+            encode: Converts the frame data of a kept frame (without its images)
+                    to its JSON form; called once per frame
+        """
+        frames = []
+        frame_indices = {}
+        categories = {}
+        for name, top in self._categories.items():
+            entries = []
+            for _, negative_arrival, frame_data in top._heap:
+                if id(frame_data) not in frame_indices:
+                    frame_indices[id(frame_data)] = len(frames)
+                    frames.append(encode({field: value for field, value in frame_data.items()
+                                          if field not in CURATION_IMAGE_FIELDS}))
+                entries.append([-negative_arrival, frame_indices[id(frame_data)]])
+            categories[name] = entries
+        return {'top_n': self.top_n, 'arrivals': self._arrivals, 'frames': frames, 'categories': categories}
+
+    @classmethod
+    def from_state(cls, state: Dict, decode: Callable[[Dict], Dict]) -> 'FrameCurator':
+        """
+        Recreate a curator from state()
+
+        Args:
+            state: Output of state()
+            decode: Inverse of the encode function passed to state()
+        """
+        curator = cls(top_n=state['top_n'])
+        curator._arrivals = state['arrivals']
+        frames = [decode(frame_state) for frame_state in state['frames']]
+        for name, entries in state['categories'].items():
+            key_fn = CURATION_KEYS[name]
+            # Entries are saved in heap order, so the list is still a heap
+            curator._categories[name]._heap = [(key_fn(frames[index]), -arrival, frames[index])
+                                               for arrival, index in entries]
+        return curator
+
+    def curated(self) -> Dict[str, List[Dict]]:
+        """Curated frames per category, in the format of get_curated_images"""
+        return {name: top.frames() for name, top in self._categories.items()}
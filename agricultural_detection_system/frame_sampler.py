@@ -0,0 +1,351 @@
+"""
+Frame sampling for video analysis
+AdaptiveFrameSampler decides per frame whether it needs inference, based on
+how much the scene changed since the last analyzed frame (frame differencing
+or optical flow on small grayscale frames).
+FrameGrabber reads only every Nth frame, or one frame per time interval,
+and skips the others with grab() or a keyframe seek instead of decoding them.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# Change measures and their default "scene changed" thresholds:
+# mean absolute gray-level difference (0-255), or mean optical flow magnitude (pixels)
+MOTION_METHODS = {'diff': 8.0, 'flow': 1.0}
+
+
+class AdaptiveFrameSampler:
+    """Motion-aware frame skipping with minimum and maximum sampling intervals"""
+
+    def __init__(self,
+                 min_interval: int = 1,
+                 max_interval: int = 15,
+                 motion_threshold: Optional[float] = None,
+                 method: str = 'diff',
+                 analysis_width: int = 160):
+        """
+        Initialize the sampler
+
+        Args:
+            min_interval: Frames between analyzed frames at least (1 = may analyze every frame)
+            max_interval: Frames between analyzed frames at most, even for a static scene
+            motion_threshold: Change since the last analyzed frame that triggers the next
+                              analysis (default depends on method)
+            method: 'diff' (frame differencing) or 'flow' (Farneback optical flow magnitude)
+            analysis_width: Width of the downscaled frames the change is measured on
+        """
+        if method not in MOTION_METHODS:
+            raise ValueError(f"Unknown method '{method}'. Choose from: {', '.join(MOTION_METHODS)}")
+        if min_interval < 1 or max_interval < min_interval:
+            raise ValueError(f"Need 1 <= min_interval <= max_interval, got {min_interval}, {max_interval}")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_threshold = MOTION_METHODS[method] if motion_threshold is None else motion_threshold
+        self.method = method
+        self.analysis_width = analysis_width
+
+        self._last_frame_number: Optional[int] = None
+        self._last_small: Optional[np.ndarray] = None
+
+        # Statistics
+        self.frames_seen = 0
+        self.frames_selected = 0
+        self.skipped_min_interval = 0
+        self.skipped_static = 0
+        self.forced_max_interval = 0
+        self._motion_total = 0.0
+        self._motion_samples = 0
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        """Small grayscale copy of a frame"""
+        height, width = frame.shape[:2]
+        size = (self.analysis_width, max(1, round(height * self.analysis_width / width)))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def _motion(self, small: np.ndarray) -> float:
+        """Change between a small frame and the last analyzed one"""
+        if self.method == 'flow':
+            flow = cv2.calcOpticalFlowFarneback(self._last_small, small, None,
+                                                0.5, 2, 15, 2, 5, 1.1, 0)
+            return float(np.mean(np.linalg.norm(flow, axis=2)))
+        return float(cv2.absdiff(small, self._last_small).mean())
+
+    def should_process(self, frame_number: int, frame: np.ndarray) -> bool:
+        """
+        Decide whether a frame needs inference
+
+        Args:
+            frame_number: Index of the frame in the video
+            frame: The decoded frame (BGR)
+
+        Returns:
+            True if the frame should be analyzed
+        """
+        self.frames_seen += 1
+
+        if self._last_frame_number is not None:
+            gap = frame_number - self._last_frame_number
+            if gap < self.min_interval:
+                self.skipped_min_interval += 1
+                return False
+
+            small = self._downscale(frame)
+            if gap < self.max_interval:
+                motion = self._motion(small)
+                self._motion_total += motion
+                self._motion_samples += 1
+                if motion < self.motion_threshold:
+                    self.skipped_static += 1
+                    return False
+            else:
+                self.forced_max_interval += 1
+        else:
+            small = self._downscale(frame)
+
+        self._last_frame_number = frame_number
+        self._last_small = small
+        self.frames_selected += 1
+        return True
+
+    def state(self) -> Dict:
+        """
+        Settings, last analyzed frame and statistics as a JSON-serializable dict
+
+        A sampler recreated with from_state() makes the same decisions as this
+        one would (video checkpoints).
+        """
+        return {
+            'settings': {
+                'min_interval': self.min_interval,
+                'max_interval': self.max_interval,
+                'motion_threshold': self.motion_threshold,
+                'method': self.method,
+                'analysis_width': self.analysis_width
+            },
+            'last_frame_number': self._last_frame_number,
+            'last_small': self._last_small.tolist() if self._last_small is not None else None,
+            'frames_seen': self.frames_seen,
+            'frames_selected': self.frames_selected,
+            'skipped_min_interval': self.skipped_min_interval,
+            'skipped_static': self.skipped_static,
+            'forced_max_interval': self.forced_max_interval,
+            'motion_total': self._motion_total,
+            'motion_samples': self._motion_samples
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'AdaptiveFrameSampler':
+        """Recreate a sampler from state()"""
+        sampler = cls(**state['settings'])
+        sampler._last_frame_number = state['last_frame_number']
+        if state['last_small'] is not None:
+            sampler._last_small = np.array(state['last_small'], dtype=np.uint8)
+        sampler.frames_seen = state['frames_seen']
+        sampler.frames_selected = state['frames_selected']
+        sampler.skipped_min_interval = state['skipped_min_interval']
+        sampler.skipped_static = state['skipped_static']
+        sampler.forced_max_interval = state['forced_max_interval']
+        sampler._motion_total = state['motion_total']
+        sampler._motion_samples = state['motion_samples']
+        return sampler
+
+    def stats(self) -> Dict:
+        """Sampling statistics for the report"""
+        skipped = self.frames_seen - self.frames_selected
+        return {
+            'method': self.method,
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval,
+            'motion_threshold': self.motion_threshold,
+            'frames_seen': self.frames_seen,
+            'frames_analyzed': self.frames_selected,
+            'frames_skipped': skipped,
+            'skipped_static': self.skipped_static,
+            'skipped_min_interval': self.skipped_min_interval,
+            'forced_max_interval': self.forced_max_interval,
+            'skip_ratio': round(skipped / self.frames_seen, 3) if self.frames_seen else 0.0,
+            'mean_motion': round(self._motion_total / self._motion_samples, 2) if self._motion_samples else 0.0
+        }
+
+
+def sample_step(fps: float, frame_skip: int = 1, interval_seconds: Optional[float] = None) -> float:
+    """Frames between analyzed frames (fractional for time-based sampling)"""
+    if interval_seconds:
+        return max(1.0, interval_seconds * (fps or 30.0))
+    return float(frame_skip)
+
+
+def sample_frame(sample_index: int, step: float) -> int:
+    """Frame number of the n-th analyzed frame"""
+    return int(sample_index * step + 0.5)
+
+
+def seek_frame(cap: cv2.VideoCapture, frame_number: int) -> int:
+    """
+    Position a video at a frame, grabbing forward if the backend cannot seek
+
+    Returns:
+        Frame number the video is positioned at (less than frame_number if
+        the video ended before it)
+    """
+    if frame_number <= 0:
+        return 0
+    if cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number):
+        return frame_number
+    position = 0
+    while position < frame_number and cap.grab():
+        position += 1
+    return position
+
+
+class FrameGrabber:
+    """Fixed-step or time-based frame sampling that does not retrieve skipped frames"""
+
+    def __init__(self,
+                 cap: cv2.VideoCapture,
+                 frame_skip: int = 1,
+                 interval_seconds: Optional[float] = None,
+                 seek_threshold: Optional[int] = None,
+                 start_frame: int = 0,
+                 end_frame: Optional[int] = None):
+        """
+        Initialize the grabber
+
+        Skipped frames are passed with grab(), which skips the color
+        conversion and copy of retrieve(). Gaps of at least seek_threshold
+        frames are jumped over with a seek instead, so the decoder only
+        decodes from the keyframe before the target frame.
+
+        Args:
+            cap: Opened video, positioned at its first frame
+            frame_skip: Analyze every Nth frame (ignored with interval_seconds)
+            interval_seconds: Analyze one frame per this many seconds of video
+            seek_threshold: Seek instead of grabbing when this many frames or more
+                            are skipped at once (default: never seek)
+            start_frame: First frame of the range to sample (the video is sought there)
+            end_frame: End of the range to sample, exclusive (default: end of video).
+                       Splitting a video into ranges samples the same frames as
+                       sampling it whole.
+        """
+        if frame_skip < 1:
+            raise ValueError(f"frame_skip must be >= 1, got {frame_skip}")
+        if interval_seconds is not None and interval_seconds <= 0:
+            raise ValueError(f"interval_seconds must be positive, got {interval_seconds}")
+
+        self.cap = cap
+        self.frame_skip = frame_skip
+        self.interval_seconds = interval_seconds
+        self.seek_threshold = seek_threshold
+
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.step = sample_step(cap.get(cv2.CAP_PROP_FPS), frame_skip, interval_seconds)
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+
+        # First analyzed frame at or after start_frame
+        self._sample_index = int(start_frame / self.step)
+        while self._target(self._sample_index) < start_frame:
+            self._sample_index += 1
+        self._position = seek_frame(cap, start_frame)
+
+        # Statistics
+        self.frames_selected = 0
+        self.frames_grabbed = 0
+        self.frames_seeked = 0
+        self.seeks = 0
+
+    def _target(self, sample_index: int) -> int:
+        return sample_frame(sample_index, self.step)
+
+    @property
+    def _limit(self) -> int:
+        """End of the sampled range (0 if unknown)"""
+        if self.end_frame is not None and (self.total_frames <= 0 or self.end_frame < self.total_frames):
+            return self.end_frame
+        return max(0, self.total_frames)
+
+    def selects(self, frame_number: int) -> bool:
+        """
+        Whether a frame is analyzed, for callers that decode every frame anyway
+        (frame numbers must be increasing; do not mix with iterating the grabber)
+        """
+        self._position = frame_number + 1
+        while self._target(self._sample_index) < frame_number:
+            self._sample_index += 1
+        if self._target(self._sample_index) != frame_number:
+            return False
+        self._sample_index += 1
+        self.frames_selected += 1
+        return True
+
+    def _skip_to(self, target: int) -> bool:
+        """Advance the video to a frame without retrieving the frames before it"""
+        gap = target - self._position
+        if self.seek_threshold is not None and gap >= self.seek_threshold:
+            if self.cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                self.seeks += 1
+                self.frames_seeked += gap
+                self._position = target
+                return True
+            # Backend cannot seek: grab from here on
+            self.seek_threshold = None
+
+        while self._position < target:
+            if not self.cap.grab():
+                return False
+            self._position += 1
+            self.frames_grabbed += 1
+        return True
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yields:
+            (frame_number, frame) of every analyzed frame
+        """
+        limit = self._limit
+        while True:
+            target = self._target(self._sample_index)
+            if 0 < limit <= target:
+                # The rest of the range is skipped without reading it
+                self._position = limit
+                break
+            if not self._skip_to(target):
+                break
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self._position = target + 1
+            self._sample_index += 1
+            self.frames_selected += 1
+            yield target, frame
+
+    @property
+    def frames_seen(self) -> int:
+        """Frames of the video (or range) passed so far (analyzed or skipped)"""
+        limit = self._limit
+        position = min(self._position, limit) if limit > 0 else self._position
+        return max(0, position - self.start_frame)
+
+    def stats(self) -> Dict:
+        """Sampling statistics for the report"""
+        frames_seen = self.frames_seen
+        stats = {
+            'method': 'interval' if self.interval_seconds else 'fixed',
+            'frames_seen': frames_seen,
+            'frames_analyzed': self.frames_selected,
+            'frames_skipped': frames_seen - self.frames_selected,
+            'frames_grabbed': self.frames_grabbed,
+            'frames_seeked': self.frames_seeked,
+            'seeks': self.seeks
+        }
+        if self.interval_seconds:
+            stats['interval_seconds'] = self.interval_seconds
+        else:
+            stats['frame_skip'] = self.frame_skip
+        return stats
@@ -1,6 +1,6 @@
 """
 Plant Disease Recognition Model with Label Overlay
-Handles TensorFlow SavedModel format for disease classification
+Handles TensorFlow SavedModel and (quantized) TFLite formats for disease classification
 Takes one plant image → outputs text label → overlays on image
 """
 
@@ -8,8 +8,12 @@ import cv2
 import numpy as np
 import os
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 import argparse
+import threading
+import time
+
+from crop_cache import CropClassificationCache, crop_key
 
 # Try importing TensorFlow
 try:
@@ -20,38 +24,246 @@ except ImportError:
     print("⚠️  TensorFlow not available. Install with: pip install tensorflow")
 
 
+# Batch sizes the classifier pads to, so the graph only ever sees a few shapes
+DEFAULT_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+# Image extensions accepted for calibration / comparison folders
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def preprocess_into(image: np.ndarray,
+                    out: np.ndarray,
+                    scratch: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Resize, convert and normalize a BGR image into a preallocated input slot
+    
+    The image is resized into a reusable uint8 scratch buffer, then the
+    BGR->RGB swap and the [0, 1] scaling happen in a single pass that writes
+    straight into `out`, so no intermediate images are allocated.
+    
+    Args:
+        image: Input image as numpy array (BGR, as returned by OpenCV)
+        out: float32 slot of shape (height, width, 3) to write the model input to
+        scratch: uint8 buffer of shape (height, width, 3) for the resized image
+                 (allocated if None)
+        
+    Returns:
+        out
+    """
+    height, width = out.shape[:2]
+    if image.shape[:2] == (height, width) and image.dtype == np.uint8:
+        resized = image
+    else:
+        if scratch is None:
+            scratch = np.empty((height, width, 3), dtype=np.uint8)
+        resized = cv2.resize(image, (width, height), dst=scratch)
+    
+    # Reversed channel view: the swap costs nothing, the divide is the only pass
+    np.divide(resized[..., ::-1], np.float32(255.0), out=out, dtype=np.float32)
+    return out
+
+
 class PlantDiseaseClassifier:
     """Class to load and run plant disease classification models"""
     
-    def __init__(self, model_path: str, class_names: Optional[List[str]] = None):
+    def __init__(self,
+                 model_path: str,
+                 class_names: Optional[List[str]] = None,
+                 max_batch_size: int = 32,
+                 batch_buckets: Optional[List[int]] = None,
+                 intra_op_threads: Optional[int] = None,
+                 cache: Optional[CropClassificationCache] = None):
         """
         Initialize the plant disease classifier
         
         Args:
-            model_path: Path to TensorFlow SavedModel directory
+            model_path: Path to TensorFlow SavedModel directory, or to a .tflite model
+                        (see convert_to_tflite) to run it with the TFLite interpreter
             class_names: List of class names (disease labels). If None, will try to infer.
+            max_batch_size: Maximum number of crops sent to the model in one call
+            batch_buckets: Fixed batch sizes to pad to (default: powers of two up to max_batch_size)
+            intra_op_threads: Number of threads TensorFlow may use per op (default: TensorFlow decides).
+                              For TFLite models this is the interpreter thread count (default: all cores).
+            cache: Perceptual-hash cache consulted before classifying a crop (default: no cache)
         """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        
         self.model_path = model_path
+        self.backend = 'tflite' if str(model_path).endswith('.tflite') else 'savedmodel'
         self.class_names = class_names
         self.model = None
         self.input_size = (224, 224)  # Default, will be updated based on model
         
+        # Batching: pad every batch up to the next bucket so the graph is not retraced
+        self.max_batch_size = max_batch_size
+        buckets = batch_buckets or DEFAULT_BATCH_BUCKETS
+        self.batch_buckets = sorted({b for b in buckets if 0 < b < max_batch_size} | {max_batch_size})
+        self._batch_buffer = None
+        self._resize_buffer = None
+        self._batch_lock = threading.Lock()
+        self.intra_op_threads = intra_op_threads
+        self.cache = cache
+        
         # Load the model
         self._load_model()
     
     def _load_model(self):
-        """Load TensorFlow SavedModel"""
+        """Load TensorFlow SavedModel or TFLite model"""
         if not TENSORFLOW_AVAILABLE:
             raise ImportError("TensorFlow required. Install: pip install tensorflow")
         
+        if self.backend == 'tflite':
+            self._load_tflite_model()
+            return
+        
         print(f"📥 Loading TensorFlow SavedModel: {self.model_path}")
         
+        if self.intra_op_threads:
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(self.intra_op_threads)
+            except RuntimeError:
+                # Threading can only be configured before TensorFlow is initialized
+                print("⚠️  TensorFlow already initialized - keeping its thread settings")
+        
         # Check if it's a SavedModel directory
         if os.path.isdir(self.model_path):
             self.model = tf.saved_model.load(self.model_path)
             print("✅ Model loaded successfully")
         else:
             raise ValueError(f"Model path must be a directory containing SavedModel: {self.model_path}")
+        
+        self._build_inference_function()
+    
+    def _load_tflite_model(self):
+        """Load a TFLite model into a multi-threaded interpreter"""
+        if not os.path.isfile(self.model_path):
+            raise ValueError(f"TFLite model not found: {self.model_path}")
+        
+        num_threads = self.intra_op_threads or os.cpu_count() or 1
+        print(f"📥 Loading TFLite model: {self.model_path} ({num_threads} threads)")
+        
+        # OpResolverType.AUTO applies the XNNPACK delegate to every op it supports
+        self.model = tf.lite.Interpreter(
+            model_path=self.model_path,
+            num_threads=num_threads,
+            experimental_op_resolver_type=tf.lite.experimental.OpResolverType.AUTO
+        )
+        self.model.allocate_tensors()
+        
+        self._tflite_input = self.model.get_input_details()[0]
+        self._tflite_output = self.model.get_output_details()[0]
+        self._tflite_batch = int(self._tflite_input['shape'][0])
+        self._tflite_lock = threading.Lock()
+        
+        _, height, width, _ = self._tflite_input['shape']
+        self.input_size = (int(width), int(height))
+        
+        self._infer = self._run_tflite
+        self._reset_latency_stats()
+        print("✅ Model loaded successfully")
+    
+    def _run_tflite(self, image_batch: np.ndarray) -> np.ndarray:
+        """Run the TFLite interpreter on a preprocessed float32 batch"""
+        input_details = self._tflite_input
+        output_details = self._tflite_output
+        
+        with self._tflite_lock:
+            # Resize the input tensor only when the batch bucket changes
+            if image_batch.shape[0] != self._tflite_batch:
+                self.model.resize_tensor_input(input_details['index'], list(image_batch.shape))
+                self.model.allocate_tensors()
+                self._tflite_batch = image_batch.shape[0]
+            
+            # Fully integer models take quantized input
+            if input_details['dtype'] != np.float32:
+                scale, zero_point = input_details['quantization']
+                image_batch = np.round(image_batch / scale + zero_point).astype(input_details['dtype'])
+            
+            self.model.set_tensor(input_details['index'], image_batch)
+            self.model.invoke()
+            output = self.model.get_tensor(output_details['index'])
+        
+        if output_details['dtype'] != np.float32:
+            scale, zero_point = output_details['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        
+        return output
+    
+    def _build_inference_function(self):
+        """
+        Resolve the model's input/output signature once and trace a fixed-shape
+        inference function, so each call only pays for graph execution
+        """
+        call = None
+        signatures = getattr(self.model, 'signatures', None)
+        if signatures:
+            # Prefer serving_default, otherwise the first available signature
+            signature = signatures.get('serving_default', None)
+            if signature is None:
+                signature = list(signatures.values())[0]
+            
+            _, input_specs = signature.structured_input_signature
+            if input_specs:
+                input_key, input_spec = next(iter(input_specs.items()))
+                output_key = next(iter(signature.structured_outputs))
+                
+                # Use the real input size when the signature declares it
+                shape = input_spec.shape
+                if len(shape) == 4 and shape[1] and shape[2]:
+                    self.input_size = (int(shape[2]), int(shape[1]))
+                
+                def call(images):
+                    return signature(**{input_key: tf.cast(images, input_spec.dtype)})[output_key]
+                
+                print(f"   Signature: input '{input_key}' -> output '{output_key}'")
+        
+        if call is None:
+            if not callable(self.model):
+                raise ValueError(f"SavedModel has no usable signature and is not callable: {self.model_path}")
+            
+            def call(images):
+                return self.model(images)
+        
+        width, height = self.input_size
+        input_spec = tf.TensorSpec([None, height, width, 3], tf.float32)
+        concrete_infer = tf.function(call, input_signature=[input_spec]).get_concrete_function()
+        self._infer = lambda image_batch: concrete_infer(tf.constant(image_batch)).numpy()
+        self._reset_latency_stats()
+    
+    def _reset_latency_stats(self):
+        """Reset the per-call latency statistics"""
+        self.last_latency_ms = 0.0
+        self._latency_total_ms = 0.0
+        self._latency_calls = 0
+    
+    def latency_stats(self) -> Dict:
+        """
+        Inference latency statistics (graph execution only, excluding preprocessing)
+        
+        Returns:
+            Dictionary with number of calls, last and mean latency in milliseconds
+        """
+        return {
+            'calls': self._latency_calls,
+            'last_ms': self.last_latency_ms,
+            'mean_ms': self._latency_total_ms / self._latency_calls if self._latency_calls else 0.0
+        }
+    
+    def preprocess_array(self, image: np.ndarray) -> np.ndarray:
+        """
+        Preprocess an in-memory BGR image for model input
+        
+        Args:
+            image: Input image as numpy array (BGR, as returned by OpenCV)
+            
+        Returns:
+            Preprocessed image batch of shape (1, height, width, 3)
+        """
+        width, height = self.input_size
+        image_batch = np.empty((1, height, width, 3), dtype=np.float32)
+        preprocess_into(image, image_batch[0])
+        return image_batch
     
     def preprocess_image(self, image_path: str) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -68,69 +280,31 @@ class PlantDiseaseClassifier:
         if image is None:
             raise ValueError(f"Could not load image: {image_path}")
         
-        # Resize to model input size
-        image_resized = cv2.resize(image, self.input_size)
-        
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image_resized, cv2.COLOR_BGR2RGB)
-        
-        # Normalize to [0, 1] range
-        image_normalized = image_rgb.astype(np.float32) / 255.0
-        
-        # Add batch dimension
-        image_batch = np.expand_dims(image_normalized, axis=0)
-        
-        return image_batch, image  # Return both preprocessed and original
+        return self.preprocess_array(image), image  # Return both preprocessed and original
     
-    def predict(self, image_path: str) -> Tuple[str, float]:
+    def _run_inference(self, image_batch: np.ndarray) -> np.ndarray:
         """
-        Predict disease from plant image
+        Run the model on a preprocessed batch
         
         Args:
-            image_path: Path to plant image
+            image_batch: Preprocessed images of shape (N, height, width, 3)
             
         Returns:
-            Tuple of (disease_label, confidence)
+            Model output of shape (N, num_classes)
         """
-        # Preprocess image
-        image_batch, original_image = self.preprocess_image(image_path)
-        
-        # Run inference
-        try:
-            # Try different signature names
-            if hasattr(self.model, 'signatures'):
-                # Try serving_default signature
-                infer = self.model.signatures.get('serving_default', None)
-                if infer is None:
-                    # Get first available signature
-                    infer = list(self.model.signatures.values())[0]
-                
-                # Convert to tensor
-                input_tensor = tf.constant(image_batch)
-                predictions = infer(input_tensor)
-                
-                # Extract output (handle different output formats)
-                output_key = list(predictions.keys())[0]
-                output = predictions[output_key].numpy()[0]
-            else:
-                # Direct call
-                predictions = self.model(image_batch)
-                if hasattr(predictions, 'numpy'):
-                    output = predictions.numpy()[0]
-                else:
-                    output = predictions[0]
-        except Exception as e:
-            print(f"⚠️  Error during inference: {e}")
-            # Try direct call
-            input_tensor = tf.constant(image_batch)
-            predictions = self.model(input_tensor)
-            if hasattr(predictions, 'numpy'):
-                output = predictions.numpy()[0]
-            else:
-                output = predictions[0]
+        start = time.perf_counter()
+        output = self._infer(image_batch)
+        
+        self.last_latency_ms = (time.perf_counter() - start) * 1000.0
+        self._latency_total_ms += self.last_latency_ms
+        self._latency_calls += 1
         
+        return output
+    
+    def _decode_output(self, output: np.ndarray) -> Tuple[str, float]:
+        """Convert one row of class scores into (label, confidence)"""
         # Get predicted class
-        class_idx = np.argmax(output)
+        class_idx = int(np.argmax(output))
         confidence = float(output[class_idx])
         
         # Get class name
@@ -141,6 +315,109 @@ class PlantDiseaseClassifier:
         
         return label, confidence
     
+    def predict_array(self, image: np.ndarray) -> Tuple[str, float]:
+        """
+        Predict disease from an in-memory plant image
+        
+        Args:
+            image: Plant image as numpy array (BGR)
+            
+        Returns:
+            Tuple of (disease_label, confidence)
+        """
+        if image is None or image.size == 0:
+            raise ValueError("Cannot classify an empty image")
+        
+        return self.predict_crops([image])[0]
+    
+    def _bucket_size(self, count: int) -> int:
+        """Smallest configured batch bucket that fits count crops"""
+        for bucket in self.batch_buckets:
+            if bucket >= count:
+                return bucket
+        return self.max_batch_size
+    
+    def _get_batch_buffer(self) -> np.ndarray:
+        """Return the preallocated (max_batch_size, H, W, 3) float32 input buffer"""
+        width, height = self.input_size
+        shape = (self.max_batch_size, height, width, 3)
+        if self._batch_buffer is None or self._batch_buffer.shape != shape:
+            self._batch_buffer = np.zeros(shape, dtype=np.float32)
+            self._resize_buffer = np.empty(shape[1:], dtype=np.uint8)
+        return self._batch_buffer
+    
+    def predict_crops(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """
+        Predict disease for several in-memory plant crops in batches
+        
+        Crops may come from one frame or from several frames. They are
+        resized into a preallocated batch buffer and sent to the model in
+        chunks of at most max_batch_size, each padded to a fixed bucket size.
+        With a cache, only crops that do not match a cached crop are sent
+        to the model.
+        
+        Args:
+            crops: List of plant crops as numpy arrays (BGR)
+            
+        Returns:
+            List of (disease_label, confidence), one per crop
+        """
+        if not crops:
+            return []
+        
+        for crop in crops:
+            if crop is None or crop.size == 0:
+                raise ValueError("Cannot classify an empty image")
+        
+        if self.cache is None:
+            return self._classify_crops(crops)
+        
+        keys = [crop_key(crop) for crop in crops]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, prediction in zip(missing, self._classify_crops([crops[i] for i in missing])):
+                results[i] = prediction
+                self.cache.put(keys[i], *prediction)
+        return results
+    
+    def _classify_crops(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """Run the model on non-empty crops (see predict_crops)"""
+        results = []
+        with self._batch_lock:
+            buffer = self._get_batch_buffer()
+            
+            for start in range(0, len(crops), self.max_batch_size):
+                chunk = crops[start:start + self.max_batch_size]
+                count = len(chunk)
+                
+                # Resize, convert and normalize each crop straight into its buffer slot
+                for i, crop in enumerate(chunk):
+                    preprocess_into(crop, buffer[i], self._resize_buffer)
+                
+                # Rows past count are padding; their outputs are discarded
+                bucket = self._bucket_size(count)
+                output = self._run_inference(buffer[:bucket])
+                results.extend(self._decode_output(row) for row in output[:count])
+        
+        return results
+    
+    def predict(self, image_path: str) -> Tuple[str, float]:
+        """
+        Predict disease from plant image
+        
+        Args:
+            image_path: Path to plant image
+            
+        Returns:
+            Tuple of (disease_label, confidence)
+        """
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not load image: {image_path}")
+        
+        return self.predict_array(image)
+    
     def overlay_label_on_image(self, 
                                image_path: str, 
                                label: str, 
@@ -239,6 +516,132 @@ class PlantDiseaseClassifier:
         return annotated
 
 
+def _list_images(image_dir: str, max_images: Optional[int] = None) -> List[str]:
+    """Sorted image paths in a folder"""
+    paths = sorted(
+        str(path) for path in Path(image_dir).iterdir()
+        if path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if not paths:
+        raise ValueError(f"No images found in: {image_dir}")
+    return paths[:max_images] if max_images else paths
+
+
+def convert_to_tflite(saved_model_path: str,
+                      output_path: str,
+                      quantization: str = 'dynamic',
+                      calibration_dir: Optional[str] = None,
+                      num_calibration_images: int = 200,
+                      input_size: Tuple[int, int] = (224, 224)) -> str:
+    """
+    Convert the disease SavedModel to a quantized TFLite model
+    
+    Args:
+        saved_model_path: Path to TensorFlow SavedModel directory
+        output_path: Path of the .tflite file to write
+        quantization: 'dynamic' (int8 weights, float activations) or 'int8'
+                      (int8 weights and activations, needs calibration_dir)
+        calibration_dir: Folder of sample plant crops used to calibrate int8 activations
+        num_calibration_images: Maximum number of calibration images to use
+        input_size: Model input size (width, height)
+        
+    Returns:
+        Path to the written .tflite file
+    """
+    if not TENSORFLOW_AVAILABLE:
+        raise ImportError("TensorFlow required. Install: pip install tensorflow")
+    if quantization not in ('dynamic', 'int8'):
+        raise ValueError(f"quantization must be 'dynamic' or 'int8', got {quantization}")
+    
+    print(f"🔄 Converting {saved_model_path} to TFLite ({quantization} quantization)...")
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_path)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    
+    if quantization == 'int8':
+        if not calibration_dir:
+            raise ValueError("int8 quantization requires calibration_dir with sample crops")
+        calibration_paths = _list_images(calibration_dir, num_calibration_images)
+        
+        def representative_dataset():
+            # Same preprocessing as PlantDiseaseClassifier, into one reused batch
+            image_batch = np.empty((1, input_size[1], input_size[0], 3), dtype=np.float32)
+            scratch = np.empty(image_batch.shape[1:], dtype=np.uint8)
+            for path in calibration_paths:
+                image = cv2.imread(path)
+                if image is None:
+                    continue
+                preprocess_into(image, image_batch[0], scratch)
+                yield [image_batch]
+        
+        print(f"   Calibrating on {len(calibration_paths)} images from {calibration_dir}")
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    
+    print(f"✅ Saved TFLite model to: {output_path} ({len(tflite_model) / 1e6:.1f} MB)")
+    return output_path
+
+
+def compare_backends(saved_model_path: str,
+                     tflite_path: str,
+                     image_dir: str,
+                     class_names: Optional[List[str]] = None,
+                     max_images: Optional[int] = None,
+                     num_threads: Optional[int] = None) -> Dict:
+    """
+    Compare a TFLite model against the original SavedModel
+    
+    Args:
+        saved_model_path: Path to TensorFlow SavedModel directory
+        tflite_path: Path to the converted .tflite model
+        image_dir: Folder of plant images to evaluate on
+        class_names: List of class names
+        max_images: Maximum number of images to evaluate
+        num_threads: TFLite interpreter threads (default: all cores)
+        
+    Returns:
+        Report with top-1 agreement and per-image latency of both models
+    """
+    image_paths = _list_images(image_dir, max_images)
+    reference = PlantDiseaseClassifier(saved_model_path, class_names=class_names)
+    candidate = PlantDiseaseClassifier(tflite_path, class_names=class_names,
+                                       intra_op_threads=num_threads)
+    
+    # Warm up both models so one-time initialization is not measured
+    warmup = np.zeros((32, 32, 3), dtype=np.uint8)
+    reference.predict_array(warmup)
+    candidate.predict_array(warmup)
+    reference._reset_latency_stats()
+    candidate._reset_latency_stats()
+    
+    agreements = 0
+    evaluated = 0
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        reference_label, _ = reference.predict_array(image)
+        candidate_label, _ = candidate.predict_array(image)
+        agreements += int(reference_label == candidate_label)
+        evaluated += 1
+    
+    reference_ms = reference.latency_stats()['mean_ms']
+    candidate_ms = candidate.latency_stats()['mean_ms']
+    return {
+        'images_evaluated': evaluated,
+        'top1_agreement': agreements / evaluated if evaluated else 0.0,
+        'savedmodel_mean_latency_ms': reference_ms,
+        'tflite_mean_latency_ms': candidate_ms,
+        'speedup': reference_ms / candidate_ms if candidate_ms > 0 else 0.0,
+        'savedmodel_path': saved_model_path,
+        'tflite_path': tflite_path,
+        'tflite_size_mb': os.path.getsize(tflite_path) / 1e6
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Plant Disease Recognition with Label Overlay'
@@ -247,12 +650,12 @@ def main():
         '--model',
         type=str,
         required=True,
-        help='Path to TensorFlow SavedModel directory'
+        help='Path to TensorFlow SavedModel directory (or .tflite model)'
     )
     parser.add_argument(
         '--image',
         type=str,
-        required=True,
+        default=None,
         help='Path to plant image'
     )
     parser.add_argument(
@@ -272,9 +675,58 @@ def main():
         action='store_true',
         help='Display the annotated image'
     )
+    parser.add_argument(
+        '--convert-tflite',
+        type=str,
+        default=None,
+        metavar='OUTPUT',
+        help='Convert the SavedModel given by --model to a quantized TFLite model at OUTPUT'
+    )
+    parser.add_argument(
+        '--quantization',
+        type=str,
+        choices=['dynamic', 'int8'],
+        default='dynamic',
+        help='TFLite quantization mode (default: dynamic)'
+    )
+    parser.add_argument(
+        '--calibration-dir',
+        type=str,
+        default=None,
+        help='Folder of sample plant crops for int8 calibration'
+    )
+    parser.add_argument(
+        '--compare-tflite',
+        type=str,
+        default=None,
+        metavar='TFLITE',
+        help='Compare a .tflite model against the SavedModel given by --model on --image-dir'
+    )
+    parser.add_argument(
+        '--image-dir',
+        type=str,
+        default=None,
+        help='Folder of plant images to classify in batches '
+             '(with --compare-tflite: images to compare on, default: --calibration-dir)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=32,
+        help='Maximum images per model call when classifying --image-dir (default: 32)'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=None,
+        help='TFLite interpreter threads (default: all cores)'
+    )
     
     args = parser.parse_args()
     
+    if not (args.image or args.image_dir or args.convert_tflite or args.compare_tflite):
+        parser.error('one of --image, --image-dir, --convert-tflite or --compare-tflite is required')
+    
     # Load class names if provided
     class_names = None
     if args.classes:
@@ -286,9 +738,52 @@ def main():
             # Comma-separated list
             class_names = [name.strip() for name in args.classes.split(',')]
     
+    # Convert and/or compare TFLite models
+    if args.convert_tflite or args.compare_tflite:
+        tflite_path = args.convert_tflite or args.compare_tflite
+        if args.convert_tflite:
+            convert_to_tflite(
+                args.model,
+                args.convert_tflite,
+                quantization=args.quantization,
+                calibration_dir=args.calibration_dir
+            )
+        
+        image_dir = args.image_dir or args.calibration_dir
+        if image_dir:
+            report = compare_backends(args.model, tflite_path, image_dir,
+                                      class_names=class_names, num_threads=args.threads)
+            print(f"\n📊 TFLite vs SavedModel ({report['images_evaluated']} images):")
+            print(f"   Top-1 agreement: {report['top1_agreement']:.2%}")
+            print(f"   SavedModel: {report['savedmodel_mean_latency_ms']:.1f} ms/image")
+            print(f"   TFLite:     {report['tflite_mean_latency_ms']:.1f} ms/image "
+                  f"({report['speedup']:.2f}x, {report['tflite_size_mb']:.1f} MB)")
+        
+        if not args.image:
+            return
+    
     # Initialize classifier
     print("🌱 Initializing Plant Disease Classifier...")
-    classifier = PlantDiseaseClassifier(args.model, class_names=class_names)
+    classifier = PlantDiseaseClassifier(args.model, class_names=class_names,
+                                        max_batch_size=args.batch_size,
+                                        intra_op_threads=args.threads)
+    
+    # Classify a folder in batches through the shared preprocessing buffer
+    if not args.image:
+        image_paths = _list_images(args.image_dir)
+        print(f"🔍 Analyzing {len(image_paths)} images in: {args.image_dir}")
+        start = time.perf_counter()
+        for chunk_start in range(0, len(image_paths), classifier.max_batch_size):
+            chunk_paths = image_paths[chunk_start:chunk_start + classifier.max_batch_size]
+            images = [(path, cv2.imread(path)) for path in chunk_paths]
+            images = [(path, image) for path, image in images if image is not None]
+            predictions = classifier.predict_crops([image for _, image in images])
+            for (path, _), (label, confidence) in zip(images, predictions):
+                print(f"   {Path(path).name}: {label} ({confidence:.2%})")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\n⏱️  {elapsed_ms / len(image_paths):.1f} ms/image "
+              f"(model: {classifier.latency_stats()['mean_ms']:.1f} ms/batch)")
+        return
     
     # Run prediction
     print(f"🔍 Analyzing image: {args.image}")
@@ -297,6 +792,7 @@ def main():
     print(f"\n📊 Prediction Results:")
     print(f"   Disease: {label}")
     print(f"   Confidence: {confidence:.2%}")
+    print(f"   Inference time: {classifier.last_latency_ms:.1f} ms")
     
     # Overlay label on image
     if args.output is None:
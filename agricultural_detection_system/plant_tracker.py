@@ -0,0 +1,357 @@
+"""
+Lightweight multi-object tracker for plants in video (IoU + Kalman, ByteTrack-style)
+Gives every plant a persistent track id across frames and remembers its
+disease classification, so a plant is classified once and only reclassified
+every few frames or when its box changes a lot
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from box_ops import box_iou
+
+
+class KalmanBoxFilter:
+    """Constant-velocity Kalman filter on box center, width and height"""
+
+    # Process/measurement noise relative to box height (as in SORT/ByteTrack)
+    STD_POSITION = 1.0 / 20
+    STD_VELOCITY = 1.0 / 160
+
+    def __init__(self):
+        self.motion = np.eye(8, dtype=np.float64)
+        self.motion[:4, 4:] = np.eye(4)
+        self.observation = np.eye(4, 8, dtype=np.float64)
+
+    @staticmethod
+    def to_measurement(box: np.ndarray) -> np.ndarray:
+        """x1, y1, x2, y2 -> cx, cy, w, h"""
+        x1, y1, x2, y2 = np.asarray(box, dtype=np.float64)
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+
+    @staticmethod
+    def to_box(mean: np.ndarray) -> np.ndarray:
+        """cx, cy, w, h (first four state entries) -> x1, y1, x2, y2"""
+        cx, cy, w, h = mean[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+    def _noise(self, height: float, position: float, velocity: float) -> np.ndarray:
+        height = max(height, 1.0)
+        return np.square(np.array([position * height] * 4 + [velocity * height] * 4))
+
+    def initiate(self, box: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Create the state of a new track from its first box"""
+        measurement = self.to_measurement(box)
+        mean = np.concatenate([measurement, np.zeros(4)])
+        covariance = np.diag(self._noise(measurement[3], 2 * self.STD_POSITION, 10 * self.STD_VELOCITY))
+        return mean, covariance
+
+    def predict(self, mean: np.ndarray, covariance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance a state by one frame"""
+        process_noise = np.diag(self._noise(mean[3], self.STD_POSITION, self.STD_VELOCITY))
+        mean = self.motion @ mean
+        covariance = self.motion @ covariance @ self.motion.T + process_noise
+        return mean, covariance
+
+    def update(self, mean: np.ndarray, covariance: np.ndarray, box: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Correct a predicted state with a matched box"""
+        measurement_noise = np.diag(self._noise(mean[3], self.STD_POSITION, self.STD_POSITION)[:4])
+        projected_cov = self.observation @ covariance @ self.observation.T + measurement_noise
+        gain = covariance @ self.observation.T @ np.linalg.inv(projected_cov)
+        innovation = self.to_measurement(box) - self.observation @ mean
+        return mean + gain @ innovation, covariance - gain @ projected_cov @ gain.T
+
+
+class Track:
+    """One tracked plant"""
+
+    __slots__ = ('track_id', 'mean', 'covariance', 'box', 'hits', 'time_since_update',
+                 'label', 'confidence', 'classified_box', 'classified_at', 'pending')
+
+    def __init__(self, track_id: int, mean: np.ndarray, covariance: np.ndarray, box: np.ndarray):
+        self.track_id = track_id
+        self.mean = mean
+        self.covariance = covariance
+        self.box = box
+        self.hits = 1
+        self.time_since_update = 0
+
+        # Last disease classification of this plant
+        self.label: Optional[str] = None
+        self.confidence = 0.0
+        self.classified_box: Optional[np.ndarray] = None
+        self.classified_at = -1
+        self.pending = False
+
+    def state(self) -> Dict:
+        """Track as a JSON-serializable dict (see from_state)"""
+        return {
+            'track_id': self.track_id,
+            'mean': self.mean.tolist(),
+            'covariance': self.covariance.tolist(),
+            'box': self.box.tolist(),
+            'hits': self.hits,
+            'time_since_update': self.time_since_update,
+            'label': self.label,
+            'confidence': float(self.confidence),
+            'classified_box': self.classified_box.tolist() if self.classified_box is not None else None,
+            'classified_at': self.classified_at,
+            'pending': self.pending
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'Track':
+        """Recreate a track from state()"""
+        track = cls(state['track_id'], np.array(state['mean']), np.array(state['covariance']),
+                    np.array(state['box'], dtype=np.float64))
+        track.hits = state['hits']
+        track.time_since_update = state['time_since_update']
+        track.label = state['label']
+        track.confidence = state['confidence']
+        if state['classified_box'] is not None:
+            track.classified_box = np.array(state['classified_box'], dtype=np.float64)
+        track.classified_at = state['classified_at']
+        track.pending = state['pending']
+        return track
+
+
+def _greedy_match(iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """Match rows to columns by descending IoU, each at most once"""
+    if iou.size == 0:
+        return []
+    matches = []
+    used_rows = set()
+    used_cols = set()
+    for flat in np.argsort(-iou, axis=None, kind='stable'):
+        row, col = divmod(int(flat), iou.shape[1])
+        if iou[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((row, col))
+    return matches
+
+
+def _shape_iou(box_a: np.ndarray, box_b: np.ndarray) -> float:
+    """IoU of two boxes moved onto the same center (compares size/shape only)"""
+    wa, ha = box_a[2] - box_a[0], box_a[3] - box_a[1]
+    wb, hb = box_b[2] - box_b[0], box_b[3] - box_b[1]
+    intersection = min(wa, wb) * min(ha, hb)
+    union = wa * ha + wb * hb - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+class PlantTracker:
+    """Assigns persistent ids to plant boxes and caches their disease classification"""
+
+    def __init__(self,
+                 iou_threshold: float = 0.3,
+                 high_confidence: float = 0.5,
+                 max_age: int = 30,
+                 reclassify_every: int = 15,
+                 reclassify_shape_iou: float = 0.6):
+        """
+        Initialize the tracker
+
+        Args:
+            iou_threshold: Minimum IoU between a predicted track box and a detection to match
+            high_confidence: Detections at or above this confidence are matched first;
+                             lower ones only extend tracks left unmatched (ByteTrack)
+            max_age: Frames a track survives without a matching detection
+            reclassify_every: Reclassify a plant after this many frames (0 = never)
+            reclassify_shape_iou: Reclassify when the box size/shape overlap with the
+                                  box at the last classification drops below this
+        """
+        self.iou_threshold = iou_threshold
+        self.high_confidence = high_confidence
+        self.max_age = max_age
+        self.reclassify_every = reclassify_every
+        self.reclassify_shape_iou = reclassify_shape_iou
+
+        self.kalman = KalmanBoxFilter()
+        self.tracks: Dict[int, Track] = {}
+        self.frame_index = -1
+        # Plain counter (not itertools.count) so the tracker can be checkpointed
+        self.next_track_id = 0
+
+        # Statistics
+        self.tracks_created = 0
+        self.classifications = 0
+        self.reused = 0
+
+    def state(self) -> Dict:
+        """
+        Settings, tracks and statistics as a JSON-serializable dict
+
+        A tracker recreated with from_state() continues exactly like this one
+        (video checkpoints).
+        """
+        return {
+            'settings': {
+                'iou_threshold': self.iou_threshold,
+                'high_confidence': self.high_confidence,
+                'max_age': self.max_age,
+                'reclassify_every': self.reclassify_every,
+                'reclassify_shape_iou': self.reclassify_shape_iou
+            },
+            'frame_index': self.frame_index,
+            'next_track_id': self.next_track_id,
+            'tracks': [track.state() for track in self.tracks.values()],
+            'tracks_created': self.tracks_created,
+            'classifications': self.classifications,
+            'reused': self.reused
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'PlantTracker':
+        """Recreate a tracker from state()"""
+        tracker = cls(**state['settings'])
+        tracker.frame_index = state['frame_index']
+        tracker.next_track_id = state['next_track_id']
+        # Same order as before: tracks are matched in insertion order
+        for track_state in state['tracks']:
+            track = Track.from_state(track_state)
+            tracker.tracks[track.track_id] = track
+        tracker.tracks_created = state['tracks_created']
+        tracker.classifications = state['classifications']
+        tracker.reused = state['reused']
+        return tracker
+
+    def update(self, boxes: np.ndarray, confidences: np.ndarray) -> np.ndarray:
+        """
+        Advance the tracker by one frame
+
+        Args:
+            boxes: (N, 4) plant boxes of this frame
+            confidences: (N,) detection confidences
+
+        Returns:
+            (N,) track id per box
+        """
+        self.frame_index += 1
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+
+        # Predict where every track is now
+        tracks = list(self.tracks.values())
+        for track in tracks:
+            track.mean, track.covariance = self.kalman.predict(track.mean, track.covariance)
+            track.time_since_update += 1
+        predicted = np.array([self.kalman.to_box(track.mean) for track in tracks]).reshape(-1, 4)
+
+        track_ids = np.full(len(boxes), -1, dtype=np.int64)
+        unmatched_tracks = np.arange(len(tracks))
+
+        # High-confidence detections first, then low-confidence ones for the remaining tracks
+        high = confidences >= self.high_confidence
+        for detection_mask in (high, ~high):
+            detection_indices = np.flatnonzero(detection_mask)
+            if len(detection_indices) == 0 or len(unmatched_tracks) == 0:
+                continue
+            iou = box_iou(predicted[unmatched_tracks], boxes[detection_indices])
+            matched = set()
+            for row, col in _greedy_match(iou, self.iou_threshold):
+                track = tracks[unmatched_tracks[row]]
+                detection = detection_indices[col]
+                track.mean, track.covariance = self.kalman.update(track.mean, track.covariance,
+                                                                  boxes[detection])
+                track.box = boxes[detection]
+                track.hits += 1
+                track.time_since_update = 0
+                track_ids[detection] = track.track_id
+                matched.add(row)
+            unmatched_tracks = np.array([index for row, index in enumerate(unmatched_tracks)
+                                         if row not in matched], dtype=np.int64)
+
+        # Every detection left over starts a new track
+        for detection in np.flatnonzero(track_ids < 0):
+            track_id = self.next_track_id
+            self.next_track_id += 1
+            mean, covariance = self.kalman.initiate(boxes[detection])
+            self.tracks[track_id] = Track(track_id, mean, covariance, boxes[detection])
+            self.tracks_created += 1
+            track_ids[detection] = track_id
+
+        # Forget tracks that have not been seen for too long
+        for track in tracks:
+            if track.time_since_update > self.max_age:
+                del self.tracks[track.track_id]
+
+        return track_ids
+
+    def needs_classification(self, track_id: int) -> bool:
+        """Whether the plant of a track has to be (re)classified in the current frame"""
+        track = self.tracks[track_id]
+        if track.classified_at < 0:
+            return True
+        if self.reclassify_every and self.frame_index - track.classified_at >= self.reclassify_every:
+            return True
+        return bool(_shape_iou(track.box, track.classified_box) < self.reclassify_shape_iou)
+
+    def start_classification(self, track_id: int):
+        """
+        Mark a track as being classified in the current frame
+
+        Frames processed before the result arrives (same batch) reuse it
+        instead of classifying the plant again.
+        """
+        track = self.tracks[track_id]
+        track.classified_box = track.box
+        track.classified_at = self.frame_index
+        track.pending = True
+
+    def store_classification(self, track_id: int, label: str, confidence: float):
+        """Store the result of a classification started with start_classification"""
+        track = self.tracks.get(track_id)
+        if track is None:
+            return
+        track.label = label
+        track.confidence = confidence
+        track.pending = False
+        self.classifications += 1
+
+    def cancel_classification(self, track_id: int):
+        """Forget a started classification that failed, so it is retried"""
+        track = self.tracks.get(track_id)
+        if track is not None and track.pending:
+            track.classified_at = -1
+            track.pending = False
+
+    def classification(self, track_id: int) -> Optional[Tuple[str, float]]:
+        """
+        Reuse the classification of a track
+
+        Returns:
+            Cached (label, confidence), or None while the classification is still
+            pending (not counted as reused)
+        """
+        track = self.tracks[track_id]
+        if track.pending:
+            return None
+        self.reused += 1
+        return track.label, track.confidence
+
+    def count_reuse(self, track_id: int):
+        """
+        Count a reuse of a classification started earlier in the same batch
+
+        classification() returns None for those while the result is pending;
+        the caller counts the reuse once the result arrived, so the statistics
+        do not depend on the batch size.
+        """
+        if track_id in self.tracks:
+            self.reused += 1
+
+    def stats(self) -> Dict:
+        """Tracking and classification reuse statistics"""
+        lookups = self.classifications + self.reused
+        return {
+            'active_tracks': len(self.tracks),
+            'tracks_created': self.tracks_created,
+            'classifications': self.classifications,
+            'reused_classifications': self.reused,
+            'reuse_rate': round(self.reused / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,140 @@
+"""
+Latency-budgeted input resolution control for the YOLO models
+Keeps a running latency estimate per model and input size, and picks the
+largest allowed size that fits the per-frame latency target
+"""
+
+import threading
+from typing import Dict, Optional, Sequence
+
+
+# Allowed YOLO input sizes (multiples of the 32 px model stride)
+DEFAULT_IMGSZ_CHOICES = (320, 416, 512, 640)
+
+
+class ResolutionController:
+    """Chooses the YOLO input size per model from measured latencies"""
+
+    def __init__(self,
+                 latency_target_ms: float,
+                 allowed_sizes: Sequence[int] = DEFAULT_IMGSZ_CHOICES,
+                 smoothing: float = 0.3,
+                 headroom: float = 0.85):
+        """
+        Initialize the controller
+
+        Args:
+            latency_target_ms: Per-frame latency target in milliseconds
+            allowed_sizes: Input sizes the models may run at (multiples of 32)
+            smoothing: Weight of a new measurement in the running average (0-1)
+            headroom: A larger size is only chosen if its estimate is below
+                      headroom * budget, so the size does not flip every frame
+        """
+        if latency_target_ms <= 0:
+            raise ValueError(f"latency_target_ms must be positive, got {latency_target_ms}")
+        sizes = sorted(set(int(size) for size in allowed_sizes))
+        if not sizes or any(size <= 0 or size % 32 for size in sizes):
+            raise ValueError(f"allowed_sizes must be positive multiples of 32, got {list(allowed_sizes)}")
+
+        self.latency_target_ms = latency_target_ms
+        self.allowed_sizes = tuple(sizes)
+        self.smoothing = smoothing
+        self.headroom = headroom
+
+        self._latency: Dict[str, Dict[int, float]] = {}
+        self._current: Dict[str, int] = {}
+        self._overhead_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _smooth(self, previous: Optional[float], value: float) -> float:
+        if previous is None:
+            return value
+        return (1 - self.smoothing) * previous + self.smoothing * value
+
+    def record(self, model: str, imgsz: int, ms_per_frame: float):
+        """
+        Record the measured latency of one model call, per frame
+
+        Only the size in use is measured, so the estimates of the other sizes
+        are scaled by the same change (the device got slower or faster);
+        otherwise the size could not go back up after a slow phase.
+        """
+        with self._lock:
+            latencies = self._latency.setdefault(model, {})
+            previous = latencies.get(imgsz)
+            latencies[imgsz] = self._smooth(previous, ms_per_frame)
+            if previous:
+                scale = latencies[imgsz] / previous
+                for size in latencies:
+                    if size != imgsz:
+                        latencies[size] *= scale
+
+    def record_overhead(self, ms_per_frame: float):
+        """Record per-frame time spent outside the YOLO models (e.g. disease classification)"""
+        with self._lock:
+            self._overhead_ms = self._smooth(self._overhead_ms, ms_per_frame)
+
+    def budget_ms(self, num_passes: int, concurrent: bool, include_overhead: bool = True) -> float:
+        """
+        Latency budget of one model pass
+
+        Args:
+            num_passes: Number of YOLO passes per frame
+            concurrent: Whether the passes run at the same time
+            include_overhead: Subtract the measured non-YOLO time from the target
+
+        Returns:
+            Budget per frame for each pass in milliseconds
+        """
+        budget = self.latency_target_ms
+        if include_overhead and self._overhead_ms is not None:
+            budget = max(0.0, budget - self._overhead_ms)
+        return budget if concurrent else budget / max(1, num_passes)
+
+    def _estimate(self, latencies: Dict[int, float], imgsz: int) -> float:
+        """Latency estimate at a size, scaled by pixel count from the nearest measured size"""
+        if imgsz in latencies:
+            return latencies[imgsz]
+        if not latencies:
+            return 0.0
+        nearest = min(latencies, key=lambda size: abs(size - imgsz))
+        return latencies[nearest] * (imgsz / nearest) ** 2
+
+    def choose(self, model: str, budget_ms: float) -> int:
+        """
+        Pick the input size for the next call of a model
+
+        Args:
+            model: Model name
+            budget_ms: Per-frame latency budget of this model (see budget_ms)
+
+        Returns:
+            The largest allowed size expected to fit the budget (the smallest if none fits)
+        """
+        with self._lock:
+            latencies = self._latency.get(model, {})
+            current = self._current.get(model, self.allowed_sizes[-1])
+
+            chosen = self.allowed_sizes[0]
+            for size in self.allowed_sizes:
+                limit = budget_ms * self.headroom if size > current else budget_ms
+                if self._estimate(latencies, size) <= limit:
+                    chosen = size
+
+            self._current[model] = chosen
+            return chosen
+
+    def stats(self) -> Dict:
+        """Current size and latency estimates per model"""
+        with self._lock:
+            return {
+                'latency_target_ms': self.latency_target_ms,
+                'overhead_ms': None if self._overhead_ms is None else round(self._overhead_ms, 1),
+                'models': {
+                    model: {
+                        'imgsz': self._current.get(model),
+                        'latency_ms': {size: round(ms, 1) for size, ms in sorted(latencies.items())}
+                    }
+                    for model, latencies in self._latency.items()
+                }
+            }
@@ -10,7 +10,9 @@ import os
 import sys
 from pathlib import Path
 
-from unified_agricultural_detector import UnifiedAgriculturalDetector
+from unified_agricultural_detector import UnifiedAgriculturalDetector, YOLO_BACKENDS, configure_torch_threads
+from frame_sampler import AdaptiveFrameSampler
+from crop_cache import CropClassificationCache
 
 
 def main():
@@ -42,7 +44,7 @@ Examples:
                        help='Path to pest detection YOLO model')
     parser.add_argument('--disease-model', type=str,
                        default='plant-disease-tensorflow2-plant-disease-v1',
-                       help='Path to disease classification TensorFlow model directory')
+                       help='Path to disease classification TensorFlow model directory (or .tflite model)')
     parser.add_argument('--classes', type=str,
                        default='plant_village_classes.txt',
                        help='Path to disease class names file')
@@ -61,15 +63,61 @@ Examples:
     # Processing options
     parser.add_argument('--conf', type=float, default=0.25,
                        help='Confidence threshold (0.0-1.0)')
+    parser.add_argument('--adaptive-skip', action='store_true',
+                       help='Choose analyzed video frames by scene motion instead of --frame-skip')
+    parser.add_argument('--min-interval', type=int, default=1,
+                       help='Adaptive skip: minimum frames between analyzed frames (default: 1)')
+    parser.add_argument('--max-interval', type=int, default=15,
+                       help='Adaptive skip: maximum frames between analyzed frames (default: 15)')
     parser.add_argument('--frame-skip', type=int, default=1,
                        help='Process every Nth frame for video (default: 1 = all frames)')
+    parser.add_argument('--sample-interval', type=float, default=None,
+                       help='Analyze one video frame per this many seconds instead of --frame-skip')
+    parser.add_argument('--seek-threshold', type=int, default=None,
+                       help='Seek instead of grabbing when at least this many frames are skipped')
     parser.add_argument('--no-display', action='store_true',
                        help='Don\'t show live display window')
     parser.add_argument('--save-video', action='store_true',
                        help='Save annotated video output')
+    parser.add_argument('--backend', type=str, choices=YOLO_BACKENDS, default='torch',
+                       help='Inference runtime for the YOLO models (default: torch)')
+    parser.add_argument('--batch-size', type=int, default=8,
+                       help='Frames per batched YOLO inference call for video (default: 8)')
+    parser.add_argument('--tile-size', type=int, default=None,
+                       help='Run YOLO on overlapping full-resolution tiles of this size, e.g. 640 (default: no tiling)')
+    parser.add_argument('--tile-overlap', type=float, default=0.2,
+                       help='Fraction of a tile shared with its neighbour (default: 0.2)')
+    parser.add_argument('--max-tiles', type=int, default=None,
+                       help='Maximum tiles per frame, trading small-object recall against fps (default: unlimited)')
+    parser.add_argument('--latency-target', type=float, default=None,
+                       help='Per-frame latency target in ms; YOLO input sizes adapt to hold it (default: off)')
+    parser.add_argument('--imgsz-choices', type=int, nargs='+', default=[320, 416, 512, 640],
+                       help='Input sizes allowed with --latency-target (default: 320 416 512 640)')
+    parser.add_argument('--crop-cache', type=str, default=None, metavar='PATH',
+                       help='Cache plant crop classifications in this file, reused between runs over the same field')
+    parser.add_argument('--crop-cache-size', type=int, default=10000,
+                       help='Maximum number of cached crop classifications (default: 10000)')
+    parser.add_argument('--no-tracking', action='store_true',
+                       help='Classify every plant in every video frame instead of once per tracked plant')
+    parser.add_argument('--reclassify-every', type=int, default=15,
+                       help='Processed frames after which a tracked plant is classified again (default: 15)')
+    parser.add_argument('--parallel', action='store_true',
+                       help='Run models concurrently and overlap disease classification with detection')
+    parser.add_argument('--threads', type=int, default=None,
+                       help='Total thread budget shared by all models in parallel mode (default: all cores)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Split video analysis between this many worker processes (default: 1); '
+                            'plants are not tracked with more than one')
+    parser.add_argument('--checkpoint-interval', type=float, default=None,
+                       help='Save a resumable checkpoint of video analysis every N seconds (default: off)')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='Start video analysis from frame 0 even if a checkpoint exists')
     
     args = parser.parse_args()
     
+    if args.workers > 1 and args.adaptive_skip:
+        parser.error('--workers cannot be combined with --adaptive-skip')
+    
     # Validate model paths
     if not os.path.exists(args.weed_model):
         print(f"❌ Error: Weed model not found: {args.weed_model}")
@@ -100,6 +148,15 @@ Examples:
     print(f"🌱 Disease Model: {args.disease_model}")
     print("="*60 + "\n")
     
+    # Crop classification cache, persisted between runs when a path is given
+    crop_cache = None
+    if args.crop_cache:
+        crop_cache = CropClassificationCache(
+            max_size=args.crop_cache_size,
+            path=args.crop_cache,
+            model_id=os.path.realpath(args.disease_model)
+        )
+    
     try:
         detector = UnifiedAgriculturalDetector(
             weed_model_path=args.weed_model,
@@ -107,22 +164,49 @@ Examples:
             disease_model_path=args.disease_model,
             disease_class_names=disease_classes,
             conf_threshold=args.conf,
-            plant_detector_model=args.plant_detector
+            plant_detector_model=args.plant_detector,
+            parallel=args.parallel,
+            max_threads=args.threads,
+            batch_size=args.batch_size,
+            backend=args.backend,
+            tile_size=args.tile_size,
+            tile_overlap=args.tile_overlap,
+            max_tiles=args.max_tiles,
+            latency_target_ms=args.latency_target,
+            allowed_imgsz=tuple(args.imgsz_choices),
+            track_plants=not args.no_tracking,
+            reclassify_every=args.reclassify_every,
+            crop_cache=crop_cache
         )
+        configure_torch_threads(detector.init_kwargs)
         
         # Process based on input type
         if args.video:
             # Video file processing with full analysis
             print(f"📹 Processing video: {args.video}")
             print(f"   Output directory: {args.output_dir}")
-            print(f"   Frame skip: {args.frame_skip}\n")
+            if args.adaptive_skip:
+                print(f"   Adaptive frame skip: {args.min_interval}-{args.max_interval} frames\n")
+            elif args.sample_interval:
+                print(f"   Sample interval: {args.sample_interval}s\n")
+            else:
+                print(f"   Frame skip: {args.frame_skip}\n")
             
             report = detector.process_video_file(
                 video_path=args.video,
                 output_dir=args.output_dir,
                 frame_skip=args.frame_skip,
                 save_annotated_video=True,
-                save_curated_images=True
+                save_curated_images=True,
+                sampler=AdaptiveFrameSampler(
+                    min_interval=args.min_interval,
+                    max_interval=args.max_interval
+                ) if args.adaptive_skip else None,
+                sample_interval=args.sample_interval,
+                seek_threshold=args.seek_threshold,
+                workers=args.workers,
+                checkpoint_interval=args.checkpoint_interval,
+                resume=not args.no_resume
             )
             
             print("\n" + "="*60)
@@ -168,6 +252,10 @@ Examples:
             parser.print_help()
             print("\n❌ Error: Must specify --image, --video, or --live")
             sys.exit(1)
+        
+        if crop_cache is not None:
+            crop_cache.save()
+            print(f"💾 Crop cache saved to: {args.crop_cache} ({crop_cache.stats()['hit_rate']:.1%} hit rate)")
             
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
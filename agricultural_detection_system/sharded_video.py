@@ -0,0 +1,229 @@
+"""
+Multi-process sharded video inference
+Splits a video into frame ranges aligned to the frame sampling, runs detection
+on each range in its own worker process with its own detector, and returns
+the detections in frame order so the caller can build the report exactly as
+a single-process pass would. Plant tracking is off in the workers, since a
+track cannot continue across ranges.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+
+from detection_set import FrameDetections, LabelVocabulary
+from frame_sampler import FrameGrabber, sample_frame, sample_step
+
+
+# Detector of the current worker process (created once by _init_worker)
+_worker_detector = None
+
+
+def plan_shards(total_frames: int,
+                num_shards: int,
+                fps: float,
+                frame_skip: int = 1,
+                interval_seconds: Optional[float] = None,
+                start_frame: int = 0) -> List[Tuple[int, int]]:
+    """
+    Split a video into frame ranges with about the same number of analyzed frames
+
+    Every range but the first starts at an analyzed frame, so sampling the
+    ranges separately selects exactly the frames a whole-video pass selects.
+
+    Args:
+        total_frames: Number of frames in the video
+        num_shards: Number of ranges wanted
+        fps: Video frame rate (for time-based sampling)
+        frame_skip: Analyze every Nth frame
+        interval_seconds: Analyze one frame per this many seconds instead
+        start_frame: Split only the part of the video from this frame on
+                     (e.g. when resuming a job)
+
+    Returns:
+        List of (start_frame, end_frame) ranges, end exclusive
+    """
+    step = sample_step(fps, frame_skip, interval_seconds)
+    first_sample = 0
+    while sample_frame(first_sample, step) < start_frame:
+        first_sample += 1
+    num_samples = 0
+    while sample_frame(first_sample + num_samples, step) < total_frames:
+        num_samples += 1
+    num_shards = max(1, min(num_shards, num_samples))
+
+    # The first range starts at start_frame itself so its frames are all counted
+    starts = [start_frame] + [sample_frame(first_sample + round(i * num_samples / num_shards), step)
+                              for i in range(1, num_shards)]
+    return [(start, end) for start, end in zip(starts, starts[1:] + [total_frames]) if end > start]
+
+
+def merge_stats(stats: List[Optional[Dict]]) -> Optional[Dict]:
+    """
+    Merge per-shard statistics dictionaries
+
+    Integer counters are summed; all other values (rates, settings) are taken
+    from the first shard and have to be recomputed by the caller if needed.
+    """
+    stats = [s for s in stats if s is not None]
+    if not stats:
+        return None
+    merged = dict(stats[0])
+    for shard_stats in stats[1:]:
+        for key, value in shard_stats.items():
+            if isinstance(value, int) and not isinstance(value, bool) and key not in ('frame_skip',):
+                merged[key] += value
+    return merged
+
+
+def merge_tracking_stats(stats: List[Optional[Dict]]) -> Optional[Dict]:
+    """Merge tracking statistics of consecutive parts of a video (tracks restart in each part)"""
+    stats = [s for s in stats if s is not None]
+    merged = merge_stats(stats)
+    if merged is not None:
+        lookups = merged['classifications'] + merged['reused_classifications']
+        merged['active_tracks'] = stats[-1]['active_tracks']
+        merged['reuse_rate'] = round(merged['reused_classifications'] / lookups, 3) if lookups else 0.0
+    return merged
+
+
+def merge_sampling_stats(stats: List[Optional[Dict]]) -> Optional[Dict]:
+    """Merge frame sampling statistics of consecutive parts of a video"""
+    merged = merge_stats(stats)
+    if merged is not None and 'skip_ratio' in merged:
+        seen = merged['frames_seen']
+        merged['skip_ratio'] = round(merged['frames_skipped'] / seen, 3) if seen else 0.0
+    return merged
+
+
+def _init_worker(detector_kwargs: Dict):
+    """Set the worker process's torch threads and create its detector"""
+    global _worker_detector
+    from unified_agricultural_detector import UnifiedAgriculturalDetector, configure_torch_threads
+
+    configure_torch_threads(detector_kwargs)
+    _worker_detector = UnifiedAgriculturalDetector(**detector_kwargs)
+
+
+def _detect_shard(video_path: str,
+                  start_frame: int,
+                  end_frame: int,
+                  frame_skip: int,
+                  interval_seconds: Optional[float],
+                  seek_threshold: Optional[int]) -> Dict:
+    """Run detection on the sampled frames of one range (in a worker process, without tracking)"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+
+    try:
+        grabber = FrameGrabber(cap, frame_skip=frame_skip, interval_seconds=interval_seconds,
+                               seek_threshold=seek_threshold,
+                               start_frame=start_frame, end_frame=end_frame)
+        detections = [(frame_number, frame_detections)
+                      for frame_number, _, frame_detections in _worker_detector.detect_stream(grabber)]
+    finally:
+        cap.release()
+
+    return {
+        'detections': detections,
+        'frame_sampling': grabber.stats()
+    }
+
+
+class ShardedVideoDetector:
+    """Runs detection over a video in several worker processes"""
+
+    def __init__(self, detector_kwargs: Dict, workers: int, max_threads: Optional[int] = None):
+        """
+        Initialize the sharded detector
+
+        Args:
+            detector_kwargs: Keyword arguments for UnifiedAgriculturalDetector in each worker
+            workers: Number of worker processes (and video shards)
+            max_threads: Total thread budget split between the workers
+                         (default: number of CPU cores)
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.workers = workers
+        self.threads_per_worker = max(1, (max_threads or os.cpu_count() or 1) // workers)
+        self.detector_kwargs = dict(detector_kwargs)
+        self.detector_kwargs['max_threads'] = self.threads_per_worker
+        # Caches hold locks and are owned by the parent process
+        self.detector_kwargs['crop_cache'] = None
+        # Tracks would restart (with other ids and classifications) in every shard
+        self.detector_kwargs['track_plants'] = False
+
+        self.shards: List[Tuple[int, int]] = []
+        self.shard_stats: List[Dict] = []
+
+    def detect(self,
+               video_path: str,
+               frame_skip: int = 1,
+               interval_seconds: Optional[float] = None,
+               seek_threshold: Optional[int] = None,
+               vocabulary: Optional[LabelVocabulary] = None,
+               start_frame: int = 0) -> Iterator[Tuple[int, FrameDetections]]:
+        """
+        Detect objects in the sampled frames of a video
+
+        Shards are processed concurrently; results are yielded in frame order
+        as soon as the shard they belong to is finished.
+
+        Args:
+            video_path: Path to the video file
+            frame_skip: Analyze every Nth frame
+            interval_seconds: Analyze one frame per this many seconds instead
+            seek_threshold: See FrameGrabber
+            vocabulary: Disease label vocabulary the returned detections should use
+                        (default: each shard keeps its worker's vocabulary)
+            start_frame: Analyze only the part of the video from this frame on
+
+        Yields:
+            (frame_number, detections) of every analyzed frame
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total_frames <= 0:
+            raise ValueError(f"Sharded analysis needs a known frame count: {video_path}")
+
+        self.shards = plan_shards(total_frames, self.workers, fps, frame_skip, interval_seconds,
+                                  start_frame=start_frame)
+        self.shard_stats = []
+        print(f"🧩 Sharded analysis: {len(self.shards)} worker process(es), "
+              f"{self.threads_per_worker} threads each")
+        if not self.shards:
+            return
+
+        # Spawned workers do not inherit the parent's model/thread state
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(self.shards), mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(self.detector_kwargs,)) as pool:
+            futures = [pool.submit(_detect_shard, video_path, start, end,
+                                   frame_skip, interval_seconds, seek_threshold)
+                       for start, end in self.shards]
+            try:
+                for future in futures:
+                    result = future.result()
+                    self.shard_stats.append({'frame_sampling': result['frame_sampling']})
+                    mappings = {}
+                    for frame_number, detections in result['detections']:
+                        if vocabulary is not None:
+                            detections.adopt_vocabulary(vocabulary, mappings)
+                        yield frame_number, detections
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def frame_sampling_stats(self) -> Optional[Dict]:
+        """Frame sampling statistics of all shards, merged"""
+        return merge_stats([stats['frame_sampling'] for stats in self.shard_stats])
@@ -0,0 +1,233 @@
+"""
+Shared fixtures for the tests of the video analysis helpers
+The tests only need numpy and OpenCV: detections and videos are synthetic,
+no model weights are loaded.
+
+Run from agricultural_detection_system/ with: python -m pytest tests
+"""
+
+import os
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+# The modules of the package are imported as top-level modules (like the scripts do)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection_set import DetectionSet, FrameDetections, LabelVocabulary  # noqa: E402
+from plant_tracker import PlantTracker  # noqa: E402
+
+
+DISEASE_LABELS = ['Tomato___healthy', 'Tomato___Late_blight', 'Corn___Common_rust', 'Corn___healthy']
+
+
+def _random_boxes(rng: np.random.Generator, count: int) -> np.ndarray:
+    top_left = rng.integers(0, 280, size=(count, 2))
+    size = rng.integers(5, 40, size=(count, 2))
+    return np.hstack([top_left, top_left + size])
+
+
+def random_frame_data(rng: np.random.Generator, frame_number: int, vocabulary: LabelVocabulary) -> Dict:
+    """Frame dictionary as process_video_file builds it, with random detections"""
+    counts = rng.integers(0, 6, size=3)
+    diseases = DetectionSet('diseases', _random_boxes(rng, counts[2]), rng.random(counts[2]),
+                            label_ids=rng.integers(0, len(DISEASE_LABELS), size=counts[2]),
+                            plant_ids=np.full(counts[2], -1), vocabulary=vocabulary)
+    detections = FrameDetections(
+        weeds=DetectionSet('weeds', _random_boxes(rng, counts[0]), rng.random(counts[0])),
+        pests=DetectionSet('pests', _random_boxes(rng, counts[1]), rng.random(counts[1]),
+                           class_ids=rng.integers(0, 3, size=counts[1])),
+        diseases=diseases,
+        water_stress=DetectionSet.empty('water_stress'),
+        timestamp=f"frame-{frame_number}"
+    )
+
+    # Coarse values, so that frames with equal sort keys occur
+    good, bad, weed = (rng.integers(0, 8, size=3) * 5).tolist()
+    return {
+        'frame_number': frame_number,
+        'detections': detections,
+        'area_stats': {
+            'good_crop_percentage': float(good),
+            'bad_crop_percentage': float(bad),
+            'weed_percentage': float(weed)
+        },
+        'yield_stats': {'estimated_yield_per_acre': float(150 * good / 100)}
+    }
+
+
+@pytest.fixture
+def make_frames() -> Callable[..., List[Dict]]:
+    """Factory for lists of random frame dictionaries (reproducible per seed)"""
+    def make(count: int, seed: int = 0) -> List[Dict]:
+        rng = np.random.default_rng(seed)
+        vocabulary = LabelVocabulary(DISEASE_LABELS)
+        return [random_frame_data(rng, frame_number, vocabulary) for frame_number in range(count)]
+    return make
+
+
+def moving_scene(speeds: List[float], seed: int = 0, size: Tuple[int, int] = (96, 64)) -> List[np.ndarray]:
+    """
+    Frames of a textured scene panned by speeds[i] pixels at frame i (0 = static)
+
+    Args:
+        speeds: Horizontal camera motion per frame
+        seed: Seed of the texture
+        size: (width, height) of the frames
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    # Smooth random texture, wide enough for the whole pan
+    texture = rng.integers(0, 256, size=(height // 4, (width + int(sum(speeds)) + 8) // 4, 3), dtype=np.uint8)
+    texture = cv2.resize(texture, (texture.shape[1] * 4, texture.shape[0] * 4), interpolation=cv2.INTER_CUBIC)
+    frames = []
+    x = 0.0
+    for speed in speeds:
+        x += speed
+        frames.append(np.ascontiguousarray(texture[:, int(x):int(x) + width]))
+    return frames
+
+
+@pytest.fixture
+def make_scene() -> Callable[..., List[np.ndarray]]:
+    """Factory for video frames with a given camera motion per frame (see moving_scene)"""
+    return moving_scene
+
+
+@pytest.fixture
+def sample_video(tmp_path) -> Callable[..., str]:
+    """Factory for a small MP4 whose frames are flat gray images of increasing level"""
+    def make(num_frames: int = 47, fps: float = 10.0) -> str:
+        path = str(tmp_path / f"sample_{num_frames}_{fps:g}.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (64, 48))
+        assert writer.isOpened()
+        for frame_number in range(num_frames):
+            writer.write(np.full((48, 64, 3), (frame_number * 5) % 250, dtype=np.uint8))
+        writer.release()
+        return path
+    return make
+
+
+def drifting_plants(position: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Boxes and confidences of plants shifted by position pixels; each plant is missed now and then"""
+    boxes = [[10 + 40 * plant + position, 20, 40 + 40 * plant + position, 50]
+             for plant in range(6) if (position // 3 + plant) % 9 != 0]
+    return np.array(boxes, dtype=np.float64).reshape(-1, 4), np.full(len(boxes), 0.8)
+
+
+class StubDetector:
+    """
+    Stands in for UnifiedAgriculturalDetector in video jobs (no models)
+
+    Detections only depend on the image: plants are shifted by its mean
+    gray level (see drifting_plants), and a plant's disease label follows
+    the gray level of the frame it is classified in, so reused
+    classifications show up in the reports. Plants are tracked like the
+    detector tracks them, a batch at a time.
+    """
+
+    def __init__(self, batch_size: int = 4, track_plants: bool = True, fail_after: Optional[int] = None):
+        """
+        Args:
+            batch_size: Frames per inference batch
+            track_plants: Track plants and reuse their classification
+            fail_after: Raise RuntimeError when this many frames were detected (simulated crash)
+        """
+        self.batch_size = batch_size
+        self.track_plants = track_plants
+        self.fail_after = fail_after
+        self.init_kwargs = {'max_threads': 1}
+        self.disease_labels = LabelVocabulary(DISEASE_LABELS)
+        self.crop_cache = None
+        self.frames_detected: List[int] = []
+        self.images_detected = 0
+
+    def new_tracker(self) -> Optional[PlantTracker]:
+        return PlantTracker(reclassify_every=3) if self.track_plants else None
+
+    def checkpoint_settings(self) -> Dict:
+        return {'detector': 'stub', 'track_plants': self.track_plants}
+
+    def _detect(self, image: np.ndarray, tracker: Optional[PlantTracker]) -> FrameDetections:
+        if self.fail_after is not None and self.images_detected >= self.fail_after:
+            raise RuntimeError(f"Simulated crash after {self.images_detected} frames")
+        self.images_detected += 1
+
+        level = int(round(float(image.mean())))
+        boxes, confidences = drifting_plants(level)
+        label_id = level // 20 % len(DISEASE_LABELS)
+        label_ids = np.full(len(boxes), label_id)
+        plant_ids = np.full(len(boxes), -1)
+        if tracker is not None:
+            plant_ids = tracker.update(boxes, confidences)
+            for index, track_id in enumerate(plant_ids.tolist()):
+                if tracker.needs_classification(track_id):
+                    tracker.start_classification(track_id)
+                    tracker.store_classification(track_id, DISEASE_LABELS[label_id], 0.9)
+                label = tracker.classification(track_id)[0]
+                label_ids[index] = self.disease_labels.id_for(label)
+
+        return FrameDetections(
+            weeds=DetectionSet('weeds', boxes[::2] + 5, confidences[::2]),
+            pests=DetectionSet.empty('pests'),
+            diseases=DetectionSet('diseases', boxes, confidences, label_ids=label_ids,
+                                  plant_ids=plant_ids, vocabulary=self.disease_labels),
+            water_stress=DetectionSet.empty('water_stress'),
+            timestamp=f"level-{level}"
+        )
+
+    def detect_batch(self, frames: List[np.ndarray], tracker: Optional[PlantTracker] = None) -> List[FrameDetections]:
+        return [self._detect(image, tracker) for image in frames]
+
+    def detect_stream(self,
+                      frames: Iterable[Tuple[int, np.ndarray]],
+                      batch_size: Optional[int] = None,
+                      tracker: Optional[PlantTracker] = None) -> Iterator[Tuple[int, np.ndarray, FrameDetections]]:
+        batch = []
+        for item in frames:
+            batch.append(item)
+            if len(batch) == (batch_size or self.batch_size):
+                # Results of a batch come out after the whole batch was tracked
+                yield from self._detect_frames(batch, tracker)
+                batch = []
+        yield from self._detect_frames(batch, tracker)
+
+    def _detect_frames(self, batch: List[Tuple[int, np.ndarray]], tracker: Optional[PlantTracker]):
+        detections = self.detect_batch([image for _, image in batch], tracker)
+        self.frames_detected.extend(frame_number for frame_number, _ in batch)
+        return [(frame_number, image, frame_detections)
+                for (frame_number, image), frame_detections in zip(batch, detections)]
+
+    def calculate_area_coverage(self, detections: FrameDetections, frame_shape: Tuple[int, int]) -> Dict:
+        diseases = detections['diseases']
+        good = 5.0 * diseases.healthy_count()
+        bad = 5.0 * diseases.diseased_count()
+        weeds = 2.0 * len(detections['weeds'])
+        return {
+            'good_crop_percentage': good,
+            'bad_crop_percentage': bad,
+            'weed_percentage': weeds,
+            'remaining_percentage': 100.0 - good - bad - weeds
+        }
+
+    def estimate_yield(self, area_stats: Dict, detections: FrameDetections) -> Dict:
+        yield_per_acre = 150.0 * area_stats['good_crop_percentage'] / 100
+        return {'estimated_yield_per_acre': yield_per_acre, 'yield_percentage': yield_per_acre / 1.5}
+
+    def draw_detections(self, image: np.ndarray, detections: FrameDetections) -> np.ndarray:
+        annotated = image.copy()
+        for x1, y1, x2, y2 in detections['diseases'].boxes.tolist():
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 1)
+        return annotated
+
+    def annotate_video_frame(self, frame: np.ndarray, frame_data: Dict, total_frames: int) -> np.ndarray:
+        return self.draw_detections(frame, frame_data['detections'])
+
+
+@pytest.fixture
+def make_detector() -> Callable[..., StubDetector]:
+    """Factory for stub detectors (see StubDetector)"""
+    return StubDetector
@@ -0,0 +1,119 @@
+"""Box overlap, class-aware NMS and tile grids"""
+
+import numpy as np
+import pytest
+
+from box_ops import batched_nms, box_area, box_iou, box_ios, tile_grid
+
+
+BOXES_A = np.array([[0, 0, 10, 10],
+                    [5, 5, 15, 15],
+                    [20, 20, 30, 30]])
+BOXES_B = np.array([[0, 0, 10, 10],
+                    [0, 0, 5, 5],
+                    [10, 0, 20, 10]])
+
+
+def test_box_area_clips_degenerate_boxes():
+    assert box_area([[0, 0, 10, 4], [5, 5, 3, 9], [1, 1, 1, 1]]).tolist() == [40, 0, 0]
+
+
+def test_iou_of_known_boxes():
+    iou = box_iou(BOXES_A, BOXES_B)
+    assert iou.shape == (3, 3)
+    assert iou.dtype == np.float32
+    expected = [[1.0, 25 / 100, 0.0],
+                [25 / 175, 0.0, 25 / 175],
+                [0.0, 0.0, 0.0]]
+    assert np.allclose(iou, expected)
+    # Touching boxes do not overlap
+    assert box_iou(BOXES_A[:1], BOXES_B[2:])[0, 0] == 0
+
+
+def test_ios_of_known_boxes():
+    ios = box_ios(BOXES_A, BOXES_B)
+    expected = [[1.0, 1.0, 0.0],
+                [25 / 100, 0.0, 25 / 100],
+                [0.0, 0.0, 0.0]]
+    assert np.allclose(ios, expected)
+    # Intersection over the smaller box, whichever side it is on
+    assert np.allclose(box_ios(BOXES_B, BOXES_A), np.transpose(expected))
+
+
+def test_overlap_of_empty_and_degenerate_boxes():
+    assert box_iou(np.zeros((0, 4)), BOXES_B).shape == (0, 3)
+    assert box_ios(BOXES_A, np.zeros((0, 4))).shape == (3, 0)
+    point = [[5, 5, 5, 5]]
+    assert box_iou(point, point)[0, 0] == 0
+    assert box_ios(point, BOXES_A)[0, 0] == 0
+
+
+def test_nms_keeps_highest_score_of_overlapping_boxes():
+    boxes = [[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60], [0, 0, 9, 10]]
+    scores = [0.6, 0.9, 0.5, 0.7]
+    keep = batched_nms(boxes, scores, np.zeros(4), threshold=0.5)
+    assert keep.tolist() == [1, 2]
+
+
+def test_nms_does_not_suppress_across_classes():
+    boxes = [[0, 0, 10, 10], [0, 0, 10, 10], [1, 1, 11, 11]]
+    scores = [0.9, 0.8, 0.7]
+    assert batched_nms(boxes, scores, [0, 1, 0]).tolist() == [0, 1]
+    assert batched_nms(boxes, scores, [0, 1, 2]).tolist() == [0, 1, 2]
+
+
+def test_nms_with_ios_merges_cut_off_boxes():
+    # A plant cut off at a tile border lies inside its full box from the neighbour tile
+    boxes = [[0, 0, 40, 40], [20, 0, 40, 40]]
+    scores = [0.9, 0.8]
+    assert batched_nms(boxes, scores, [0, 0], threshold=0.6, metric='iou').tolist() == [0, 1]
+    assert batched_nms(boxes, scores, [0, 0], threshold=0.6, metric='ios').tolist() == [0]
+
+
+def test_nms_of_no_boxes():
+    assert batched_nms(np.zeros((0, 4)), np.zeros(0), np.zeros(0)).tolist() == []
+
+
+def coverage(tiles, width, height):
+    covered = np.zeros((height, width), dtype=np.int32)
+    for x1, y1, x2, y2 in tiles:
+        covered[y1:y2, x1:x2] += 1
+    return covered
+
+
+@pytest.mark.parametrize('width, height', [(640, 640), (1920, 1080), (1000, 700), (300, 200)])
+@pytest.mark.parametrize('overlap', [0.0, 0.2, 0.5])
+def test_tile_grid_covers_image(width, height, overlap):
+    tiles = tile_grid(width, height, 640, overlap=overlap)
+    assert np.all(coverage(tiles, width, height) >= 1)
+    assert np.all(tiles[:, :2] >= 0)
+    assert np.all(tiles[:, 2] <= width) and np.all(tiles[:, 3] <= height)
+    # Tiles keep their size inside the image
+    if width >= 640 and height >= 640:
+        assert np.all(tiles[:, 2] - tiles[:, 0] == 640)
+        assert np.all(tiles[:, 3] - tiles[:, 1] == 640)
+
+
+def test_tile_grid_overlap_between_neighbours():
+    tiles = tile_grid(2000, 640, 640, overlap=0.25)
+    starts = sorted(tiles[:, 0].tolist())
+    assert starts[0] == 0 and tiles[:, 2].max() == 2000
+    # Neighbours overlap by at least the requested fraction (the last one more)
+    assert all(640 - (b - a) >= 0.25 * 640 for a, b in zip(starts, starts[1:]))
+
+
+@pytest.mark.parametrize('max_tiles', [1, 2, 4, 6])
+def test_max_tiles_forces_larger_tiles(max_tiles):
+    width, height = 1920, 1080
+    unlimited = tile_grid(width, height, 640, overlap=0.2)
+    tiles = tile_grid(width, height, 640, overlap=0.2, max_tiles=max_tiles)
+
+    assert len(unlimited) > max_tiles
+    assert len(tiles) <= max_tiles
+    assert np.all(coverage(tiles, width, height) >= 1)
+    tile = (tiles[:, 2] - tiles[:, 0]).max()
+    assert tile > 640
+    # Neighbouring tiles still overlap by the requested fraction
+    for axis in (0, 1):
+        starts = sorted(set(tiles[:, axis].tolist()))
+        assert all(tile - (b - a) >= int(0.2 * tile) for a, b in zip(starts, starts[1:]))
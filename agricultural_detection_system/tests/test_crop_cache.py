@@ -0,0 +1,175 @@
+"""Crop classification cache: perceptual keys, near hits, LRU eviction and persistence"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import crop_cache
+from crop_cache import CACHE_FILE_VERSION, CropClassificationCache, _popcount, crop_key
+
+
+def leaf(seed, color=(40, 160, 60), size=(64, 48)):
+    """Synthetic plant crop: a colored blob pattern on soil"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    crop = np.full((height, width, 3), (30, 60, 90), dtype=np.uint8)
+    for _ in range(5):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(5, width // 2)), int(rng.integers(5, height // 2)))
+        cv2.ellipse(crop, center, axes, float(rng.integers(0, 180)), 0, 360, color, -1)
+    return crop
+
+
+def hamming(key_a, key_b):
+    return int(_popcount(np.array([key_a[1] ^ key_b[1]], dtype=np.uint64))[0])
+
+
+def test_crop_key_is_stable_and_scale_invariant():
+    crop = leaf(0)
+    assert crop_key(crop) == crop_key(crop.copy())
+    color, phash = crop_key(crop)
+    assert 0 <= color < crop_cache.COLOR_LEVELS ** 3
+    assert 0 <= phash < 2 ** 64
+
+    # The same plant seen a little larger or with sensor noise hashes (almost) the same
+    larger = cv2.resize(crop, (96, 72), interpolation=cv2.INTER_LINEAR)
+    noise = np.random.default_rng(1).integers(-3, 4, size=crop.shape)
+    noisy = np.clip(crop.astype(np.int64) + noise, 0, 255).astype(np.uint8)
+    for similar in (larger, noisy):
+        assert crop_key(similar)[0] == color
+        assert hamming(crop_key(similar), (color, phash)) <= 4
+
+
+def test_crop_key_separates_color_and_shape():
+    crop = leaf(0)
+    # Same shape, yellowing leaves: different color code
+    yellow = leaf(0, color=(40, 200, 220))
+    assert crop_key(yellow)[0] != crop_key(crop)[0]
+    # Different plant: far apart hashes
+    assert hamming(crop_key(leaf(5)), crop_key(crop)) > 8
+
+
+def test_exact_and_near_hits():
+    cache = CropClassificationCache(max_distance=2)
+    color, phash = crop_key(leaf(0))
+    cache.put((color, phash), 'Tomato___healthy', 0.9)
+
+    assert cache.get((color, phash)) == ('Tomato___healthy', 0.9)
+    # Within max_distance bits: near hit
+    assert cache.get((color, phash ^ 0b101)) == ('Tomato___healthy', 0.9)
+    # Too many bits, or another color: miss
+    assert cache.get((color, phash ^ 0b111)) is None
+    assert cache.get((color + 1, phash)) is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['near_hits'], stats['misses']) == (2, 1, 2)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_near_hit_picks_the_closest_entry():
+    cache = CropClassificationCache(max_distance=3)
+    cache.put((7, 0b0000), 'far', 0.5)
+    cache.put((7, 0b1110), 'close', 0.6)
+    cache.put((8, 0b1111), 'other color', 0.7)
+    assert cache.get((7, 0b1111)) == ('close', 0.6)
+
+
+def test_exact_match_only_without_distance():
+    cache = CropClassificationCache(max_distance=0)
+    cache.put((1, 0b1000), 'Corn___healthy', 0.8)
+    assert cache.get((1, 0b1001)) is None
+    assert cache.get((1, 0b1000)) == ('Corn___healthy', 0.8)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = CropClassificationCache(max_size=3, max_distance=0)
+    for i in range(3):
+        cache.put((0, i), f"label-{i}", 0.5)
+    # Using entry 0 makes entry 1 the least recently used
+    assert cache.get((0, 0)) is not None
+    cache.put((0, 3), 'label-3', 0.5)
+
+    assert len(cache) == 3
+    assert cache.get((0, 1)) is None
+    assert [cache.get((0, i)) is not None for i in (0, 2, 3)] == [True, True, True]
+
+
+def test_near_hit_index_follows_evictions():
+    cache = CropClassificationCache(max_size=2, max_distance=2)
+    cache.put((0, 0b0001), 'first', 0.5)
+    assert cache.get((0, 0b0011)) == ('first', 0.5)
+    cache.put((0, 0b1000000), 'second', 0.5)
+    cache.put((0, 0b1100000), 'third', 0.5)
+    # 'first' is evicted and must not be found through a stale index
+    assert cache.get((0, 0b0011)) is None
+
+
+def test_save_and_load_keep_entries_and_order(tmp_path):
+    path = str(tmp_path / 'cache' / 'crops.json')
+    cache = CropClassificationCache(max_size=10, path=path, model_id='model-a')
+    for i in range(5):
+        cache.put((i, 2 ** 63 + i), f"label-{i}", i / 10)
+    cache.get((0, 2 ** 63))
+    assert cache.save() == path
+
+    loaded = CropClassificationCache(max_size=10, path=path, model_id='model-a')
+    assert list(loaded._entries.items()) == list(cache._entries.items())
+
+    # A smaller cache keeps the most recently used entries
+    small = CropClassificationCache(max_size=2, path=path, model_id='model-a')
+    assert list(small._entries) == [(4, 2 ** 63 + 4), (0, 2 ** 63)]
+
+
+def test_save_is_atomic(tmp_path, monkeypatch):
+    path = str(tmp_path / 'crops.json')
+    cache = CropClassificationCache(path=path)
+    cache.put((1, 1), 'Tomato___healthy', 0.9)
+    cache.save()
+    with open(path) as f:
+        saved = f.read()
+
+    def failing_dump(data, f):
+        f.write('{"version": 1, "entr')
+        raise OSError("disk full")
+
+    cache.put((2, 2), 'Tomato___Late_blight', 0.8)
+    monkeypatch.setattr(crop_cache.json, 'dump', failing_dump)
+    with pytest.raises(OSError):
+        cache.save()
+
+    # The previous file is untouched
+    with open(path) as f:
+        assert f.read() == saved
+    assert len(CropClassificationCache(path=path)) == 1
+
+
+def test_save_without_path_raises():
+    with pytest.raises(ValueError):
+        CropClassificationCache().save()
+
+
+@pytest.mark.parametrize('version, model_id, expected', [
+    (CACHE_FILE_VERSION, 'model-a', 1),
+    (CACHE_FILE_VERSION, None, 1),
+    (CACHE_FILE_VERSION, 'model-b', 0),
+    (CACHE_FILE_VERSION + 1, 'model-a', 0)
+])
+def test_file_of_other_version_or_model_is_ignored(tmp_path, version, model_id, expected):
+    path = str(tmp_path / 'crops.json')
+    with open(path, 'w') as f:
+        json.dump({'version': version, 'model_id': model_id,
+                   'entries': [[3, f"{12345:016x}", 'Corn___Common_rust', 0.7]]}, f)
+
+    cache = CropClassificationCache(path=path, model_id='model-a')
+    assert len(cache) == expected
+    if expected:
+        assert cache.get((3, 12345)) == ('Corn___Common_rust', 0.7)
+
+
+def test_settings_identify_the_cache(tmp_path):
+    path = str(tmp_path / 'crops.json')
+    settings = CropClassificationCache(path=os.path.relpath(path), model_id='m', max_distance=1).settings()
+    assert settings == {'path': os.path.abspath(path), 'model_id': 'm', 'max_size': 10000, 'max_distance': 1}
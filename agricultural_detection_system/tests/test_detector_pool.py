@@ -0,0 +1,164 @@
+"""Detector pool: bounded instances under concurrency, busy and timeout rejection"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from detector_pool import DetectorPool, PoolBusyError
+
+
+class FakeDetector:
+    """Stands in for UnifiedAgriculturalDetector (no models)"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+
+    def model_status_report(self):
+        return {'ready': True}
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(size=2, **kwargs):
+    return DetectorPool({'weed_model_path': 'weed.pt'}, size=size, max_threads=8,
+                        detector_factory=FakeDetector, **kwargs)
+
+
+@pytest.mark.parametrize('per_thread', [False, True])
+@pytest.mark.parametrize('preload', [False, True])
+def test_no_more_than_size_instances_under_concurrency(per_thread, preload):
+    pool = make_pool(size=3, per_thread=per_thread, preload=preload)
+    lock = threading.Lock()
+    active = set()
+    max_active = [0]
+    errors = []
+
+    def request():
+        try:
+            with pool.detector() as detector:
+                with lock:
+                    # A detector is never handed to two requests at once
+                    assert detector not in active
+                    active.add(detector)
+                    max_active[0] = max(max_active[0], len(active))
+                time.sleep(0.002)
+                with lock:
+                    active.remove(detector)
+        except Exception as e:  # noqa: BLE001 (reported by the main thread)
+            errors.append(e)
+
+    # A new thread per request, like a threaded HTTP server
+    threads = [threading.Thread(target=request) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert max_active[0] <= 3
+    stats = pool.stats()
+    assert stats['instances'] <= 3
+    assert stats['served'] == 40
+    assert stats['in_use'] == 0 and stats['waiting'] == 0 and stats['rejected'] == 0
+
+
+def test_threads_share_the_thread_budget():
+    pool = make_pool(size=2)
+    assert pool.threads_per_instance == 4
+    with pool.detector() as detector:
+        assert detector.kwargs == {'weed_model_path': 'weed.pt', 'max_threads': 4}
+
+
+@pytest.mark.parametrize('per_thread', [False, True])
+def test_per_thread_prefers_the_last_detector(per_thread):
+    pool = make_pool(size=2, per_thread=per_thread)
+    mine = pool.acquire()
+    taken = []
+    thread = threading.Thread(target=lambda: taken.append(pool.acquire()))
+    thread.start()
+    thread.join()
+    # The other thread's detector is returned last, so it would be handed out next
+    pool.release(mine)
+    pool.release(taken[0])
+
+    with pool.detector() as detector:
+        assert detector is (mine if per_thread else taken[0])
+
+
+def test_full_queue_is_rejected_at_once():
+    pool = make_pool(size=1, max_waiting=0)
+    detector = pool.acquire()
+    start = time.perf_counter()
+    with pytest.raises(PoolBusyError):
+        pool.acquire()
+    assert time.perf_counter() - start < 0.5
+    assert pool.stats()['rejected'] == 1
+
+    pool.release(detector)
+    with pool.detector() as again:
+        assert again is detector
+
+
+def test_waiting_request_times_out():
+    pool = make_pool(size=1, acquire_timeout=0.05)
+    detector = pool.acquire()
+    with pytest.raises(PoolBusyError):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats['rejected'] == 1 and stats['waiting'] == 0 and stats['in_use'] == 1
+
+    # A waiting request gets the detector as soon as it is returned
+    threading.Timer(0.05, pool.release, args=(detector,)).start()
+    with pool.detector(timeout=2.0) as again:
+        assert again is detector
+
+
+def test_failed_detector_creation_returns_its_slot():
+    calls = []
+
+    def flaky_factory(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("model file missing")
+        return FakeDetector(**kwargs)
+
+    pool = DetectorPool({}, size=1, max_threads=1, preload=False, acquire_timeout=0.1,
+                        detector_factory=flaky_factory)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert pool.stats()['in_use'] == 0
+    with pool.detector() as detector:
+        assert isinstance(detector, FakeDetector)
+
+
+def test_close_shuts_down_every_instance():
+    pool = make_pool(size=2)
+    instances = list(pool._instances)
+    assert pool.model_status_report()['ready']
+    pool.close()
+    assert all(detector.closed for detector in instances)
+
+
+def test_busy_pool_returns_503(tmp_path, monkeypatch):
+    # The API module needs the model runtimes and Pillow (not the model weights)
+    for module in ('torch', 'ultralytics', 'PIL', 'flask_cors'):
+        pytest.importorskip(module)
+    import backend_api
+
+    image_path = str(tmp_path / 'field.jpg')
+    cv2.imwrite(image_path, np.zeros((32, 32, 3), dtype=np.uint8))
+    pool = make_pool(size=1, max_waiting=0)
+    monkeypatch.setattr(backend_api, 'detector_pool', pool)
+
+    detector = pool.acquire()
+    try:
+        response = backend_api.app.test_client().post('/analyze/image', json={'image_path': image_path})
+    finally:
+        pool.release(detector)
+    assert response.status_code == 503
+    assert 'busy' in response.get_json()['error']
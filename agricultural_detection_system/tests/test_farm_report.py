@@ -0,0 +1,271 @@
+"""Incremental farm report against the whole-job computations it replaces"""
+
+from datetime import datetime
+
+import pytest
+
+from farm_report import FarmReportAccumulator
+
+
+def legacy_video_report(frames):
+    """Frame-averaged sections of the video report as process_video_file summed them"""
+    total_good_area = sum(frame_data['area_stats']['good_crop_percentage'] for frame_data in frames)
+    total_bad_area = sum(frame_data['area_stats']['bad_crop_percentage'] for frame_data in frames)
+    total_weed_area = sum(frame_data['area_stats']['weed_percentage'] for frame_data in frames)
+    total_yield = sum(frame_data['yield_stats']['estimated_yield_per_acre'] for frame_data in frames)
+    total_weeds = sum(len(frame_data['detections']['weeds']) for frame_data in frames)
+    total_pests = sum(len(frame_data['detections']['pests']) for frame_data in frames)
+    total_diseases = sum(len(frame_data['detections']['diseases']) for frame_data in frames)
+    processed_frames = len(frames)
+
+    avg_good = total_good_area / processed_frames if processed_frames > 0 else 0
+    avg_bad = total_bad_area / processed_frames if processed_frames > 0 else 0
+    avg_weed = total_weed_area / processed_frames if processed_frames > 0 else 0
+    avg_yield = total_yield / processed_frames if processed_frames > 0 else 0
+    return {
+        'area_coverage': {
+            'good_crop_percentage': float(avg_good),
+            'bad_crop_percentage': float(avg_bad),
+            'weed_percentage': float(avg_weed),
+            'remaining_percentage': float(100 - avg_good - avg_bad - avg_weed)
+        },
+        'yield_estimation': {
+            'average_yield_per_acre': float(avg_yield),
+            'yield_percentage': float((avg_yield / 150.0) * 100) if avg_yield > 0 else 0,
+            'base_yield_per_acre': 150.0
+        },
+        'detection_summary': {
+            'total_weeds_detected': total_weeds,
+            'total_pests_detected': total_pests,
+            'total_diseases_detected': total_diseases,
+            'avg_weeds_per_frame': total_weeds / processed_frames if processed_frames > 0 else 0,
+            'avg_pests_per_frame': total_pests / processed_frames if processed_frames > 0 else 0,
+            'avg_diseases_per_frame': total_diseases / processed_frames if processed_frames > 0 else 0
+        }
+    }
+
+
+def legacy_class_counts(frames):
+    """Detection counts of the AI service, as it aggregated them per frame"""
+    class_counts = {}
+    for frame_data in frames:
+        for class_name, kind in (('weed', 'weeds'),
+                                 ('pest_presence', 'pests'),
+                                 ('diseased_crop', 'diseases')):
+            count = len(frame_data['detections'][kind])
+            if count:
+                class_counts[class_name] = class_counts.get(class_name, 0) + count
+    return class_counts
+
+
+def legacy_health_report(detections, image_path=None):
+    """generate_farm_health_report of the farm health API, computed from the full detection lists"""
+    weed_count = len(detections.get('weeds', []))
+    pest_count = len(detections.get('pests', []))
+    disease_count = len(detections.get('diseases', []))
+
+    weed_severity = 'none'
+    if weed_count > 15:
+        weed_severity = 'high'
+    elif weed_count > 8:
+        weed_severity = 'medium'
+    elif weed_count > 0:
+        weed_severity = 'low'
+
+    pest_severity = 'none'
+    if pest_count > 10:
+        pest_severity = 'high'
+    elif pest_count > 5:
+        pest_severity = 'medium'
+    elif pest_count > 0:
+        pest_severity = 'low'
+
+    disease_severity = 'none'
+    disease_labels = []
+    if disease_count > 0:
+        for disease in detections.get('diseases', []):
+            disease_labels.append({
+                'name': disease.get('label', 'Unknown'),
+                'confidence': disease.get('confidence', 0.0)
+            })
+        max_disease_conf = max([d.get('confidence', 0.0) for d in disease_labels]) if disease_labels else 0.0
+        if max_disease_conf > 0.7:
+            disease_severity = 'high'
+        elif max_disease_conf > 0.5:
+            disease_severity = 'medium'
+        else:
+            disease_severity = 'low'
+
+    health_score = 100
+    for severity in (weed_severity, pest_severity, disease_severity):
+        if severity == 'high':
+            health_score -= 30
+        elif severity == 'medium':
+            health_score -= 15
+        elif severity == 'low':
+            health_score -= 5
+    health_score = max(0, health_score)
+
+    recommendations = []
+    if weed_severity == 'high':
+        recommendations.append({
+            'priority': 'high',
+            'category': 'weed_control',
+            'action': 'Immediate weed control required. Consider mechanical or chemical weed management.',
+            'urgency': 'urgent'
+        })
+    elif weed_severity == 'medium':
+        recommendations.append({
+            'priority': 'medium',
+            'category': 'weed_control',
+            'action': 'Moderate weed growth detected. Plan weed control measures.',
+            'urgency': 'moderate'
+        })
+
+    if pest_severity == 'high':
+        recommendations.append({
+            'priority': 'high',
+            'category': 'pest_control',
+            'action': 'Severe pest infestation detected. Immediate pest control required.',
+            'urgency': 'urgent'
+        })
+    elif pest_severity == 'medium':
+        recommendations.append({
+            'priority': 'medium',
+            'category': 'pest_control',
+            'action': 'Moderate pest activity detected. Monitor closely and consider treatment.',
+            'urgency': 'moderate'
+        })
+
+    if disease_severity == 'high':
+        recommendations.append({
+            'priority': 'high',
+            'category': 'disease_management',
+            'action': 'Disease detected with high confidence. Apply appropriate treatment immediately.',
+            'urgency': 'urgent'
+        })
+    elif disease_severity == 'medium':
+        recommendations.append({
+            'priority': 'medium',
+            'category': 'disease_management',
+            'action': 'Possible disease detected. Monitor and consider preventive treatment.',
+            'urgency': 'moderate'
+        })
+
+    if health_score > 80:
+        recommendations.append({
+            'priority': 'low',
+            'category': 'maintenance',
+            'action': 'Field condition is good. Maintain current practices.',
+            'urgency': 'low'
+        })
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'image_path': image_path,
+        'overall_health_score': health_score,
+        'health_status': 'good' if health_score > 70 else 'fair' if health_score > 50 else 'poor',
+        'detections': {
+            'weeds': {'count': weed_count, 'severity': weed_severity,
+                      'detections': detections.get('weeds', [])},
+            'pests': {'count': pest_count, 'severity': pest_severity,
+                      'detections': detections.get('pests', [])},
+            'diseases': {'count': disease_count, 'severity': disease_severity,
+                         'detections': disease_labels},
+            'water_stress': {'count': len(detections.get('water_stress', [])), 'severity': 'none',
+                             'detections': detections.get('water_stress', [])}
+        },
+        'recommendations': recommendations,
+        'summary': {
+            'total_issues': weed_count + pest_count + disease_count,
+            'critical_issues': len([r for r in recommendations if r['priority'] == 'high']),
+            'moderate_issues': len([r for r in recommendations if r['priority'] == 'medium']),
+            'action_required': len([r for r in recommendations if r['urgency'] == 'urgent'])
+        }
+    }
+
+
+def combined_detections(frames):
+    """Detections of all frames as one dict of detection lists (what the API combined)"""
+    return {kind: [detection for frame_data in frames for detection in frame_data['detections'][kind]]
+            for kind in ('weeds', 'pests', 'diseases', 'water_stress')}
+
+
+def accumulate(frames, keep_detections=False):
+    farm_report = FarmReportAccumulator(keep_detections=keep_detections)
+    for frame_data in frames:
+        farm_report.add(frame_data['detections'], frame_data['area_stats'], frame_data['yield_stats'])
+    return farm_report
+
+
+def health_report(farm_report, image_path=None):
+    report = farm_report.health_report(image_path)
+    report.pop('timestamp')
+    return report
+
+
+@pytest.mark.parametrize('count', [0, 1, 7, 60])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_video_report_matches_legacy_totals(make_frames, count, seed):
+    frames = make_frames(count, seed=seed)
+    farm_report = accumulate(frames)
+
+    assert farm_report.video_report() == legacy_video_report(frames)
+    assert farm_report.class_counts() == legacy_class_counts(frames)
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 4, 12])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_health_report_matches_legacy_report(make_frames, count, seed):
+    frames = make_frames(count, seed=seed)
+    detections = combined_detections(frames)
+    expected = legacy_health_report(detections, 'field.jpg')
+    expected.pop('timestamp')
+
+    # Columnar and dict detections give the same report
+    assert health_report(accumulate(frames, keep_detections=True), 'field.jpg') == expected
+    farm_report = FarmReportAccumulator(keep_detections=True)
+    farm_report.add(detections)
+    assert health_report(farm_report, 'field.jpg') == expected
+
+
+def test_health_report_without_kept_detections_has_the_same_totals(make_frames):
+    frames = make_frames(12, seed=4)
+    report = health_report(accumulate(frames))
+    expected = health_report(accumulate(frames, keep_detections=True))
+
+    for kind, section in expected['detections'].items():
+        assert report['detections'][kind]['count'] == section['count']
+        assert report['detections'][kind]['severity'] == section['severity']
+        assert report['detections'][kind]['detections'] == []
+    assert report['recommendations'] == expected['recommendations']
+    assert report['summary'] == expected['summary']
+
+
+@pytest.mark.parametrize('splits', [[0], [1], [13, 14], [5, 20, 21]])
+def test_merged_parts_match_one_pass(make_frames, splits):
+    frames = make_frames(30, seed=5)
+    bounds = [0] + splits + [len(frames)]
+    parts = [accumulate(frames[start:end], keep_detections=True) for start, end in zip(bounds, bounds[1:])]
+
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    full = accumulate(frames, keep_detections=True)
+
+    assert merged.video_report() == full.video_report()
+    assert merged.service_analysis() == full.service_analysis()
+    assert health_report(merged) == health_report(full)
+
+
+def test_snapshot_round_trip_continues_like_the_original(make_frames):
+    frames = make_frames(30, seed=6)
+    farm_report = accumulate(frames[:18], keep_detections=True)
+    restored = FarmReportAccumulator.from_snapshot(farm_report.snapshot())
+
+    for frame_data in frames[18:]:
+        for accumulator in (farm_report, restored):
+            accumulator.add(frame_data['detections'], frame_data['area_stats'], frame_data['yield_stats'])
+    assert restored.snapshot() == farm_report.snapshot()
+    assert health_report(restored) == health_report(farm_report)
+    assert restored.video_report() == legacy_video_report(frames)
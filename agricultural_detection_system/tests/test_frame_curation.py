@@ -0,0 +1,86 @@
+"""Online top-N frame curation against the full sort it replaces"""
+
+import json
+
+import numpy as np
+import pytest
+
+from detection_set import FrameDetections, LabelVocabulary
+from frame_curation import CURATION_IMAGE_FIELDS, CURATION_KEYS, FrameCurator
+
+
+def full_sort(frames, top_n):
+    """Curated frames as get_curated_images selected them from all frames"""
+    return {name: sorted(frames, key=key_fn, reverse=True)[:top_n]
+            for name, key_fn in CURATION_KEYS.items()}
+
+
+def frame_numbers(curated):
+    return {name: [frame_data['frame_number'] for frame_data in frames]
+            for name, frames in curated.items()}
+
+
+@pytest.mark.parametrize('top_n', [0, 1, 5, 80])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_curator_matches_full_sort(make_frames, top_n, seed):
+    frames = make_frames(60, seed=seed)
+    curator = FrameCurator(top_n)
+    for frame_data in frames:
+        curator.offer(frame_data, dict)
+
+    # Same frames in the same order, ties included (the sort is stable)
+    assert frame_numbers(curator.curated()) == frame_numbers(full_sort(frames, top_n))
+
+
+def test_images_are_built_only_for_kept_frames(make_frames):
+    frames = make_frames(40)
+    curator = FrameCurator(top_n=3)
+    built = []
+
+    def images_of(frame_data):
+        def images():
+            built.append(frame_data['frame_number'])
+            return {'frame': np.full((2, 2, 3), frame_data['frame_number'], dtype=np.uint8)}
+        return images
+
+    kept = [frame_data['frame_number'] for frame_data in frames
+            if curator.offer(frame_data, images_of(frame_data))]
+
+    assert built == kept
+    for curated_frames in curator.curated().values():
+        for frame_data in curated_frames:
+            assert frame_data['frame'][0, 0, 0] == frame_data['frame_number']
+
+
+def test_restored_curator_drops_images_and_keeps_order(make_frames):
+    frames = make_frames(40, seed=3)
+    curator = FrameCurator(top_n=5)
+    for frame_data in frames[:25]:
+        curator.offer(frame_data, lambda: {'frame': np.zeros((2, 2, 3), dtype=np.uint8),
+                                           'annotated_frame': np.zeros((2, 2, 3), dtype=np.uint8)})
+
+    encoded = []
+
+    def encode(frame_data):
+        encoded.append(frame_data['frame_number'])
+        return {**frame_data, 'detections': frame_data['detections'].state()}
+
+    def decode(frame_state):
+        return {**frame_state, 'detections': FrameDetections.from_state(frame_state['detections'], vocabulary)}
+
+    state = json.loads(json.dumps(curator.state(encode)))
+    # Frames kept in several categories are saved once
+    assert len(encoded) == len(set(encoded)) == len(state['frames'])
+
+    vocabulary = LabelVocabulary()
+    restored = FrameCurator.from_state(state, decode)
+    for curated_frames in restored.curated().values():
+        for frame_data in curated_frames:
+            assert not set(CURATION_IMAGE_FIELDS) & set(frame_data)
+
+    # A restored curator continues exactly like the original
+    for frame_data in frames[25:]:
+        curator.offer(frame_data, dict)
+        restored.offer(frame_data, dict)
+    assert frame_numbers(restored.curated()) == frame_numbers(curator.curated())
+    assert frame_numbers(restored.curated()) == frame_numbers(full_sort(frames, 5))
@@ -0,0 +1,173 @@
+"""Adaptive (motion-aware) sampling, and grab/seek sampling against a full read() pass"""
+
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_sampler import AdaptiveFrameSampler, FrameGrabber, MOTION_METHODS
+
+
+def selected_frames(sampler, images):
+    return [frame_number for frame_number, image in enumerate(images)
+            if sampler.should_process(frame_number, image)]
+
+
+def gaps(frame_numbers):
+    return [b - a for a, b in zip(frame_numbers, frame_numbers[1:])]
+
+
+@pytest.mark.parametrize('method', list(MOTION_METHODS))
+@pytest.mark.parametrize('max_interval', [1, 5, 15])
+def test_static_footage_is_analyzed_every_max_interval(make_scene, method, max_interval):
+    sampler = AdaptiveFrameSampler(min_interval=1, max_interval=max_interval, method=method)
+    selected = selected_frames(sampler, make_scene([0] * 60))
+
+    assert selected == list(range(0, 60, max_interval))
+    stats = sampler.stats()
+    assert stats['frames_analyzed'] == len(selected)
+    assert stats['forced_max_interval'] == len(selected) - 1
+    assert stats['skipped_static'] == 60 - len(selected)
+    assert stats['mean_motion'] == 0.0
+
+
+@pytest.mark.parametrize('method', list(MOTION_METHODS))
+@pytest.mark.parametrize('min_interval', [1, 2, 4])
+def test_motion_is_sampled_densely(make_scene, method, min_interval):
+    sampler = AdaptiveFrameSampler(min_interval=min_interval, max_interval=15, method=method)
+    selected = selected_frames(sampler, make_scene([6] * 60))
+
+    # As often as min_interval allows
+    assert selected == list(range(0, 60, min_interval))
+    assert sampler.stats()['skipped_static'] == 0
+    assert sampler.stats()['skipped_min_interval'] == 60 - len(selected)
+
+
+@pytest.mark.parametrize('method', list(MOTION_METHODS))
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_intervals_stay_within_bounds(make_scene, method, seed):
+    # Pans of random speed separated by hovering
+    rng = np.random.default_rng(seed)
+    speeds = [float(rng.choice([0, 0, 0, 1, 3, 8])) for _ in range(120)]
+    sampler = AdaptiveFrameSampler(min_interval=2, max_interval=9, method=method)
+    selected = selected_frames(sampler, make_scene(speeds, seed=seed))
+
+    assert selected[0] == 0
+    assert all(2 <= gap <= 9 for gap in gaps(selected))
+    assert 120 - selected[-1] <= 9
+    assert sampler.stats()['frames_seen'] == 120
+
+
+@pytest.mark.parametrize('method', list(MOTION_METHODS))
+def test_motion_burst_in_static_footage(make_scene, method):
+    speeds = [0] * 40 + [6] * 10 + [0] * 40
+    sampler = AdaptiveFrameSampler(min_interval=1, max_interval=30, method=method)
+    selected = selected_frames(sampler, make_scene(speeds))
+
+    # The camera moves from frame 40 to 49 and then hovers again
+    assert [frame for frame in selected if 40 <= frame < 50] == list(range(40, 50))
+    assert [frame for frame in selected if not 40 <= frame < 50] == [0, 30, 79]
+
+
+@pytest.mark.parametrize('method', list(MOTION_METHODS))
+def test_restored_sampler_continues_like_the_original(make_scene, method):
+    images = make_scene([0] * 20 + [4] * 15 + [0] * 25)
+    sampler = AdaptiveFrameSampler(min_interval=2, max_interval=10, method=method)
+    expected = selected_frames(sampler, images)
+
+    sampler = AdaptiveFrameSampler(min_interval=2, max_interval=10, method=method)
+    first = [frame_number for frame_number in range(27) if sampler.should_process(frame_number, images[frame_number])]
+    restored = AdaptiveFrameSampler.from_state(json.loads(json.dumps(sampler.state())))
+    rest = [frame_number for frame_number in range(27, 60)
+            if restored.should_process(frame_number, images[frame_number])]
+
+    assert first + rest == expected
+    full = AdaptiveFrameSampler(min_interval=2, max_interval=10, method=method)
+    selected_frames(full, images)
+    assert restored.stats() == full.stats()
+
+
+def test_invalid_sampler_settings_raise():
+    with pytest.raises(ValueError):
+        AdaptiveFrameSampler(method='histogram')
+    with pytest.raises(ValueError):
+        AdaptiveFrameSampler(min_interval=0)
+    with pytest.raises(ValueError):
+        AdaptiveFrameSampler(min_interval=5, max_interval=4)
+
+
+SAMPLINGS = [
+    {'frame_skip': 1},
+    {'frame_skip': 4},
+    {'frame_skip': 7},
+    {'interval_seconds': 0.35},
+    {'interval_seconds': 1.3}
+]
+
+
+def read_all(video_path):
+    """Every frame of a video, decoded with read()"""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def grab(video_path, **kwargs):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        grabber = FrameGrabber(cap, **kwargs)
+        frames = list(grabber)
+        return frames, grabber, int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    finally:
+        cap.release()
+
+
+@pytest.mark.parametrize('sampling', SAMPLINGS)
+@pytest.mark.parametrize('seek_threshold', [None, 1, 3])
+def test_grabbed_frames_equal_a_full_read_pass(sample_video, sampling, seek_threshold):
+    video_path = sample_video(47, 10.0)
+    all_frames = read_all(video_path)
+
+    # The frames a full pass would pick with selects()
+    cap = cv2.VideoCapture(video_path)
+    selector = FrameGrabber(cap, **sampling)
+    expected = [frame_number for frame_number in range(len(all_frames)) if selector.selects(frame_number)]
+    cap.release()
+
+    frames, grabber, _ = grab(video_path, seek_threshold=seek_threshold, **sampling)
+    assert [frame_number for frame_number, _ in frames] == expected
+    for frame_number, frame in frames:
+        assert np.array_equal(frame, all_frames[frame_number])
+
+    stats = grabber.stats()
+    assert stats['frames_seen'] == len(all_frames)
+    assert stats['frames_analyzed'] == len(expected)
+    if seek_threshold is None:
+        assert stats['seeks'] == 0
+
+
+@pytest.mark.parametrize('sampling', SAMPLINGS)
+@pytest.mark.parametrize('start_frame, end_frame', [(0, 47), (0, 30), (5, 23), (13, 14), (40, None)])
+def test_range_is_not_read_past_its_last_sample(sample_video, sampling, start_frame, end_frame):
+    video_path = sample_video(47, 10.0)
+    full, _, _ = grab(video_path, **sampling)
+    expected = [frame_number for frame_number, _ in full
+                if frame_number >= start_frame and (end_frame is None or frame_number < end_frame)]
+
+    frames, grabber, position = grab(video_path, start_frame=start_frame, end_frame=end_frame, **sampling)
+    assert [frame_number for frame_number, _ in frames] == expected
+
+    # Only the frames up to the last sample were decoded or grabbed; the
+    # rest of the range counts as seen without being read
+    read_until = expected[-1] + 1 if expected else start_frame
+    if end_frame is not None:
+        assert position == read_until
+    assert grabber.frames_grabbed == read_until - start_frame - len(expected)
+    assert grabber.stats()['frames_seen'] == (end_frame or 47) - start_frame
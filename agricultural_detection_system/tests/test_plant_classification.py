@@ -0,0 +1,74 @@
+"""Classification of tracked plants: reuse statistics do not depend on the batch size"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# The detector module needs the model runtimes (not the model weights)
+pytest.importorskip('torch')
+pytest.importorskip('ultralytics')
+
+from detection_set import DetectionSet, LabelVocabulary  # noqa: E402
+from plant_tracker import PlantTracker  # noqa: E402
+from unified_agricultural_detector import UnifiedAgriculturalDetector  # noqa: E402
+
+from conftest import DISEASE_LABELS  # noqa: E402
+
+
+class StubClassifier:
+    """Labels a crop by its mean intensity, like a deterministic model would"""
+
+    def __init__(self):
+        self.crops = 0
+
+    def predict_crops(self, crops):
+        self.crops += len(crops)
+        return [(DISEASE_LABELS[int(crop.mean()) % len(DISEASE_LABELS)], 0.9) for crop in crops]
+
+
+def stub_detector():
+    """The attributes _classify_plants uses, without loading any model"""
+    return SimpleNamespace(disease_classifier=StubClassifier(), resolution_controller=None,
+                           disease_labels=LabelVocabulary(DISEASE_LABELS))
+
+
+def detected_plants(frame_number):
+    """(results, plants) of one frame as _detect_objects returns them"""
+    results = {'weeds': DetectionSet.empty('weeds'), 'pests': DetectionSet.empty('pests'),
+               'timestamp': f"frame-{frame_number}", 'resolution': None}
+    plants = []
+    for plant in range(5):
+        if (frame_number + plant) % 7 == 0:
+            continue
+        # Plants grow now and then, so some are reclassified for their shape
+        size = 30 + 4 * ((frame_number + 3 * plant) // 12)
+        x = 10 + 70 * plant + 2 * frame_number
+        plants.append((plant, [x, 20, x + size, 20 + size],
+                       np.full((8, 8, 3), 40 * plant + frame_number // 10, dtype=np.uint8), 0.8))
+    return results, plants
+
+
+def classify_video(num_frames, batch_size):
+    detector = stub_detector()
+    tracker = PlantTracker(reclassify_every=6)
+    frames = []
+    for start in range(0, num_frames, batch_size):
+        frame_numbers = range(start, min(start + batch_size, num_frames))
+        images = [np.zeros((120, 480, 3), dtype=np.uint8) for _ in frame_numbers]
+        detected = [detected_plants(frame_number) for frame_number in frame_numbers]
+        for detections in UnifiedAgriculturalDetector._classify_plants(detector, images, detected, tracker):
+            diseases = detections['diseases']
+            frames.append(list(zip(diseases.plant_ids.tolist(), diseases.labels)))
+    return frames, tracker.stats(), detector.disease_classifier.crops
+
+
+@pytest.mark.parametrize('batch_size', [2, 3, 8, 60])
+def test_tracking_stats_do_not_depend_on_batch_size(batch_size):
+    expected_frames, expected_stats, expected_crops = classify_video(60, batch_size=1)
+    assert expected_stats['reused_classifications'] > 0
+
+    frames, stats, crops = classify_video(60, batch_size=batch_size)
+    assert frames == expected_frames
+    assert stats == expected_stats
+    assert crops == expected_crops == stats['classifications']
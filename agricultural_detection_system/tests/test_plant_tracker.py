@@ -0,0 +1,193 @@
+"""Plant tracking: Kalman filter, track matching and the classification lifecycle"""
+
+import json
+
+import numpy as np
+import pytest
+
+from plant_tracker import KalmanBoxFilter, PlantTracker
+
+
+def moving_boxes(frame_number, count=4, speed=3.0):
+    """Well separated plants drifting to the right"""
+    return np.array([[20 + 60 * plant + speed * frame_number, 30,
+                      50 + 60 * plant + speed * frame_number, 70] for plant in range(count)],
+                    dtype=np.float64)
+
+
+def test_kalman_round_trip_and_prediction():
+    kalman = KalmanBoxFilter()
+    box = np.array([10.0, 20.0, 50.0, 80.0])
+    assert np.allclose(kalman.to_box(kalman.to_measurement(box)), box)
+
+    mean, covariance = kalman.initiate(box)
+    assert np.allclose(kalman.to_box(mean), box)
+    # Without velocity the prediction stays put, but gets less certain
+    predicted, predicted_covariance = kalman.predict(mean, covariance)
+    assert np.allclose(kalman.to_box(predicted), box)
+    assert np.all(np.diag(predicted_covariance) > np.diag(covariance))
+
+
+def test_kalman_learns_constant_velocity():
+    kalman = KalmanBoxFilter()
+    mean, covariance = kalman.initiate(np.array([0.0, 0.0, 20.0, 20.0]))
+    for step in range(1, 30):
+        mean, covariance = kalman.predict(mean, covariance)
+        mean, covariance = kalman.update(mean, covariance, np.array([4.0 * step, 0.0, 20 + 4.0 * step, 20.0]))
+
+    # Center moves 4 px per frame; the next prediction is one step ahead
+    assert mean[4] == pytest.approx(4.0, abs=0.1)
+    predicted, _ = kalman.predict(mean, covariance)
+    assert np.allclose(kalman.to_box(predicted), [120.0, 0.0, 140.0, 20.0], atol=0.5)
+
+
+def test_moving_plants_keep_their_ids():
+    tracker = PlantTracker()
+    first = tracker.update(moving_boxes(0), np.full(4, 0.9))
+    assert first.tolist() == [0, 1, 2, 3]
+
+    for frame_number in range(1, 20):
+        # Detection order changes from frame to frame
+        order = np.random.default_rng(frame_number).permutation(4)
+        ids = tracker.update(moving_boxes(frame_number)[order], np.full(4, 0.9))
+        assert ids.tolist() == first[order].tolist()
+    assert tracker.tracks_created == 4
+
+
+def test_new_plants_get_new_ids_and_ids_are_not_reused():
+    tracker = PlantTracker(max_age=2)
+    tracker.update(moving_boxes(0, count=2), np.full(2, 0.9))
+
+    # The plants leave the frame and are forgotten after max_age frames
+    for _ in range(3):
+        assert tracker.update(np.zeros((0, 4)), np.zeros(0)).tolist() == []
+    assert tracker.tracks == {}
+
+    ids = tracker.update(moving_boxes(0, count=3), np.full(3, 0.9))
+    assert ids.tolist() == [2, 3, 4]
+    assert tracker.next_track_id == 5
+
+
+def test_missed_plant_is_matched_again_within_max_age():
+    tracker = PlantTracker(max_age=5)
+    ids = tracker.update(moving_boxes(0), np.full(4, 0.9))
+    for frame_number in range(1, 4):
+        # Plant 1 is missed for three frames
+        boxes = np.delete(moving_boxes(frame_number), 1, axis=0)
+        tracker.update(boxes, np.full(3, 0.9))
+    assert tracker.update(moving_boxes(4), np.full(4, 0.9)).tolist() == ids.tolist()
+
+
+def test_low_confidence_detections_only_extend_tracks():
+    tracker = PlantTracker(high_confidence=0.5)
+    ids = tracker.update(moving_boxes(0, count=2), np.full(2, 0.9))
+
+    # A weak detection continues its track, but does not start a new one...
+    boxes = np.vstack([moving_boxes(1, count=2), [[400, 300, 430, 340]]])
+    new_ids = tracker.update(boxes, np.array([0.2, 0.9, 0.2]))
+    assert new_ids[:2].tolist() == ids.tolist()
+    # ...unless nothing matches it (then it is a new plant like any other)
+    assert new_ids[2] == 2
+
+
+def test_checkpointed_tracker_continues_like_the_original():
+    tracker = PlantTracker()
+    for frame_number in range(10):
+        tracker.update(moving_boxes(frame_number), np.full(4, 0.9))
+
+    tracker.start_classification(0)
+    tracker.store_classification(0, 'Tomato___healthy', 0.8)
+    tracker.start_classification(1)
+
+    restored = PlantTracker.from_state(json.loads(json.dumps(tracker.state())))
+    assert restored.classification(0) == tracker.classification(0)
+    assert restored.classification(1) is None and not restored.needs_classification(1)
+    for frame_number in range(10, 20):
+        boxes = moving_boxes(frame_number, count=5)
+        assert restored.update(boxes, np.full(5, 0.9)).tolist() == tracker.update(boxes, np.full(5, 0.9)).tolist()
+    assert restored.stats() == tracker.stats()
+
+
+def test_classification_lifecycle():
+    tracker = PlantTracker(reclassify_every=5)
+    track_id = int(tracker.update(moving_boxes(0, count=1), [0.9])[0])
+    assert tracker.needs_classification(track_id)
+
+    # Pending: not classified again, but there is no result to reuse yet
+    tracker.start_classification(track_id)
+    tracker.update(moving_boxes(1, count=1), [0.9])
+    assert not tracker.needs_classification(track_id)
+    assert tracker.classification(track_id) is None
+    assert tracker.reused == 0
+
+    tracker.store_classification(track_id, 'Tomato___healthy', 0.8)
+    assert tracker.classification(track_id) == ('Tomato___healthy', 0.8)
+    assert tracker.stats()['reused_classifications'] == 1
+
+    # Reclassified every reclassify_every frames
+    for frame_number in range(2, 5):
+        tracker.update(moving_boxes(frame_number, count=1), [0.9])
+        assert not tracker.needs_classification(track_id)
+    tracker.update(moving_boxes(5, count=1), [0.9])
+    assert tracker.needs_classification(track_id)
+
+
+def test_changed_box_shape_is_reclassified():
+    tracker = PlantTracker(reclassify_every=0)
+    track_id = int(tracker.update([[0, 0, 40, 40]], [0.9])[0])
+    tracker.start_classification(track_id)
+    tracker.store_classification(track_id, 'Corn___healthy', 0.9)
+
+    for frame_number in range(1, 30):
+        tracker.update([[0, 0, 40, 40]], [0.9])
+        assert not tracker.needs_classification(track_id)
+    # The plant grows (or the drone descends) until the box shape differs too much
+    for size in range(42, 80, 2):
+        tracker.update([[0, 0, size, size]], [0.9])
+        if tracker.needs_classification(track_id):
+            break
+    assert size < 80
+    assert tracker.needs_classification(track_id)
+
+
+def test_cancelled_classification_is_retried():
+    tracker = PlantTracker()
+    track_id = int(tracker.update(moving_boxes(0, count=1), [0.9])[0])
+    tracker.start_classification(track_id)
+    tracker.cancel_classification(track_id)
+    assert tracker.needs_classification(track_id)
+    assert tracker.stats()['classifications'] == 0
+
+    # A completed classification is not undone by a late cancel
+    tracker.start_classification(track_id)
+    tracker.store_classification(track_id, 'Corn___Common_rust', 0.7)
+    tracker.cancel_classification(track_id)
+    assert not tracker.needs_classification(track_id)
+
+
+def test_results_of_forgotten_tracks_are_ignored():
+    tracker = PlantTracker(max_age=1)
+    track_id = int(tracker.update(moving_boxes(0, count=1), [0.9])[0])
+    tracker.start_classification(track_id)
+    for _ in range(2):
+        tracker.update(np.zeros((0, 4)), np.zeros(0))
+    assert track_id not in tracker.tracks
+
+    tracker.store_classification(track_id, 'Tomato___Late_blight', 0.9)
+    tracker.cancel_classification(track_id)
+    tracker.count_reuse(track_id)
+    assert tracker.stats() == {'active_tracks': 0, 'tracks_created': 1, 'classifications': 0,
+                               'reused_classifications': 0, 'reuse_rate': 0.0}
+
+
+def test_reuse_within_a_batch_is_counted():
+    tracker = PlantTracker()
+    track_id = int(tracker.update(moving_boxes(0, count=1), [0.9])[0])
+    tracker.start_classification(track_id)
+    tracker.update(moving_boxes(1, count=1), [0.9])
+    assert tracker.classification(track_id) is None
+
+    tracker.store_classification(track_id, 'Tomato___healthy', 0.8)
+    tracker.count_reuse(track_id)
+    assert tracker.stats()['reused_classifications'] == 1
+    assert tracker.stats()['reuse_rate'] == 0.5
@@ -0,0 +1,91 @@
+"""Latency-budgeted input size: steps down when over budget, back up with headroom"""
+
+import pytest
+
+from resolution_controller import ResolutionController
+
+
+SIZES = (320, 416, 512, 640)
+
+
+def latency_ms(imgsz, ms_at_640):
+    """Synthetic model latency, proportional to the pixel count"""
+    return ms_at_640 * (imgsz / 640) ** 2
+
+
+def run(controller, ms_at_640, frames, budget_ms=40.0, model='weed'):
+    """Choose a size and record its latency for a number of frames; returns the chosen sizes"""
+    sizes = []
+    for _ in range(frames):
+        imgsz = controller.choose(model, budget_ms)
+        controller.record(model, imgsz, latency_ms(imgsz, ms_at_640))
+        sizes.append(imgsz)
+    return sizes
+
+
+def test_starts_at_the_largest_size():
+    controller = ResolutionController(40.0, SIZES)
+    assert controller.choose('weed', 40.0) == 640
+
+
+def test_steps_down_when_over_budget_and_back_up_with_headroom():
+    controller = ResolutionController(40.0, SIZES, smoothing=0.5)
+
+    # 640 fits the budget
+    assert set(run(controller, 30.0, 10)) == {640}
+
+    # The device gets slower: 640 takes 80 ms, only 416 (33.8 ms) fits 40 ms
+    slow = run(controller, 80.0, 30)
+    assert slow[-1] == 416
+    assert all(later <= earlier for earlier, later in zip(slow, slow[1:]))
+    assert latency_ms(416, 80.0) <= 40.0 < latency_ms(512, 80.0)
+
+    # Faster again: the size only goes up once the larger size fits within headroom * budget
+    fast = run(controller, 20.0, 30)
+    assert fast[-1] == 640
+    assert all(later >= earlier for earlier, later in zip(fast, fast[1:]))
+
+
+@pytest.mark.parametrize('headroom, expected', [(0.85, 320), (1.0, 416)])
+def test_headroom_keeps_the_size_from_flipping(headroom, expected):
+    controller = ResolutionController(40.0, SIZES, smoothing=1.0, headroom=headroom)
+    run(controller, 100.0, 5)
+    assert controller.choose('weed', 40.0) == 320
+
+    # 416 would take 37.5 ms: within the budget, but not within 85% of it
+    sizes = run(controller, 37.5 * (640 / 416) ** 2, 10)
+    assert sizes[-1] == expected
+
+
+def test_smallest_size_when_nothing_fits():
+    controller = ResolutionController(5.0, SIZES)
+    assert run(controller, 200.0, 10)[-1] == 320
+
+
+def test_models_are_controlled_separately():
+    controller = ResolutionController(40.0, SIZES)
+    run(controller, 80.0, 20, model='weed')
+    run(controller, 20.0, 20, model='pest')
+    assert controller.choose('weed', 40.0) == 416
+    assert controller.choose('pest', 40.0) == 640
+    stats = controller.stats()
+    assert stats['models']['weed']['imgsz'] == 416
+    assert stats['models']['pest']['imgsz'] == 640
+
+
+def test_budget_subtracts_overhead_and_splits_sequential_passes():
+    controller = ResolutionController(60.0, SIZES)
+    assert controller.budget_ms(3, concurrent=False) == 20.0
+    assert controller.budget_ms(3, concurrent=True) == 60.0
+
+    controller.record_overhead(15.0)
+    assert controller.budget_ms(3, concurrent=False) == 15.0
+    assert controller.budget_ms(3, concurrent=False, include_overhead=False) == 20.0
+    controller.record_overhead(200.0)
+    assert controller.budget_ms(1, concurrent=True) == 0.0
+
+
+@pytest.mark.parametrize('target, sizes', [(0, SIZES), (-5, SIZES), (40, (320, 400)), (40, ())])
+def test_invalid_settings_raise(target, sizes):
+    with pytest.raises(ValueError):
+        ResolutionController(target, sizes)
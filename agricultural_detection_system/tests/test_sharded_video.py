@@ -0,0 +1,73 @@
+"""Video shard planning: sampling the ranges separately selects the frames of one full pass"""
+
+import cv2
+import pytest
+
+from frame_sampler import FrameGrabber
+from sharded_video import merge_sampling_stats, plan_shards
+
+NUM_FRAMES = 47
+FPS = 10.0
+
+SAMPLINGS = [
+    {'frame_skip': 1},
+    {'frame_skip': 3},
+    {'frame_skip': 7},
+    {'interval_seconds': 0.35},
+    {'interval_seconds': 1.0}
+]
+
+
+def grab(video_path, start_frame=0, end_frame=None, **sampling):
+    """(frame_number, gray level) of every analyzed frame of a range, and the grabber statistics"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        grabber = FrameGrabber(cap, start_frame=start_frame, end_frame=end_frame, **sampling)
+        frames = [(frame_number, int(round(frame.mean()))) for frame_number, frame in grabber]
+        return frames, grabber.stats()
+    finally:
+        cap.release()
+
+
+def sampling_args(sampling):
+    return sampling.get('frame_skip', 1), sampling.get('interval_seconds')
+
+
+@pytest.mark.parametrize('sampling', SAMPLINGS)
+@pytest.mark.parametrize('seek_threshold', [None, 2])
+@pytest.mark.parametrize('num_shards', [2, 3, 5])
+def test_shards_select_the_frames_of_a_full_pass(sample_video, sampling, seek_threshold, num_shards):
+    video_path = sample_video(NUM_FRAMES, FPS)
+    full_frames, full_stats = grab(video_path, seek_threshold=seek_threshold, **sampling)
+
+    shards = plan_shards(NUM_FRAMES, num_shards, FPS, *sampling_args(sampling))
+    assert shards[0][0] == 0 and shards[-1][1] == NUM_FRAMES
+    assert all(end == next_start for (_, end), (next_start, _) in zip(shards, shards[1:]))
+
+    parts = [grab(video_path, start, end, seek_threshold=seek_threshold, **sampling)
+             for start, end in shards]
+    # Same frame numbers, and the decoded images are the ones of those frames
+    assert [frame for frames, _ in parts for frame in frames] == full_frames
+
+    merged = merge_sampling_stats([stats for _, stats in parts])
+    for key in ('frames_seen', 'frames_analyzed', 'frames_skipped'):
+        assert merged[key] == full_stats[key]
+
+
+@pytest.mark.parametrize('sampling', SAMPLINGS)
+@pytest.mark.parametrize('start_frame', [1, 10, 23])
+def test_shards_after_start_frame(sample_video, sampling, start_frame):
+    video_path = sample_video(NUM_FRAMES, FPS)
+    full_frames, _ = grab(video_path, **sampling)
+
+    shards = plan_shards(NUM_FRAMES, 3, FPS, *sampling_args(sampling), start_frame=start_frame)
+    assert shards[0][0] == start_frame
+
+    shard_frames = [frame for start, end in shards for frame in grab(video_path, start, end, **sampling)[0]]
+    assert shard_frames == [frame for frame in full_frames if frame[0] >= start_frame]
+
+
+def test_more_shards_than_samples():
+    shards = plan_shards(NUM_FRAMES, 10, FPS, interval_seconds=2.0)
+    assert len(shards) == 3
+    assert plan_shards(NUM_FRAMES, 4, FPS, frame_skip=5, start_frame=NUM_FRAMES) == []
@@ -0,0 +1,237 @@
+"""Checkpoints of video jobs: a resumed job gives the output of an uninterrupted one"""
+
+import json
+import os
+import pickle
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+import farm_report
+from frame_sampler import AdaptiveFrameSampler
+from video_checkpoint import (CHECKPOINT_FILE_VERSION, JobCheckpoint, SegmentedVideoWriter, open_video_writer,
+                              video_hash)
+from video_job import VideoAnalysisJob
+
+SETTINGS = {'job': 'test', 'frame_skip': 1, 'sampler': ('diff', 1, 4)}
+
+# Report sections that do not depend on where the outputs went
+REPORT_SECTIONS = ('video_info', 'area_coverage', 'yield_estimation', 'curated_images', 'detection_summary',
+                   'tracking', 'frame_sampling')
+
+
+def write_video(path, images, fps=10.0):
+    height, width = images[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for image in images:
+        writer.write(image)
+    writer.release()
+    return path
+
+
+def read_frames(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def job_outputs(report):
+    """Report sections, curated images and annotated video frames of a finished job"""
+    curated_dir = report['curated_images']['curated_dir']
+    annotated_video = report['output_files']['annotated_video']
+    return (
+        {section: report[section] for section in REPORT_SECTIONS if section != 'curated_images'},
+        {name: cv2.imread(os.path.join(curated_dir, name)) for name in sorted(os.listdir(curated_dir))},
+        read_frames(annotated_video) if annotated_video else None
+    )
+
+
+def assert_same_outputs(resumed, expected):
+    report, curated, video = resumed
+    expected_report, expected_curated, expected_video = expected
+    assert report == expected_report
+    assert list(curated) == list(expected_curated)
+    for name, image in expected_curated.items():
+        assert np.array_equal(curated[name], image)
+    if expected_video is None:
+        assert video is None
+        return
+    # Segments are encoded on their own, so frames only match up to codec
+    # noise; every analyzed frame of job_video has its own brightness level
+    assert len(video) == len(expected_video)
+    assert np.allclose([frame.mean() for frame in video], [frame.mean() for frame in expected_video], atol=1.5)
+
+
+try:
+    from unified_agricultural_detector import UnifiedAgriculturalDetector
+    process_video_file = UnifiedAgriculturalDetector.process_video_file
+except ImportError:
+    # Without the model stack, run the job process_video_file hands the video to
+    def process_video_file(detector, video_path, output_dir, **options):
+        return VideoAnalysisJob(detector, video_path, output_dir, **options).run()
+
+
+JOBS = {
+    'fixed': lambda: {'frame_skip': 2},
+    'interval': lambda: {'sample_interval': 0.3, 'seek_threshold': 2},
+    'sampler': lambda: {'sampler': AdaptiveFrameSampler(min_interval=1, max_interval=4)},
+    'video': lambda: {'frame_skip': 2, 'save_annotated_video': True}
+}
+
+
+@pytest.fixture
+def job_video(tmp_path, make_scene):
+    """Panning, hovering and level changes, so every sampler and the tracker have work"""
+    speeds = [0] * 10 + [3] * 25 + [0] * 20 + [5] * 25
+    images = [np.clip(image.astype(np.int16) + 2 * index - 60, 0, 255).astype(np.uint8)
+              for index, image in enumerate(make_scene(speeds, size=(128, 96)))]
+    return write_video(str(tmp_path / 'flight.mp4'), images)
+
+
+@pytest.mark.parametrize('job', list(JOBS))
+@pytest.mark.parametrize('fail_after', [14, 25])
+def test_interrupted_job_resumes_like_an_uninterrupted_one(tmp_path, job_video, make_detector, job, fail_after):
+    def run(output_dir, detector, **kwargs):
+        options = dict(save_annotated_video=False, queue_size=1, checkpoint_interval=1e-9)
+        options.update(JOBS[job]())
+        options.update(kwargs)
+        return process_video_file(detector, job_video, str(output_dir), **options)
+
+    expected = job_outputs(run(tmp_path / 'full', make_detector(batch_size=2)))
+
+    # The first run crashes in the inference stage and leaves a checkpoint behind
+    output_dir = tmp_path / 'resumed'
+    with pytest.raises(RuntimeError, match='Simulated crash'):
+        run(output_dir, make_detector(batch_size=2, fail_after=fail_after))
+    checkpoint_files = [name for name in os.listdir(output_dir) if name.endswith('.json')]
+    assert len(checkpoint_files) == 1
+    with open(output_dir / checkpoint_files[0]) as f:
+        assert json.load(f)['version'] == CHECKPOINT_FILE_VERSION
+
+    # A restarted job continues from it and produces the same outputs
+    detector = make_detector(batch_size=2)
+    report = run(output_dir, detector)
+    resumed_from = report['checkpoint']['resumed_from_frame']
+    assert 0 < resumed_from and detector.frames_detected[0] >= resumed_from
+    assert_same_outputs(job_outputs(report), expected)
+    assert not os.path.exists(output_dir / checkpoint_files[0])
+
+    # Without resume the job starts from frame 0 again
+    report = run(output_dir, make_detector(batch_size=2), resume=False)
+    assert report['checkpoint']['resumed_from_frame'] is None
+    assert_same_outputs(job_outputs(report), expected)
+
+
+def test_tampered_checkpoint_is_data_not_code(tmp_path):
+    checkpoint = JobCheckpoint(str(tmp_path), 'a' * 64, SETTINGS)
+    with open(checkpoint.path, 'wb') as f:
+        f.write(pickle.dumps({'version': CHECKPOINT_FILE_VERSION}))
+    assert checkpoint.load() is None
+
+    # Settings come back from JSON with tuples as lists and must still match
+    checkpoint.save({'next_frame': 3})
+    assert JobCheckpoint(str(tmp_path), 'a' * 64, SETTINGS).load() == {'next_frame': 3}
+
+
+def test_service_job_resumes_like_an_uninterrupted_one(tmp_path, monkeypatch, job_video, make_detector):
+    pytest.importorskip('flask')
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), 'backend'))
+    import ai_service
+
+    # The service only imports the analysis modules when it starts in production mode
+    import frame_sampler
+    import plant_tracker
+    import sharded_video
+    import video_checkpoint
+    for module in (frame_sampler, plant_tracker, sharded_video, video_checkpoint, farm_report):
+        for name in dir(module):
+            if not name.startswith('_'):
+                monkeypatch.setattr(ai_service, name, getattr(module, name), raising=False)
+    monkeypatch.setattr(ai_service, 'DEMO_MODE', False)
+    monkeypatch.setattr(ai_service, 'VIDEO_CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+
+    def run(detector, output_dir):
+        monkeypatch.setattr(ai_service, 'detector', detector)
+        results = ai_service.process_video(job_video, {
+            'frame_skip': 3, 'save_video': False, 'batch_size': 2, 'checkpoint_interval': 1e-9,
+            'output_dir': str(output_dir)
+        })
+        return {name: value for name, value in results.items()
+                if name not in ('json_path', 'output_video_path', 'checkpoint')}, results['checkpoint']
+
+    expected, _ = run(make_detector(), tmp_path / 'full')
+
+    output_dir = tmp_path / 'resumed'
+    with pytest.raises(RuntimeError, match='Simulated crash'):
+        run(make_detector(fail_after=11), output_dir)
+    # Checkpoints are kept in the service's directory, not in the requested output_dir
+    assert not [name for name in os.listdir(output_dir) if name.startswith('checkpoint')]
+    assert os.listdir(tmp_path / 'checkpoints')
+
+    results, checkpoint = run(make_detector(), output_dir)
+    assert checkpoint['resumed_from_frame'] > 0
+    assert results == expected
+
+
+def test_checkpoint_of_other_job_is_ignored(tmp_path):
+    checkpoint = JobCheckpoint(str(tmp_path), 'a' * 64, SETTINGS)
+    checkpoint.save({'next_frame': 5})
+
+    assert JobCheckpoint(str(tmp_path), 'a' * 64, SETTINGS).load() == {'next_frame': 5}
+    assert JobCheckpoint(str(tmp_path), 'a' * 64, dict(SETTINGS, frame_skip=2)).load() is None
+    # Same file name (first 16 hex digits), other video
+    assert JobCheckpoint(str(tmp_path), 'a' * 16 + 'b' * 48, SETTINGS).load() is None
+
+    with open(checkpoint.path, 'wb') as f:
+        f.write(b'not a checkpoint')
+    assert checkpoint.load() is None
+
+
+def test_video_hash_follows_content(tmp_path, sample_video):
+    video_path = sample_video(20)
+    copy_path = str(tmp_path / 'renamed.mp4')
+    shutil.copy(video_path, copy_path)
+    assert video_hash(copy_path) == video_hash(video_path)
+
+    with open(copy_path, 'ab') as f:
+        f.write(b'\0')
+    assert video_hash(copy_path) != video_hash(video_path)
+
+
+def test_segmented_video_continues_after_restart(tmp_path):
+    output_path = str(tmp_path / 'annotated.mp4')
+    segment_dir = str(tmp_path / 'segments')
+    frames = [np.full((48, 64, 3), level, dtype=np.uint8) for level in range(0, 250, 10)]
+
+    writer = SegmentedVideoWriter(output_path, 10.0, (64, 48), segment_dir)
+    for frame in frames[:10]:
+        writer.write(frame)
+    segments = writer.finish_segment()
+    # Frames written after the last checkpoint are lost in a crash
+    writer.write(frames[10])
+
+    resumed = SegmentedVideoWriter(output_path, 10.0, (64, 48), segment_dir, segments=segments)
+    for frame in frames[10:]:
+        resumed.write(frame)
+    resumed.release()
+
+    # All frames, in order (the codec is lossy, the levels only approximate)
+    levels = [float(frame.mean()) for frame in read_frames(output_path)]
+    assert len(levels) == len(frames)
+    assert np.all(np.diff(levels) > 0)
+    assert np.allclose(levels, [frame.mean() for frame in frames], atol=8)
+    assert not os.listdir(segment_dir)
+
+
+def test_unwritable_video_raises(tmp_path):
+    with pytest.raises(IOError):
+        open_video_writer(str(tmp_path / 'missing' / 'video.mp4'), 10.0, (64, 48))
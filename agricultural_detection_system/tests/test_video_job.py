@@ -0,0 +1,97 @@
+"""Video analysis job: pipeline output, checkpoint states and curated frames"""
+
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from farm_report import FarmReportAccumulator
+from frame_sampler import AdaptiveFrameSampler, FrameGrabber
+from video_job import VideoAnalysisJob
+
+
+def sequential_report(detector, video_path, frame_skip):
+    """Frame-averaged report sections of a plain loop over the sampled frames"""
+    cap = cv2.VideoCapture(video_path)
+    frames = list(FrameGrabber(cap, frame_skip=frame_skip))
+    cap.release()
+
+    tracker = detector.new_tracker()
+    farm_report = FarmReportAccumulator()
+    for frame_number, image in frames:
+        detections = detector._detect(image, tracker)
+        area_stats = detector.calculate_area_coverage(detections, image.shape[:2])
+        farm_report.add(detections, area_stats, detector.estimate_yield(area_stats, detections))
+    return farm_report.video_report(), tracker.stats(), [frame_number for frame_number, _ in frames]
+
+
+@pytest.mark.parametrize('batch_size, queue_size', [(1, 1), (4, 2), (16, 8)])
+def test_job_matches_a_sequential_pass(tmp_path, sample_video, make_detector, batch_size, queue_size):
+    video_path = sample_video(47, 10.0)
+    detector = make_detector(batch_size=batch_size)
+    report = VideoAnalysisJob(detector, video_path, str(tmp_path / 'out'), frame_skip=2,
+                              save_annotated_video=False, queue_size=queue_size).run()
+
+    expected, tracking, frame_numbers = sequential_report(make_detector(), video_path, 2)
+    assert detector.frames_detected == frame_numbers
+    assert report['video_info']['processed_frames'] == len(frame_numbers)
+    for section in ('area_coverage', 'yield_estimation', 'detection_summary'):
+        assert report[section] == expected[section]
+    assert report['tracking'] == tracking
+    assert report['frame_sampling']['frames_analyzed'] == len(frame_numbers)
+
+    with open(report['output_files']['report_json']) as f:
+        assert json.load(f) == json.loads(json.dumps(report))
+    saved = os.listdir(report['curated_images']['curated_dir'])
+    assert len(saved) == 15
+
+
+def test_checkpoint_states_match_the_frame_they_are_attached_to(sample_video, make_detector, tmp_path):
+    job = VideoAnalysisJob(make_detector(batch_size=4), sample_video(30, 10.0), str(tmp_path),
+                           frame_skip=3, save_annotated_video=False)
+    job._open_video()
+    job._setup_detection()
+    job.checkpoint_due.set()
+    results = list(job.infer(job.decode()))
+    job.cap.release()
+
+    # The tracker runs a batch at a time: only the last frame of a batch has its state
+    states = [(index, result[5]) for index, result in enumerate(results) if result[5] is not None]
+    assert [index for index, _ in states] == [3, 7, 9]
+    for index, state in states:
+        assert state['tracker']['frame_index'] == index
+        assert state['tracking']['classifications'] > 0
+        assert state['frame_sampling']['frames_analyzed'] == index + 1
+        assert state['frame_sampling']['frames_seen'] == 3 * index + 1
+    # Snapshots, so they can be saved while the tracker moves on
+    assert json.loads(json.dumps(states[0][1])) == states[0][1]
+
+
+def test_lazily_rendered_curated_frames_match_drawn_ones(tmp_path, sample_video, make_detector):
+    video_path = sample_video(47, 10.0)
+    curated = {}
+    for lazy in (False, True):
+        output_dir = tmp_path / f"lazy_{lazy}"
+        report = VideoAnalysisJob(make_detector(), video_path, str(output_dir), frame_skip=3,
+                                  save_annotated_video=False, lazy_curation=lazy).run()
+        curated_dir = report['curated_images']['curated_dir']
+        curated[lazy] = {name: cv2.imread(os.path.join(curated_dir, name))
+                         for name in sorted(os.listdir(curated_dir))}
+
+    assert list(curated[True]) == list(curated[False])
+    for name, image in curated[False].items():
+        assert np.array_equal(curated[True][name], image)
+
+
+def test_annotated_video_has_every_analyzed_frame(tmp_path, sample_video, make_detector):
+    report = VideoAnalysisJob(make_detector(), sample_video(20, 10.0), str(tmp_path), frame_skip=2).run()
+    cap = cv2.VideoCapture(report['output_files']['annotated_video'])
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 10
+    cap.release()
+
+
+def test_sampler_with_workers_raises(make_detector):
+    with pytest.raises(ValueError):
+        VideoAnalysisJob(make_detector(), 'video.mp4', sampler=AdaptiveFrameSampler(), workers=2)
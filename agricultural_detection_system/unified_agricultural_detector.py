@@ -15,12 +15,136 @@ import os
 import json
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import argparse
+import inspect
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import torch
 from ultralytics import YOLO
 from plant_disease_classifier import PlantDiseaseClassifier
+from detection_set import DetectionSet, FrameDetections, LabelVocabulary
+from box_ops import batched_nms, box_iou, tile_grid
+from plant_tracker import PlantTracker
+from frame_sampler import AdaptiveFrameSampler, MOTION_METHODS
+from crop_cache import CropClassificationCache
+from resolution_controller import DEFAULT_IMGSZ_CHOICES, ResolutionController
+from frame_curation import CURATION_KEYS
+from video_job import VideoAnalysisJob
+
+
+# Runtimes the YOLO models can be executed with
+YOLO_BACKENDS = ('torch', 'onnx', 'openvino')
+
+# Models owned by the detector, in load/report order
+MODEL_NAMES = ('weed', 'pest', 'plant', 'disease')
+
+# YOLO model behind each detection consumer
+CONSUMER_MODELS = {'weeds': 'weed', 'pests': 'pest', 'plants': 'plant'}
+
+# Load states reported by UnifiedAgriculturalDetector.model_status
+# pending -> loading -> loaded -> warming_up -> ready, or failed;
+# 'shared' when the plant detector reuses the pest model, 'skipped' without disease model
+READY_STATES = ('loaded', 'ready', 'shared', 'skipped')
+
+
+def _boxes_to_arrays(boxes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert ultralytics Boxes to numpy arrays with a single device transfer
+    
+    Args:
+        boxes: Boxes object from a YOLO result (may be None)
+        
+    Returns:
+        Tuple of (xyxy float32 (N, 4), confidences float32 (N,), class ids float32 (N,))
+    """
+    if boxes is None or len(boxes) == 0:
+        empty = np.zeros((0,), dtype=np.float32)
+        return np.zeros((0, 4), dtype=np.float32), empty, empty
+    
+    # data columns: x1, y1, x2, y2, [track_id,] conf, cls
+    data = boxes.data.cpu().numpy()
+    return data[:, :4], data[:, -2], data[:, -1]
+
+
+def export_yolo_model(weights_path: str, backend: str) -> str:
+    """
+    Export YOLO weights for a CPU inference backend, reusing a cached export
+    
+    The exported model is stored next to the weights (best.onnx or
+    best_openvino_model/) and re-exported only when the weights are newer.
+    
+    Args:
+        weights_path: Path to the .pt weights
+        backend: 'torch', 'onnx' or 'openvino'
+        
+    Returns:
+        Path to the model to load for that backend
+    """
+    if backend == 'torch':
+        return weights_path
+    
+    weights = Path(weights_path)
+    if backend == 'onnx':
+        artifact = weights.with_suffix('.onnx')
+    else:
+        artifact = weights.parent / f"{weights.stem}_openvino_model"
+    
+    if artifact.exists() and artifact.stat().st_mtime >= weights.stat().st_mtime:
+        return str(artifact)
+    
+    print(f"  🔄 Exporting {weights.name} for {backend} (one-time)...")
+    # Dynamic axes so batched inference and other input sizes work without re-export
+    return str(YOLO(str(weights)).export(format=backend, dynamic=True))
+
+
+def count_yolo_models(weed_model_path: str,
+                      pest_model_path: str,
+                      plant_detector_model: Optional[str] = None) -> int:
+    """Number of distinct YOLO models (the plant detector defaults to the pest model)"""
+    return len({os.path.realpath(path)
+                for path in (weed_model_path, pest_model_path,
+                             plant_detector_model or pest_model_path)})
+
+
+def parallel_stage_threads(weed_model_path: str,
+                           pest_model_path: str,
+                           plant_detector_model: Optional[str] = None,
+                           max_threads: Optional[int] = None) -> int:
+    """Threads per stage in parallel mode: the budget split between the YOLO models and the classifier"""
+    num_yolo_models = count_yolo_models(weed_model_path, pest_model_path, plant_detector_model)
+    total_threads = max_threads or os.cpu_count() or 1
+    return max(1, total_threads // (num_yolo_models + 1))
+
+
+def configure_torch_threads(detector_kwargs: Dict) -> Optional[int]:
+    """
+    Set torch's intra-op thread count for detectors built with these arguments
+    
+    The setting is process-wide, so it is made once by whoever owns the
+    process's detectors (command line, DetectorPool, shard worker) and not
+    by each detector.
+    
+    Args:
+        detector_kwargs: Keyword arguments for UnifiedAgriculturalDetector
+    
+    Returns:
+        Thread count set, or None if torch's default was kept
+    """
+    arguments = inspect.signature(UnifiedAgriculturalDetector).bind_partial(**detector_kwargs)
+    arguments.apply_defaults()
+    kwargs = arguments.arguments
+    if kwargs['parallel']:
+        threads = parallel_stage_threads(kwargs['weed_model_path'], kwargs['pest_model_path'],
+                                         kwargs['plant_detector_model'], kwargs['max_threads'])
+    else:
+        threads = kwargs['max_threads']
+    if threads:
+        torch.set_num_threads(threads)
+    return threads
 
 
 class UnifiedAgriculturalDetector:
@@ -32,48 +156,147 @@ class UnifiedAgriculturalDetector:
                  disease_model_path: str,
                  disease_class_names: Optional[List[str]] = None,
                  conf_threshold: float = 0.25,
-                 plant_detector_model: Optional[str] = None):
+                 plant_detector_model: Optional[str] = None,
+                 disease_batch_size: int = 32,
+                 parallel: bool = False,
+                 max_threads: Optional[int] = None,
+                 batch_size: int = 8,
+                 backend: str = 'torch',
+                 lazy_load: bool = False,
+                 warmup: bool = False,
+                 tile_size: Optional[int] = None,
+                 tile_overlap: float = 0.2,
+                 max_tiles: Optional[int] = None,
+                 tile_full_frame: bool = True,
+                 tile_merge_threshold: float = 0.5,
+                 latency_target_ms: Optional[float] = None,
+                 allowed_imgsz: Tuple[int, ...] = DEFAULT_IMGSZ_CHOICES,
+                 track_plants: bool = True,
+                 reclassify_every: int = 15,
+                 crop_cache: Optional[CropClassificationCache] = None):
         """
         Initialize unified agricultural detector
         
         Args:
             weed_model_path: Path to weed detection YOLO model
             pest_model_path: Path to pest detection YOLO model
-            disease_model_path: Path to disease classification TensorFlow model
+            disease_model_path: Path to disease classification TensorFlow model (SavedModel directory or .tflite)
             disease_class_names: List of disease class names
             conf_threshold: Confidence threshold for detections
             plant_detector_model: Path to plant detection YOLO model (if None, uses pest model to detect plants)
+            disease_batch_size: Maximum number of plant crops classified in one model call
+            parallel: Run independent models concurrently and overlap disease classification
+                      of one frame with detection of the next
+            max_threads: Total thread budget shared by all models (default: number of CPU cores)
+            batch_size: Number of frames sent through each YOLO model in one call
+            backend: Inference runtime for the YOLO models: 'torch', 'onnx' (ONNX Runtime)
+                     or 'openvino'. Exported models are cached next to the weights.
+            lazy_load: Defer loading the models until they are first used (or load_models() is called)
+            warmup: Run one dummy inference through each model right after it is loaded,
+                    so the first real request does not pay for graph tracing/initialization
+            tile_size: Run the YOLO models on overlapping tiles of this size (pixels) at full
+                       resolution instead of on the downscaled frame (default: no tiling)
+            tile_overlap: Fraction of a tile shared with its neighbour
+            max_tiles: Throughput budget - maximum tiles per frame; tiles are enlarged to fit
+            tile_full_frame: Also run the downscaled full frame, so objects larger than a tile are kept
+            tile_merge_threshold: Overlap (intersection over the smaller box) above which
+                                  duplicate boxes from neighbouring tiles are merged
+            latency_target_ms: Per-frame latency target. When set, the input size of the weed,
+                               pest and plant models is chosen from allowed_imgsz based on
+                               measured latencies (default: models run at their default size)
+            allowed_imgsz: Input sizes the YOLO models may run at with latency_target_ms
+            track_plants: Track plants across video frames, using the track id as plant_id
+                          and reusing each plant's disease classification
+            reclassify_every: Processed frames after which a tracked plant is classified again
+            crop_cache: Perceptual-hash cache of crop classifications, may be shared
+                        between detectors (default: no cache)
         """
-        print("🚁 Initializing Unified Agricultural Detection System...")
+        # Constructor arguments, so worker processes can build the same detector
+        self.init_kwargs = {name: value for name, value in locals().items() if name != 'self'}
         
-        # Load models
-        print("  📥 Loading weed detection model...")
-        self.weed_model = YOLO(weed_model_path)
+        if backend not in YOLO_BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose from: {', '.join(YOLO_BACKENDS)}")
         
-        print("  📥 Loading pest detection model...")
-        self.pest_model = YOLO(pest_model_path)
+        print("🚁 Initializing Unified Agricultural Detection System...")
         
-        # Plant detector for disease classification (detects individual plants/leaves)
-        if plant_detector_model:
-            print("  📥 Loading plant detection model...")
-            self.plant_detector = YOLO(plant_detector_model)
-        else:
+        # Models loaded from the same weights file share one instance
+        self.backend = backend
+        self._yolo_cache = {}
+        self.model_paths = {
+            'weed': weed_model_path,
+            'pest': pest_model_path,
+            'plant': plant_detector_model
+        }
+        self.disease_model_path = disease_model_path
+        self.disease_class_names = disease_class_names
+        self.disease_batch_size = disease_batch_size
+        self.crop_cache = crop_cache
+        self._has_disease_model = bool(disease_model_path and os.path.exists(disease_model_path))
+        
+        # Loaded models by name, and their load/warm-up state for health reporting
+        self._models = {}
+        self._load_lock = threading.Lock()
+        self.lazy_load = lazy_load
+        self.warmup = warmup
+        self.model_status = {
+            name: {'state': 'pending', 'load_ms': None, 'warmup_ms': None, 'error': None}
+            for name in MODEL_NAMES
+        }
+        if not plant_detector_model:
             # Use pest model as plant detector (it can detect plants/crops)
-            print("  📥 Using pest model for plant detection...")
-            self.plant_detector = self.pest_model
-        
-        # Disease classifier is optional
-        if disease_model_path and os.path.exists(disease_model_path):
-            print("  📥 Loading disease classification model...")
-            self.disease_classifier = PlantDiseaseClassifier(
-                disease_model_path,
-                class_names=disease_class_names
-            )
-        else:
+            self.model_status['plant']['state'] = 'shared'
+        if not self._has_disease_model:
             print("  ⚠️  Disease model not available - skipping disease classification")
-            self.disease_classifier = None
+            self.model_status['disease']['state'] = 'skipped'
+        
+        # Split the thread budget between the stages that can run at once
+        self.parallel = parallel
+        self._stage_threads = None
+        if parallel:
+            # torch's own thread count is process-wide (see configure_torch_threads)
+            num_yolo_models = count_yolo_models(weed_model_path, pest_model_path, plant_detector_model)
+            self._stage_threads = parallel_stage_threads(weed_model_path, pest_model_path,
+                                                         plant_detector_model, max_threads)
+            print(f"  ⚙️  Parallel mode: {num_yolo_models} YOLO models + disease classifier, "
+                  f"{self._stage_threads} threads each")
+        
+        # Disease labels are stored as compact ids with precomputed health flags
+        self.disease_labels = LabelVocabulary(disease_class_names)
         
         self.conf_threshold = conf_threshold
+        self.batch_size = max(1, batch_size)
+        
+        # Tiled high-resolution inference
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.max_tiles = max_tiles
+        self.tile_full_frame = tile_full_frame
+        self.tile_merge_threshold = tile_merge_threshold
+        self._tile_cache = {}
+        if tile_size:
+            budget = f", at most {max_tiles} tiles/frame" if max_tiles else ""
+            print(f"  🧩 Tiled inference: {tile_size}px tiles, {tile_overlap:.0%} overlap{budget}")
+        
+        # Latency-budgeted input resolution
+        self.resolution_controller = None
+        if latency_target_ms:
+            self.resolution_controller = ResolutionController(latency_target_ms, allowed_imgsz)
+            print(f"  ⏱️  Latency target: {latency_target_ms:.0f} ms/frame, "
+                  f"input sizes {', '.join(map(str, self.resolution_controller.allowed_sizes))}")
+        
+        # Plant tracking in video
+        self.track_plants = track_plants
+        self.reclassify_every = reclassify_every
+        
+        # Worker pools for parallel mode
+        self._model_executor = None
+        self._classify_executor = None
+        if parallel:
+            self._model_executor = ThreadPoolExecutor(max_workers=num_yolo_models,
+                                                      thread_name_prefix='yolo')
+            if self._has_disease_model:
+                self._classify_executor = ThreadPoolExecutor(max_workers=1,
+                                                             thread_name_prefix='disease')
         
         # Detection colors
         self.colors = {
@@ -84,149 +307,704 @@ class UnifiedAgriculturalDetector:
             'healthy': (0, 255, 0)        # Green
         }
         
-        print("✅ All models loaded successfully!")
+        if lazy_load:
+            print("  💤 Lazy loading enabled - models load on first use")
+        else:
+            self.load_models()
+    
+    @property
+    def weed_model(self) -> YOLO:
+        return self._get_model('weed')
+    
+    @property
+    def pest_model(self) -> YOLO:
+        return self._get_model('pest')
+    
+    @property
+    def plant_detector(self) -> YOLO:
+        return self._get_model('plant')
+    
+    @property
+    def disease_classifier(self) -> Optional[PlantDiseaseClassifier]:
+        if not self._has_disease_model:
+            return None
+        return self._get_model('disease')
     
-    def detect_all(self, image: np.ndarray) -> Dict:
+    def _get_model(self, name: str):
+        """Return a loaded model, loading all pending models on first use"""
+        model = self._models.get(name)
+        if model is None:
+            self.load_models()
+            model = self._models[name]
+        return model
+    
+    def load_models(self) -> Dict:
         """
-        Run all detection models on a single image
+        Load (and optionally warm up) every model that is not loaded yet
+        
+        Independent models are loaded concurrently. Safe to call from several
+        threads: later callers wait for the running load to finish.
+        
+        Returns:
+            Per-model load status (see model_status_report)
+        """
+        with self._load_lock:
+            # One job per distinct weights file; names sharing a file share the instance
+            jobs = {}
+            for name in ('weed', 'pest', 'plant'):
+                if name in self._models or self.model_status[name]['state'] == 'shared':
+                    continue
+                key = os.path.realpath(self.model_paths[name])
+                jobs.setdefault(key, (self._load_yolo_job(self.model_paths[name]), []))[1].append(name)
+            if self._has_disease_model and 'disease' not in self._models:
+                jobs['disease'] = (self._load_disease_job, ['disease'])
+            
+            if jobs:
+                print(f"  📥 Loading {len(jobs)} model(s) concurrently...")
+                with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='load') as pool:
+                    futures = [pool.submit(self._run_load_job, loader, names)
+                               for loader, names in jobs.values()]
+                # Re-raise the first load failure
+                for future in futures:
+                    future.result()
+                
+                if self.model_status['plant']['state'] == 'shared':
+                    print("  📥 Using pest model for plant detection...")
+                    self._models['plant'] = self._models['pest']
+                
+                print("✅ All models loaded successfully!")
+        
+        return self.model_status_report()
+    
+    def _load_yolo_job(self, model_path: str):
+        """Loader for one YOLO weights file"""
+        def load():
+            model = self._load_yolo(model_path)
+            if self.warmup:
+                return model, lambda: model.predict(
+                    source=[np.zeros((640, 640, 3), dtype=np.uint8)],
+                    conf=self.conf_threshold, verbose=False
+                )
+            return model, None
+        return load
+    
+    def _load_disease_job(self):
+        """Loader for the disease classifier"""
+        classifier = PlantDiseaseClassifier(
+            self.disease_model_path,
+            class_names=self.disease_class_names,
+            max_batch_size=self.disease_batch_size,
+            intra_op_threads=self._stage_threads,
+            cache=self.crop_cache
+        )
+        if self.warmup:
+            return classifier, lambda: classifier.predict_crops([np.zeros((64, 64, 3), dtype=np.uint8)])
+        return classifier, None
+    
+    def _run_load_job(self, loader, names: List[str]):
+        """Load one model (and warm it up), recording state and timings under each name"""
+        statuses = [self.model_status[name] for name in names]
+        for status in statuses:
+            status.update(state='loading', error=None)
+        
+        stage = 'load_ms'
+        try:
+            start = time.perf_counter()
+            model, warmup = loader()
+            load_ms = (time.perf_counter() - start) * 1000
+            for status in statuses:
+                status.update(state='warming_up' if warmup else 'loaded', load_ms=load_ms)
+            
+            if warmup:
+                stage = 'warmup_ms'
+                start = time.perf_counter()
+                warmup()
+                warmup_ms = (time.perf_counter() - start) * 1000
+                for status in statuses:
+                    status.update(state='ready', warmup_ms=warmup_ms)
+        except Exception as e:
+            for status in statuses:
+                status.update(state='failed', error=f"{stage[:-3]}: {e}")
+            raise
+        
+        for name in names:
+            self._models[name] = model
+        print(f"  ✅ Loaded {', '.join(names)} model in {load_ms:.0f} ms"
+              + (f" (warm-up {warmup_ms:.0f} ms)" if warmup else ""))
+    
+    def model_status_report(self) -> Dict:
+        """
+        Per-model load and warm-up state for health checks
+        
+        Returns:
+            Dictionary with an overall 'ready' flag and, per model, its state,
+            load and warm-up time in ms and the last load error
+        """
+        models = {}
+        for name in MODEL_NAMES:
+            status = dict(self.model_status[name])
+            for key in ('load_ms', 'warmup_ms'):
+                if status[key] is not None:
+                    status[key] = round(status[key], 1)
+            models[name] = status
+        
+        return {
+            'ready': all(status['state'] in READY_STATES for status in models.values()),
+            'lazy_load': self.lazy_load,
+            'backend': self.backend,
+            'models': models
+        }
+    
+    def close(self):
+        """Shut down the worker pools used in parallel mode"""
+        for executor in (self._model_executor, self._classify_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._model_executor = None
+        self._classify_executor = None
+    
+    def _load_yolo(self, model_path: str) -> YOLO:
+        """Load a YOLO model, reusing the instance if the same weights were already loaded"""
+        key = os.path.realpath(model_path)
+        if key not in self._yolo_cache:
+            if self.backend == 'torch':
+                self._yolo_cache[key] = YOLO(model_path)
+            else:
+                artifact_path = export_yolo_model(model_path, self.backend)
+                self._yolo_cache[key] = YOLO(artifact_path, task='detect')
+        return self._yolo_cache[key]
+    
+    def check_backend_parity(self,
+                             image: np.ndarray,
+                             iou_threshold: float = 0.9,
+                             conf_tolerance: float = 0.05) -> Dict:
+        """
+        Compare the YOLO outputs of the selected backend against the torch models
+        
+        Args:
+            image: Test image as numpy array
+            iou_threshold: Minimum IoU for a backend box to match a torch box
+            conf_tolerance: Maximum allowed confidence difference for matched boxes
+            
+        Returns:
+            Dictionary with per-model comparison statistics and an overall 'passed' flag
+        """
+        models = {'weed': self.weed_model, 'pest': self.pest_model}
+        if self.model_paths['plant']:
+            models['plant'] = self.plant_detector
+        
+        report = {'backend': self.backend, 'models': {}, 'passed': True}
+        for name, backend_model in models.items():
+            torch_model = YOLO(self.model_paths[name])
+            torch_xyxy, torch_conf, torch_cls = _boxes_to_arrays(
+                torch_model.predict(source=image, conf=self.conf_threshold, verbose=False)[0].boxes
+            )
+            backend_xyxy, backend_conf, backend_cls = _boxes_to_arrays(
+                backend_model.predict(source=image, conf=self.conf_threshold, verbose=False)[0].boxes
+            )
+            
+            # Match every torch box to the best backend box of the same class
+            iou = box_iou(torch_xyxy, backend_xyxy)
+            iou[torch_cls[:, None] != backend_cls[None, :]] = 0.0
+            matched = 0
+            max_conf_diff = 0.0
+            if iou.size:
+                best = iou.argmax(axis=1)
+                best_iou = iou[np.arange(len(best)), best]
+                is_match = best_iou >= iou_threshold
+                matched = int(np.count_nonzero(is_match))
+                if matched:
+                    max_conf_diff = float(np.abs(torch_conf[is_match] - backend_conf[best[is_match]]).max())
+            
+            passed = (matched == len(torch_conf) == len(backend_conf)) and max_conf_diff <= conf_tolerance
+            report['models'][name] = {
+                'torch_boxes': int(len(torch_conf)),
+                'backend_boxes': int(len(backend_conf)),
+                'matched_boxes': matched,
+                'max_confidence_diff': max_conf_diff,
+                'passed': passed
+            }
+            report['passed'] = report['passed'] and passed
+        
+        return report
+    
+    def _run_yolo_models(self, images: List[np.ndarray]) -> List[Dict]:
+        """
+        Run every YOLO consumer (weeds, pests, plants) on a batch of images
+        
+        Consumers that share a model (e.g. the pest model doubling as plant
+        detector) get a single forward pass at the lowest threshold any of
+        them needs; each consumer then keeps only boxes above its own threshold.
+        All images go through each model in one batched predict call.
+        
+        Args:
+            images: List of input images as numpy arrays
+            
+        With a latency target, each model's input size is chosen by the
+        resolution controller and the sizes used are returned under 'resolution'.
+        
+        Returns:
+            One dictionary per image mapping 'weeds', 'pests' and (if classifying
+            diseases) 'plants' to (xyxy, confidences, class_ids) numpy arrays
+        """
+        consumers = [
+            ('weeds', self.weed_model, self.conf_threshold),
+            ('pests', self.pest_model, self.conf_threshold)
+        ]
+        if self.disease_classifier:
+            # Lower threshold for plant detection
+            consumers.append(('plants', self.plant_detector, self.conf_threshold * 0.5))
+        
+        # Group consumers by model instance
+        passes = {}
+        for name, model, conf in consumers:
+            passes.setdefault(id(model), (model, []))[1].append((name, conf))
+        
+        # In tiled mode every model sees all tiles of all frames in one batch
+        if self.tile_size:
+            sources, origins = self._tile_sources(images)
+        else:
+            sources, origins = list(images), None
+        
+        concurrent = self._model_executor is not None and len(passes) > 1
+        controller = self.resolution_controller
+        if controller is not None:
+            # Classification overlaps detection when streaming in parallel mode
+            budget_ms = controller.budget_ms(len(passes), concurrent,
+                                             include_overhead=self._classify_executor is None)
+        
+        def run_pass(model, users):
+            min_conf = min(conf for _, conf in users)
+            if controller is None:
+                model_results = model.predict(
+                    source=sources,
+                    conf=min_conf,
+                    verbose=False
+                )
+            else:
+                model_name = CONSUMER_MODELS[users[0][0]]
+                imgsz = controller.choose(model_name, budget_ms)
+                start = time.perf_counter()
+                model_results = model.predict(
+                    source=sources,
+                    conf=min_conf,
+                    imgsz=imgsz,
+                    verbose=False
+                )
+                controller.record(model_name, imgsz, (time.perf_counter() - start) * 1000 / max(1, len(images)))
+            if origins is None:
+                frame_arrays = [_boxes_to_arrays(result.boxes) for result in model_results]
+            else:
+                frame_arrays = self._merge_tiles(model_results, origins, len(images))
+            
+            pass_boxes = []
+            for xyxy, confs, classes in frame_arrays:
+                frame_boxes = {}
+                for name, conf in users:
+                    if conf <= min_conf:
+                        frame_boxes[name] = (xyxy, confs, classes)
+                    else:
+                        keep = confs > conf
+                        frame_boxes[name] = (xyxy[keep], confs[keep], classes[keep])
+                if controller is not None:
+                    frame_boxes['resolution'] = {model_name: imgsz}
+                pass_boxes.append(frame_boxes)
+            return pass_boxes
+        
+        if concurrent:
+            # Independent models run concurrently on the worker pool
+            futures = [self._model_executor.submit(run_pass, model, users)
+                       for model, users in passes.values()]
+            all_pass_boxes = [future.result() for future in futures]
+        else:
+            all_pass_boxes = [run_pass(model, users) for model, users in passes.values()]
+        
+        boxes = [{'resolution': {}} if controller is not None else {} for _ in images]
+        for pass_boxes in all_pass_boxes:
+            for frame_boxes, model_boxes in zip(boxes, pass_boxes):
+                resolution = model_boxes.pop('resolution', None)
+                frame_boxes.update(model_boxes)
+                if resolution:
+                    frame_boxes['resolution'].update(resolution)
+        
+        return boxes
+    
+    def _tile_windows(self, width: int, height: int) -> np.ndarray:
+        """Tile windows for a frame size (cached, frame sizes rarely change)"""
+        key = (width, height)
+        if key not in self._tile_cache:
+            self._tile_cache[key] = tile_grid(width, height, self.tile_size,
+                                              self.tile_overlap, self.max_tiles)
+        return self._tile_cache[key]
+    
+    def _tile_sources(self, images: List[np.ndarray]) -> Tuple[List[np.ndarray], List[Tuple[int, int, int]]]:
+        """
+        Split a batch of frames into tiles
+        
+        Args:
+            images: List of input images as numpy arrays
+            
+        Returns:
+            (sources, origins): the tile images (plus the full frames if tile_full_frame)
+            and, per source, the (frame index, x offset, y offset) to map boxes back
+        """
+        sources = []
+        origins = []
+        for index, image in enumerate(images):
+            height, width = image.shape[:2]
+            windows = self._tile_windows(width, height)
+            if self.tile_full_frame and len(windows) > 1:
+                sources.append(image)
+                origins.append((index, 0, 0))
+            for x1, y1, x2, y2 in windows.tolist():
+                sources.append(image[y1:y2, x1:x2])
+                origins.append((index, x1, y1))
+        return sources, origins
+    
+    def _merge_tiles(self,
+                     results: List,
+                     origins: List[Tuple[int, int, int]],
+                     num_images: int) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Map tile detections back to frame coordinates and merge duplicates
+        
+        Objects on a tile border are found by both neighbouring tiles (one box
+        possibly cut off), so boxes are merged with class-aware NMS on the
+        intersection over the smaller box.
+        
+        Args:
+            results: YOLO results, one per source from _tile_sources
+            origins: (frame index, x offset, y offset) per source
+            num_images: Number of frames in the batch
+            
+        Returns:
+            One (xyxy, confidences, class_ids) tuple per frame
+        """
+        parts = [[] for _ in range(num_images)]
+        for result, (index, x_offset, y_offset) in zip(results, origins):
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
+            # New array, so the result tensors are not modified in place
+            data = result.boxes.data.cpu().numpy().astype(np.float32)
+            data[:, :4] += np.array([x_offset, y_offset, x_offset, y_offset], dtype=np.float32)
+            parts[index].append(data)
+        
+        merged = []
+        for frame_parts in parts:
+            if not frame_parts:
+                data = np.zeros((0, 6), dtype=np.float32)
+            else:
+                data = np.concatenate(frame_parts)
+                keep = batched_nms(data[:, :4], data[:, -2], data[:, -1],
+                                   self.tile_merge_threshold, metric='ios')
+                data = data[keep]
+            merged.append((data[:, :4], data[:, -2], data[:, -1]))
+        return merged
+    
+    def _detect_objects(self, images: List[np.ndarray]) -> List[Tuple[Dict, Optional[List]]]:
+        """
+        Detection stage: run the YOLO models on a batch and crop detected plants
+        
+        Args:
+            images: List of input images as numpy arrays
+            
+        Returns:
+            One (results, plants) tuple per image, see _extract_detections
+        """
+        yolo_boxes = self._run_yolo_models(images)
+        return [self._extract_detections(image, boxes) for image, boxes in zip(images, yolo_boxes)]
+    
+    def _extract_detections(self, image: np.ndarray, yolo_boxes: Dict) -> Tuple[Dict, Optional[List]]:
+        """
+        Convert the YOLO boxes of one image into detections and plant crops
         
         Args:
             image: Input image as numpy array
+            yolo_boxes: Boxes per consumer from _run_yolo_models
             
         Returns:
-            Dictionary with all detections
-        """
-        # Save temporary image for disease classifier
-        temp_path = "temp_detection.jpg"
-        cv2.imwrite(temp_path, image)
-        
-        results = {
-            'weeds': [],
-            'pests': [],
-            'diseases': [],
-            'water_stress': [],
-            'timestamp': datetime.now().isoformat()
-        }
+            Tuple of (dictionary with 'weeds' and 'pests' DetectionSets and 'timestamp',
+            list of (plant_id, bbox, crop, confidence)). The plant list is None when disease
+            classification should fall back to the whole image.
+        """
+        timestamp = datetime.now().isoformat()
         
         # 1. Weed Detection
-        weed_results = self.weed_model.predict(
-            source=image,
-            conf=self.conf_threshold,
-            verbose=False
-        )
-        if weed_results[0].boxes is not None:
-            for box in weed_results[0].boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                conf = float(box.conf[0].cpu().numpy())
-                results['weeds'].append({
-                    'bbox': [x1, y1, x2, y2],
-                    'confidence': conf
-                })
+        weed_xyxy, weed_conf, _ = yolo_boxes['weeds']
+        weeds = DetectionSet('weeds', weed_xyxy, weed_conf)
         
         # 2. Pest Detection
-        pest_results = self.pest_model.predict(
-            source=image,
-            conf=self.conf_threshold,
-            verbose=False
-        )
-        if pest_results[0].boxes is not None:
-            for box in pest_results[0].boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                conf = float(box.conf[0].cpu().numpy())
-                cls_id = int(box.cls[0].cpu().numpy())
-                results['pests'].append({
-                    'bbox': [x1, y1, x2, y2],
-                    'confidence': conf,
-                    'class_id': cls_id
-                })
-        
-        # 3. Disease Classification (on individual detected plants/leaves)
-        # First detect plants, then classify each one
+        pest_xyxy, pest_conf, pest_cls = yolo_boxes['pests']
+        pests = DetectionSet('pests', pest_xyxy, pest_conf, class_ids=pest_cls)
+        
+        results = {'weeds': weeds, 'pests': pests, 'timestamp': timestamp,
+                   'resolution': yolo_boxes.get('resolution')}
+        
+        # 3. Crop individual detected plants/leaves for disease classification
+        plants = []
+        plant_detections = yolo_boxes.get('plants')
+        if plant_detections is None or len(plant_detections[0]) == 0:
+            return results, None
+        
+        # Add padding around the detected plants
+        h, w = image.shape[:2]
+        padding = 10
+        plant_xyxy = plant_detections[0].astype(int)
+        plant_xyxy[:, :2] = np.maximum(plant_xyxy[:, :2] - padding, 0)
+        plant_xyxy[:, 2] = np.minimum(plant_xyxy[:, 2] + padding, w)
+        plant_xyxy[:, 3] = np.minimum(plant_xyxy[:, 3] + padding, h)
+        
+        for idx, ((x1, y1, x2, y2), confidence) in enumerate(zip(plant_xyxy.tolist(),
+                                                                 plant_detections[1].tolist())):
+            # Crop the plant region
+            plant_crop = image[y1:y2, x1:x2]
+            
+            if plant_crop.size == 0:
+                continue
+            
+            plants.append((idx, [x1, y1, x2, y2], plant_crop, confidence))
+        
+        return results, plants
+    
+    def _classify_plants(self,
+                         images: List[np.ndarray],
+                         detected: List[Tuple[Dict, Optional[List]]],
+                         tracker: Optional[PlantTracker] = None) -> List[FrameDetections]:
+        """
+        Classification stage: classify the plants cropped by _detect_objects
+        
+        The crops of all images are classified together in one batched call.
+        With a tracker (video), plants keep their track id as plant_id and a
+        tracked plant is only classified when the tracker asks for it; other
+        frames reuse its last classification.
+        
+        Args:
+            images: List of input images as numpy arrays (consecutive frames when tracking)
+            detected: One (results, plants) tuple per image from _detect_objects.
+                      plants is a list of (plant_id, bbox, crop, confidence), or None to
+                      classify the whole image
+            tracker: Plant tracker of the video the images belong to
+            
+        Returns:
+            One FrameDetections per image
+        """
+        # Gather every crop of every image, remembering where it belongs.
+        # source is the index of the crop's prediction, or a reused (label, confidence)
+        crops = []
+        owners = []
+        # Classifications started in this batch (a track can be reclassified
+        # within it), the latest crop per track, and reuses of pending results
+        started = []
+        classified_tracks = {}
+        batch_reuses = []
         if self.disease_classifier:
-            try:
-                # Detect plants/leaves in the image
-                plant_results = self.plant_detector.predict(
-                    source=image,
-                    conf=self.conf_threshold * 0.5,  # Lower threshold for plant detection
-                    verbose=False
-                )
-                
-                if plant_results[0].boxes is not None and len(plant_results[0].boxes) > 0:
-                    # Classify each detected plant
-                    h, w = image.shape[:2]
-                    temp_dir = "temp_plant_crops"
-                    os.makedirs(temp_dir, exist_ok=True)
-                    
-                    for idx, box in enumerate(plant_results[0].boxes):
-                        x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                        
-                        # Add padding around the detected plant
-                        padding = 10
-                        x1 = max(0, x1 - padding)
-                        y1 = max(0, y1 - padding)
-                        x2 = min(w, x2 + padding)
-                        y2 = min(h, y2 + padding)
-                        
-                        # Crop the plant region
-                        plant_crop = image[y1:y2, x1:x2]
-                        
-                        if plant_crop.size == 0:
-                            continue
-                        
-                        # Save crop temporarily
-                        crop_path = os.path.join(temp_dir, f"plant_{idx}.jpg")
-                        cv2.imwrite(crop_path, plant_crop)
-                        
-                        try:
-                            # Classify the disease for this plant
-                            disease_label, disease_conf = self.disease_classifier.predict(crop_path)
-                            
-                            results['diseases'].append({
-                                'label': disease_label,
-                                'confidence': disease_conf,
-                                'bbox': [x1, y1, x2, y2],
-                                'plant_id': idx
-                            })
-                        except Exception as e:
-                            print(f"⚠️  Disease classification error for plant {idx}: {e}")
-                        finally:
-                            # Clean up crop file
-                            if os.path.exists(crop_path):
-                                os.remove(crop_path)
-                    
-                    # Clean up temp directory
-                    try:
-                        os.rmdir(temp_dir)
-                    except:
-                        pass
-                else:
+            for frame_idx, (image, (_, plants)) in enumerate(zip(images, detected)):
+                if plants is None:
+                    if tracker is not None:
+                        # Age the tracks of plants not seen in this frame
+                        tracker.update(np.zeros((0, 4)), np.zeros((0,)))
                     # If no plants detected, try classifying the whole image
                     print("⚠️  No plants detected, classifying whole image...")
-                    disease_label, disease_conf = self.disease_classifier.predict(temp_path)
-                    results['diseases'].append({
-                        'label': disease_label,
-                        'confidence': disease_conf,
-                        'bbox': [0, 0, image.shape[1], image.shape[0]]
-                    })
-                    
-            except Exception as e:
-                print(f"⚠️  Disease classification error: {e}")
-                import traceback
-                traceback.print_exc()
+                    crops.append(image)
+                    owners.append((frame_idx, [0, 0, image.shape[1], image.shape[0]], -1, len(crops) - 1))
+                    continue
+                
+                if tracker is None:
+                    for idx, bbox, crop, _ in plants:
+                        crops.append(crop)
+                        owners.append((frame_idx, bbox, idx, len(crops) - 1))
+                    continue
+                
+                track_ids = tracker.update([bbox for _, bbox, _, _ in plants],
+                                           [confidence for _, _, _, confidence in plants])
+                for (_, bbox, crop, _), track_id in zip(plants, track_ids.tolist()):
+                    source = None
+                    if not tracker.needs_classification(track_id):
+                        # Pending means classified earlier in this batch (or in an
+                        # earlier call whose result never arrived)
+                        source = tracker.classification(track_id)
+                        if source is None:
+                            source = classified_tracks.get(track_id)
+                            if source is not None:
+                                batch_reuses.append((track_id, source))
+                    if source is None:
+                        tracker.start_classification(track_id)
+                        crops.append(crop)
+                        source = len(crops) - 1
+                        started.append((track_id, source))
+                        classified_tracks[track_id] = source
+                    owners.append((frame_idx, bbox, track_id, source))
+        
+        predictions = []
+        start = time.perf_counter()
+        try:
+            # Classify all plant crops in one batch
+            if crops:
+                predictions = self.disease_classifier.predict_crops(crops)
+        except Exception as e:
+            print(f"⚠️  Disease classification error: {e}")
+            import traceback
+            traceback.print_exc()
+        if self.resolution_controller is not None:
+            self.resolution_controller.record_overhead((time.perf_counter() - start) * 1000 / max(1, len(images)))
+        
+        if tracker is not None:
+            # In order, so a track keeps the result of its latest crop
+            for track_id, crop_index in started:
+                if crop_index < len(predictions):
+                    tracker.store_classification(track_id, *predictions[crop_index])
+                else:
+                    tracker.cancel_classification(track_id)
+            # Counted like a reuse in a later batch would be (if the result arrived)
+            for track_id, crop_index in batch_reuses:
+                if crop_index < len(predictions):
+                    tracker.count_reuse(track_id)
+        
+        # Split the predictions back into one column set per frame
+        frame_diseases = [([], [], [], []) for _ in images]
+        for frame_idx, bbox, plant_id, source in owners:
+            if isinstance(source, tuple):
+                disease_label, disease_conf = source
+            elif source < len(predictions):
+                disease_label, disease_conf = predictions[source]
+            else:
+                continue
+            boxes, confidences, label_ids, plant_ids = frame_diseases[frame_idx]
+            boxes.append(bbox)
+            confidences.append(disease_conf)
+            label_ids.append(self.disease_labels.id_for(disease_label))
+            plant_ids.append(plant_id)
+        
+        all_results = []
+        for (results, _), (boxes, confidences, label_ids, plant_ids) in zip(detected, frame_diseases):
+            diseases = DetectionSet('diseases', boxes, confidences, label_ids=label_ids,
+                                    plant_ids=plant_ids, vocabulary=self.disease_labels)
+            all_results.append(FrameDetections(
+                weeds=results['weeds'],
+                pests=results['pests'],
+                diseases=diseases,
+                water_stress=DetectionSet.empty('water_stress'),
+                timestamp=results['timestamp'],
+                resolution=results['resolution']
+            ))
+        
+        return all_results
+    
+    def new_tracker(self) -> Optional[PlantTracker]:
+        """Create a plant tracker for one video (None if tracking is disabled)"""
+        if not self.track_plants or not self._has_disease_model:
+            return None
+        return PlantTracker(reclassify_every=self.reclassify_every)
+    
+    def checkpoint_settings(self) -> Dict:
+        """Constructor arguments that change detection results (video checkpoints are keyed by them)"""
+        performance_only = ('disease_batch_size', 'parallel', 'max_threads', 'batch_size',
+                            'lazy_load', 'warmup')
+        settings = {name: value for name, value in self.init_kwargs.items()
+                    if name not in performance_only and name != 'crop_cache'}
+        # A cache hit returns a stored classification instead of the classifier's,
+        # so the cache is identified by its file, model and matching settings
+        settings['crop_cache'] = self.crop_cache.settings() if self.crop_cache is not None else None
+        return settings
+    
+    def detect_all(self, image: np.ndarray) -> FrameDetections:
+        """
+        Run all detection models on a single image
+        
+        Args:
+            image: Input image as numpy array
+            
+        Returns:
+            FrameDetections with all detections (dict-like; to_dict() gives the JSON form)
+        """
+        return self.detect_batch([image])[0]
+    
+    def detect_batch(self,
+                     frames: List[np.ndarray],
+                     tracker: Optional[PlantTracker] = None) -> List[FrameDetections]:
+        """
+        Run all detection models on several images with batched inference
+        
+        Frames are sent through each YOLO model batch_size at a time, and the
+        plant crops of a whole batch are classified together.
+        
+        Args:
+            frames: List of input images as numpy arrays
+            tracker: Plant tracker (see new_tracker) when the frames are consecutive
+                     video frames; keep passing the same tracker for the whole video
+            
+        Returns:
+            One detections dictionary per frame, in the same format as detect_all
+        """
+        all_results = []
+        for start in range(0, len(frames), self.batch_size):
+            batch = frames[start:start + self.batch_size]
+            all_results.extend(self._classify_plants(batch, self._detect_objects(batch), tracker))
+        return all_results
+    
+    def detect_stream(self,
+                      frames: Iterable[Tuple[int, np.ndarray]],
+                      batch_size: Optional[int] = None,
+                      tracker: Optional[PlantTracker] = None) -> Iterator[Tuple[int, np.ndarray, FrameDetections]]:
+        """
+        Run all detection models over a stream of frames
         
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        Frames are grouped into batches for inference. In parallel mode,
+        disease classification of one batch runs on its own worker while the
+        YOLO models already process the next batch. Results are yielded in
+        input order.
         
-        return results
+        Args:
+            frames: Iterable of (frame_number, image) pairs
+            batch_size: Frames per inference batch (default: the detector's batch_size;
+                        use 1 for lowest latency on live streams)
+            tracker: Plant tracker for the stream (see new_tracker)
+            
+        Yields:
+            Tuples of (frame_number, image, detections)
+        """
+        batch_size = batch_size or self.batch_size
+        
+        def batches():
+            batch = []
+            for item in frames:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        
+        pending = None
+        for batch in batches():
+            images = [image for _, image in batch]
+            detected = self._detect_objects(images)
+            if self._classify_executor is None:
+                for (frame_number, image), results in zip(batch, self._classify_plants(images, detected, tracker)):
+                    yield frame_number, image, results
+                continue
+            
+            if pending is not None:
+                yield from self._finish_batch(*pending)
+            future = self._classify_executor.submit(self._classify_plants, images, detected, tracker)
+            pending = (batch, future)
+        
+        if pending is not None:
+            yield from self._finish_batch(*pending)
+    
+    @staticmethod
+    def _finish_batch(batch: List[Tuple[int, np.ndarray]], future) -> Iterator[Tuple[int, np.ndarray, FrameDetections]]:
+        """Wait for a batch's classification and yield its frames in order"""
+        for (frame_number, image), results in zip(batch, future.result()):
+            yield frame_number, image, results
     
-    def draw_detections(self, image: np.ndarray, detections: Dict) -> np.ndarray:
+    def draw_detections(self, image: np.ndarray, detections: FrameDetections) -> np.ndarray:
         """
         Draw all detections on image
         
         Args:
             image: Input image
-            detections: Detection results dictionary
+            detections: Detection results from detect_all
             
         Returns:
             Annotated image
@@ -234,30 +1012,27 @@ class UnifiedAgriculturalDetector:
         annotated = image.copy()
         
         # Draw weeds
-        for weed in detections['weeds']:
-            x1, y1, x2, y2 = weed['bbox']
-            conf = weed['confidence']
+        weeds = detections['weeds']
+        for (x1, y1, x2, y2), conf in zip(weeds.boxes.tolist(), weeds.confidences.tolist()):
             cv2.rectangle(annotated, (x1, y1), (x2, y2), self.colors['weed'], 2)
             label = f"Weed: {conf:.2f}"
             cv2.putText(annotated, label, (x1, y1 - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.colors['weed'], 2)
         
         # Draw pests
-        for pest in detections['pests']:
-            x1, y1, x2, y2 = pest['bbox']
-            conf = pest['confidence']
+        pests = detections['pests']
+        for (x1, y1, x2, y2), conf in zip(pests.boxes.tolist(), pests.confidences.tolist()):
             cv2.rectangle(annotated, (x1, y1), (x2, y2), self.colors['pest'], 2)
             label = f"Pest: {conf:.2f}"
             cv2.putText(annotated, label, (x1, y1 - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.colors['pest'], 2)
         
         # Draw diseases (on individual plants)
-        for disease in detections['diseases']:
-            x1, y1, x2, y2 = disease['bbox']
-            label_text = disease['label']
-            conf = disease['confidence']
-            plant_id = disease.get('plant_id', '')
-            
+        diseases = detections['diseases']
+        for (x1, y1, x2, y2), label_text, conf, plant_id in zip(diseases.boxes.tolist(),
+                                                                 diseases.labels,
+                                                                 diseases.confidences.tolist(),
+                                                                 diseases.plant_ids.tolist()):
             # Draw bounding box
             cv2.rectangle(annotated, (x1, y1), (x2, y2), self.colors['disease'], 2)
             
@@ -266,7 +1041,7 @@ class UnifiedAgriculturalDetector:
                 label_text = label_text[:27] + "..."
             
             # Add plant ID if available
-            if plant_id != '':
+            if plant_id >= 0:
                 label = f"Plant #{plant_id}: {label_text}"
             else:
                 label = f"{label_text}"
@@ -338,16 +1113,20 @@ class UnifiedAgriculturalDetector:
         # Detection storage
         all_detections = []
         
-        try:
+        def read_frames():
+            frame_number = 0
             while True:
                 ret, frame = cap.read()
                 if not ret:
                     print("⚠️  Failed to read frame. Retrying...")
                     continue
-                
-                # Run all detections
-                detections = self.detect_all(frame)
-                
+                yield frame_number, frame
+                frame_number += 1
+        
+        try:
+            # Run all detections
+            tracker = self.new_tracker()
+            for _, frame, detections in self.detect_stream(read_frames(), batch_size=1, tracker=tracker):
                 # Draw detections
                 annotated_frame = self.draw_detections(frame, detections)
                 
@@ -365,6 +1144,9 @@ class UnifiedAgriculturalDetector:
                     f"Pests: {len(detections['pests'])}",
                     f"Diseases: {len(detections['diseases'])}"
                 ]
+                if detections.resolution:
+                    info_text.append("Input: " + ", ".join(
+                        f"{model} {imgsz}" for model, imgsz in detections.resolution.items()))
                 
                 y_offset = 30
                 for text in info_text:
@@ -381,7 +1163,7 @@ class UnifiedAgriculturalDetector:
                     all_detections.append({
                         'frame': frame_count,
                         'timestamp': detections['timestamp'],
-                        'detections': detections
+                        'detections': detections.to_dict()
                     })
                 
                 # Display frame
@@ -459,12 +1241,12 @@ class UnifiedAgriculturalDetector:
             'annotated_image_path': output_path
         }
     
-    def calculate_area_coverage(self, detections: Dict, frame_shape: Tuple[int, int]) -> Dict:
+    def calculate_area_coverage(self, detections: FrameDetections, frame_shape: Tuple[int, int]) -> Dict:
         """
         Calculate pixel area coverage for good crop, bad crop, and weeds
         
         Args:
-            detections: Detection results dictionary
+            detections: Detection results from detect_all
             frame_shape: Tuple of (height, width) of the frame
             
         Returns:
@@ -479,18 +1261,15 @@ class UnifiedAgriculturalDetector:
         weed_mask = np.zeros((height, width), dtype=np.uint8)
         
         # Fill masks based on bounding boxes
-        for disease in detections['diseases']:
-            x1, y1, x2, y2 = disease['bbox']
-            label = disease['label'].lower()
-            
+        diseases = detections['diseases']
+        for (x1, y1, x2, y2), healthy in zip(diseases.boxes.tolist(), diseases.healthy_mask().tolist()):
             # Check if healthy or diseased
-            if 'healthy' in label:
+            if healthy:
                 good_crop_mask[y1:y2, x1:x2] = 255
             else:
                 bad_crop_mask[y1:y2, x1:x2] = 255
         
-        for weed in detections['weeds']:
-            x1, y1, x2, y2 = weed['bbox']
+        for x1, y1, x2, y2 in detections['weeds'].boxes.tolist():
             weed_mask[y1:y2, x1:x2] = 255
         
         # Calculate pixel counts
@@ -519,14 +1298,14 @@ class UnifiedAgriculturalDetector:
             'remaining_percentage': float(remaining_percentage)
         }
     
-    def estimate_yield(self, area_stats: Dict, detections: Dict, 
+    def estimate_yield(self, area_stats: Dict, detections: FrameDetections, 
                       base_yield_per_acre: float = 150.0) -> Dict:
         """
         Estimate crop yield based on area coverage and health status
         
         Args:
             area_stats: Area coverage statistics from calculate_area_coverage
-            detections: Detection results dictionary
+            detections: Detection results from detect_all
             base_yield_per_acre: Base yield expectation in bushels/acre (default: 150)
             
         Returns:
@@ -549,7 +1328,7 @@ class UnifiedAgriculturalDetector:
         pest_impact = min(0.5, pest_impact)  # Cap at 50% reduction
         
         # Disease severity impact
-        disease_count = len([d for d in detections['diseases'] if 'healthy' not in d['label'].lower()])
+        disease_count = detections['diseases'].diseased_count()
         disease_impact = max(0.0, 1.0 - (disease_count * 0.02))  # 2% reduction per diseased plant
         disease_impact = min(0.4, disease_impact)  # Cap at 40% reduction
         
@@ -591,258 +1370,146 @@ class UnifiedAgriculturalDetector:
                 'healthiest': []
             }
         
-        # Sort frames by severity metrics
-        worst_infected = sorted(
-            all_frame_data,
-            key=lambda x: (
-                len([d for d in x['detections']['diseases'] if 'healthy' not in d.get('label', '').lower()]),
-                -x.get('area_stats', {}).get('good_crop_percentage', 0)
-            ),
-            reverse=True
-        )[:top_n]
-        
-        most_weeds = sorted(
-            all_frame_data,
-            key=lambda x: (
-                len(x['detections']['weeds']),
-                x.get('area_stats', {}).get('weed_percentage', 0)
-            ),
-            reverse=True
-        )[:top_n]
-        
-        healthiest = sorted(
-            all_frame_data,
-            key=lambda x: (
-                x.get('area_stats', {}).get('good_crop_percentage', 0),
-                -len([d for d in x['detections']['diseases'] if 'healthy' not in d.get('label', '').lower()]),
-                -len(x['detections']['weeds'])
-            ),
-            reverse=True
-        )[:top_n]
-        
+        # Sort frames by severity metrics (see frame_curation.CURATION_KEYS)
         return {
-            'worst_infected': worst_infected,
-            'most_weeds': most_weeds,
-            'healthiest': healthiest
+            name: sorted(all_frame_data, key=key_fn, reverse=True)[:top_n]
+            for name, key_fn in CURATION_KEYS.items()
         }
     
+    def annotate_video_frame(self, frame: np.ndarray, frame_data: Dict, total_frames: int) -> np.ndarray:
+        """Draw detections and the per-frame statistics overlay of the video analysis"""
+        area_stats = frame_data['area_stats']
+        yield_stats = frame_data['yield_stats']
+        annotated_frame = self.draw_detections(frame, frame_data['detections'])
+        
+        # Add statistics overlay
+        stats_text = [
+            f"Frame: {frame_data['frame_number']}/{total_frames}",
+            f"Good Crop: {area_stats['good_crop_percentage']:.1f}%",
+            f"Bad Crop: {area_stats['bad_crop_percentage']:.1f}%",
+            f"Weeds: {area_stats['weed_percentage']:.1f}%",
+            f"Est. Yield: {yield_stats['yield_percentage']:.1f}%"
+        ]
+        
+        y_offset = 30
+        for text in stats_text:
+            cv2.putText(annotated_frame, text, (10, y_offset),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            y_offset += 25
+        
+        return annotated_frame
+    
     def process_video_file(self,
                           video_path: str,
                           output_dir: str = "drone_analysis",
                           frame_skip: int = 1,
                           save_annotated_video: bool = True,
-                          save_curated_images: bool = True) -> Dict:
+                          save_curated_images: bool = True,
+                          sampler: Optional[AdaptiveFrameSampler] = None,
+                          sample_interval: Optional[float] = None,
+                          seek_threshold: Optional[int] = None,
+                          queue_size: int = 8,
+                          lazy_curation: bool = True,
+                          workers: int = 1,
+                          checkpoint_interval: Optional[float] = None,
+                          resume: bool = True) -> Dict:
         """
         Process drone video file with complete analysis
         
+        Decoding, inference and annotation/encoding run as a pipeline on
+        separate threads connected by bounded queues, so they overlap on
+        different frames. Frames still come out in video order.
+        
         Args:
             video_path: Path to input video file
             output_dir: Directory to save all outputs
             frame_skip: Process every Nth frame (1 = all frames)
             save_annotated_video: Whether to save annotated video
             save_curated_images: Whether to save curated images
+            sampler: Motion-aware sampler choosing the frames to analyze
+                     (replaces frame_skip when given)
+            sample_interval: Analyze one frame per this many seconds of video
+                             (replaces frame_skip when given)
+            seek_threshold: Seek to the next analyzed frame instead of grabbing
+                            the skipped ones when at least this many are skipped
+            queue_size: Frames buffered between pipeline stages
+            lazy_curation: Without an annotated video, skip drawing during the
+                           pass and re-read only the curated frames afterwards
+            workers: Run the models in this many worker processes, each on its own
+                     range of the video (not with sampler). Plants are not tracked,
+                     so the report matches a single-process run without tracking.
+            checkpoint_interval: Save a checkpoint in output_dir every this many
+                                 seconds (default: no checkpoints)
+            resume: Continue from a checkpoint of an earlier, interrupted run on
+                    the same video with the same settings. The plant tracker and
+                    the motion sampler continue from their state at the checkpoint.
             
         Returns:
             Dictionary with complete analysis results
         """
-        os.makedirs(output_dir, exist_ok=True)
-        base_name = Path(video_path).stem
-        
-        print(f"🚁 Processing drone video: {video_path}")
-        
-        # Open video
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
-        
-        # Get video properties
-        fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        print(f"📹 Video: {width}x{height} @ {fps} FPS, {total_frames} frames")
-        
-        # Setup video writer
-        video_writer = None
-        if save_annotated_video:
-            output_video_path = os.path.join(output_dir, f"{base_name}_annotated.mp4")
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-            print(f"💾 Saving annotated video to: {output_video_path}")
-        
-        # Process frames
-        all_frame_data = []
-        frame_count = 0
-        processed_frames = 0
-        
-        # Accumulate statistics
-        total_good_area = 0.0
-        total_bad_area = 0.0
-        total_weed_area = 0.0
-        total_yield = 0.0
+        return VideoAnalysisJob(
+            self, video_path, output_dir,
+            frame_skip=frame_skip,
+            save_annotated_video=save_annotated_video,
+            save_curated_images=save_curated_images,
+            sampler=sampler,
+            sample_interval=sample_interval,
+            seek_threshold=seek_threshold,
+            queue_size=queue_size,
+            lazy_curation=lazy_curation,
+            workers=workers,
+            checkpoint_interval=checkpoint_interval,
+            resume=resume
+        ).run()
+    
+    def check_sharding_parity(self,
+                              video_path: str,
+                              workers: int = 2,
+                              frame_skip: int = 1,
+                              sample_interval: Optional[float] = None,
+                              seek_threshold: Optional[int] = None) -> Dict:
+        """
+        Compare the report of a sharded video analysis against a single-process run
         
-        print("\n🔄 Processing frames...")
-        start_time = time.time()
+        Both runs are made without plant tracking and crop cache, which the
+        worker processes do not use.
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Skip frames if needed
-            if frame_count % frame_skip != 0:
-                frame_count += 1
-                continue
-            
-            # Run all detections
-            detections = self.detect_all(frame)
-            
-            # Calculate area coverage
-            area_stats = self.calculate_area_coverage(detections, (height, width))
-            
-            # Estimate yield for this frame
-            yield_stats = self.estimate_yield(area_stats, detections)
-            
-            # Accumulate statistics
-            total_good_area += area_stats['good_crop_percentage']
-            total_bad_area += area_stats['bad_crop_percentage']
-            total_weed_area += area_stats['weed_percentage']
-            total_yield += yield_stats['estimated_yield_per_acre']
-            
-            # Draw detections on frame
-            annotated_frame = self.draw_detections(frame, detections)
-            
-            # Add statistics overlay
-            stats_text = [
-                f"Frame: {frame_count}/{total_frames}",
-                f"Good Crop: {area_stats['good_crop_percentage']:.1f}%",
-                f"Bad Crop: {area_stats['bad_crop_percentage']:.1f}%",
-                f"Weeds: {area_stats['weed_percentage']:.1f}%",
-                f"Est. Yield: {yield_stats['yield_percentage']:.1f}%"
-            ]
-            
-            y_offset = 30
-            for text in stats_text:
-                cv2.putText(annotated_frame, text, (10, y_offset),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                y_offset += 25
-            
-            # Save annotated frame to video
-            if video_writer:
-                video_writer.write(annotated_frame)
-            
-            # Store frame data for curation
-            all_frame_data.append({
-                'frame_number': frame_count,
-                'frame': frame.copy(),
-                'annotated_frame': annotated_frame.copy(),
-                'detections': detections,
-                'area_stats': area_stats,
-                'yield_stats': yield_stats
-            })
-            
-            processed_frames += 1
-            
-            # Progress update
-            if processed_frames % 30 == 0:
-                elapsed = time.time() - start_time
-                fps_actual = processed_frames / elapsed
-                remaining = (total_frames - frame_count) / (fps_actual * frame_skip) if fps_actual > 0 else 0
-                print(f"  Processed {processed_frames} frames ({processed_frames * 100 / (total_frames // frame_skip):.1f}%) - "
-                      f"ETA: {remaining:.1f}s")
-            
-            frame_count += 1
-        
-        cap.release()
-        if video_writer:
-            video_writer.release()
-            print(f"✅ Annotated video saved")
-        
-        # Calculate averages
-        avg_good = total_good_area / processed_frames if processed_frames > 0 else 0
-        avg_bad = total_bad_area / processed_frames if processed_frames > 0 else 0
-        avg_weed = total_weed_area / processed_frames if processed_frames > 0 else 0
-        avg_yield = total_yield / processed_frames if processed_frames > 0 else 0
-        
-        # Get curated images
-        print("\n📸 Selecting curated images...")
-        curated = self.get_curated_images(all_frame_data, top_n=5)
-        
-        # Save curated images
-        curated_dir = os.path.join(output_dir, "curated_images")
-        os.makedirs(curated_dir, exist_ok=True)
-        
-        if save_curated_images:
-            for i, frame_data in enumerate(curated['worst_infected']):
-                path = os.path.join(curated_dir, f"worst_infected_{i+1}_frame_{frame_data['frame_number']}.jpg")
-                cv2.imwrite(path, frame_data['annotated_frame'])
-            
-            for i, frame_data in enumerate(curated['most_weeds']):
-                path = os.path.join(curated_dir, f"most_weeds_{i+1}_frame_{frame_data['frame_number']}.jpg")
-                cv2.imwrite(path, frame_data['annotated_frame'])
-            
-            for i, frame_data in enumerate(curated['healthiest']):
-                path = os.path.join(curated_dir, f"healthiest_{i+1}_frame_{frame_data['frame_number']}.jpg")
-                cv2.imwrite(path, frame_data['annotated_frame'])
+        Args:
+            video_path: Path to a (short) sample video
+            workers: Number of worker processes of the sharded run
+            frame_skip: Process every Nth frame
+            sample_interval: Analyze one frame per this many seconds instead
+            seek_threshold: See FrameGrabber
             
-            print(f"✅ Saved {len(curated['worst_infected']) + len(curated['most_weeds']) + len(curated['healthiest'])} curated images")
-        
-        # Generate summary report
-        report = {
-            'video_path': video_path,
-            'video_info': {
-                'width': width,
-                'height': height,
-                'fps': fps,
-                'total_frames': total_frames,
-                'processed_frames': processed_frames
-            },
-            'area_coverage': {
-                'good_crop_percentage': float(avg_good),
-                'bad_crop_percentage': float(avg_bad),
-                'weed_percentage': float(avg_weed),
-                'remaining_percentage': float(100 - avg_good - avg_bad - avg_weed)
-            },
-            'yield_estimation': {
-                'average_yield_per_acre': float(avg_yield),
-                'yield_percentage': float((avg_yield / 150.0) * 100) if avg_yield > 0 else 0,
-                'base_yield_per_acre': 150.0
-            },
-            'curated_images': {
-                'worst_infected_count': len(curated['worst_infected']),
-                'most_weeds_count': len(curated['most_weeds']),
-                'healthiest_count': len(curated['healthiest']),
-                'curated_dir': curated_dir
-            },
-            'detection_summary': {
-                'total_weeds_detected': sum(len(f['detections']['weeds']) for f in all_frame_data),
-                'total_pests_detected': sum(len(f['detections']['pests']) for f in all_frame_data),
-                'total_diseases_detected': sum(len(f['detections']['diseases']) for f in all_frame_data),
-                'avg_weeds_per_frame': sum(len(f['detections']['weeds']) for f in all_frame_data) / processed_frames if processed_frames > 0 else 0,
-                'avg_pests_per_frame': sum(len(f['detections']['pests']) for f in all_frame_data) / processed_frames if processed_frames > 0 else 0,
-                'avg_diseases_per_frame': sum(len(f['detections']['diseases']) for f in all_frame_data) / processed_frames if processed_frames > 0 else 0
-            },
-            'output_files': {
-                'annotated_video': os.path.join(output_dir, f"{base_name}_annotated.mp4") if save_annotated_video else None,
-                'curated_images_dir': curated_dir,
-                'report_json': os.path.join(output_dir, f"{base_name}_report.json")
-            }
-        }
-        
-        # Save report as JSON
-        report_path = report['output_files']['report_json']
-        with open(report_path, 'w') as f:
-            json.dump(report, f, indent=2)
-        
-        print(f"\n📊 Analysis Complete!")
-        print(f"   Good Crop: {avg_good:.2f}%")
-        print(f"   Bad Crop: {avg_bad:.2f}%")
-        print(f"   Weeds: {avg_weed:.2f}%")
-        print(f"   Estimated Yield: {avg_yield:.2f} bushels/acre ({report['yield_estimation']['yield_percentage']:.1f}% of base)")
-        print(f"\n📄 Full report saved to: {report_path}")
+        Returns:
+            Dictionary with the compared report sections, the ones that
+            differ and an overall 'passed' flag
+        """
+        sections = ('video_info', 'area_coverage', 'yield_estimation', 'detection_summary')
+        track_plants, crop_cache = self.track_plants, self.crop_cache
+        self.track_plants, self.crop_cache = False, None
+        try:
+            reports = {}
+            with tempfile.TemporaryDirectory() as output_dir:
+                for run_workers in (1, workers):
+                    report = self.process_video_file(
+                        video_path, os.path.join(output_dir, f"workers_{run_workers}"),
+                        frame_skip=frame_skip, save_annotated_video=False, save_curated_images=False,
+                        sample_interval=sample_interval, seek_threshold=seek_threshold,
+                        workers=run_workers
+                    )
+                    reports[run_workers] = {section: report[section] for section in sections}
+        finally:
+            self.track_plants, self.crop_cache = track_plants, crop_cache
         
-        return report
+        mismatched = [section for section in sections
+                      if reports[1][section] != reports[workers][section]]
+        return {
+            'workers': workers,
+            'compared_sections': list(sections),
+            'mismatched_sections': mismatched,
+            'passed': not mismatched
+        }
 
 
 def main():
@@ -865,7 +1532,7 @@ def main():
         '--disease-model',
         type=str,
         required=True,
-        help='Path to disease classification TensorFlow model directory'
+        help='Path to disease classification TensorFlow model directory (or .tflite model)'
     )
     parser.add_argument(
         '--image',
@@ -889,6 +1556,49 @@ def main():
         default=1,
         help='Process every Nth frame for video analysis (default: 1 = all frames)'
     )
+    parser.add_argument(
+        '--sample-interval',
+        type=float,
+        default=None,
+        help='Analyze one frame per this many seconds of video instead of --frame-skip'
+    )
+    parser.add_argument(
+        '--seek-threshold',
+        type=int,
+        default=None,
+        help='Seek to the next analyzed frame when at least this many frames are skipped '
+             '(default: grab every skipped frame)'
+    )
+    parser.add_argument(
+        '--adaptive-skip',
+        action='store_true',
+        help='Choose analyzed frames by scene motion instead of --frame-skip'
+    )
+    parser.add_argument(
+        '--min-interval',
+        type=int,
+        default=1,
+        help='Adaptive skip: minimum frames between analyzed frames (default: 1)'
+    )
+    parser.add_argument(
+        '--max-interval',
+        type=int,
+        default=15,
+        help='Adaptive skip: maximum frames between analyzed frames (default: 15)'
+    )
+    parser.add_argument(
+        '--motion-method',
+        type=str,
+        choices=list(MOTION_METHODS),
+        default='diff',
+        help='Adaptive skip: frame differencing or optical flow (default: diff)'
+    )
+    parser.add_argument(
+        '--motion-threshold',
+        type=float,
+        default=None,
+        help='Adaptive skip: scene change that triggers analysis (default: 8 for diff, 1 px for flow)'
+    )
     parser.add_argument(
         '--output-dir',
         type=str,
@@ -919,6 +1629,119 @@ def main():
         default=0.25,
         help='Confidence threshold (default: 0.25)'
     )
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Run models concurrently and overlap disease classification with detection'
+    )
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=None,
+        help='Total thread budget shared by all models in parallel mode (default: all cores)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Split video analysis between this many worker processes (default: 1); '
+             'plants are not tracked with more than one'
+    )
+    parser.add_argument(
+        '--check-sharding',
+        action='store_true',
+        help='Compare a --workers run against a single-process run on --video and exit'
+    )
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=float,
+        default=None,
+        help='Save a resumable checkpoint of video analysis every N seconds (default: off)'
+    )
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='Start video analysis from frame 0 even if a checkpoint exists'
+    )
+    parser.add_argument(
+        '--backend',
+        type=str,
+        choices=YOLO_BACKENDS,
+        default='torch',
+        help='Inference runtime for the YOLO models (default: torch)'
+    )
+    parser.add_argument(
+        '--check-parity',
+        action='store_true',
+        help='Compare the selected backend against torch on --image and exit'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Frames per batched YOLO inference call for video analysis (default: 8)'
+    )
+    parser.add_argument(
+        '--tile-size',
+        type=int,
+        default=None,
+        help='Run YOLO on overlapping full-resolution tiles of this size, e.g. 640 (default: no tiling)'
+    )
+    parser.add_argument(
+        '--tile-overlap',
+        type=float,
+        default=0.2,
+        help='Fraction of a tile shared with its neighbour (default: 0.2)'
+    )
+    parser.add_argument(
+        '--max-tiles',
+        type=int,
+        default=None,
+        help='Maximum tiles per frame; larger tiles are used to stay within it (default: unlimited)'
+    )
+    parser.add_argument(
+        '--latency-target',
+        type=float,
+        default=None,
+        help='Per-frame latency target in ms; YOLO input sizes adapt to hold it (default: off)'
+    )
+    parser.add_argument(
+        '--imgsz-choices',
+        type=int,
+        nargs='+',
+        default=list(DEFAULT_IMGSZ_CHOICES),
+        help='Input sizes allowed with --latency-target (default: 320 416 512 640)'
+    )
+    parser.add_argument(
+        '--crop-cache',
+        type=str,
+        default=None,
+        metavar='PATH',
+        help='Cache plant crop classifications in this file, reused between runs over the same field'
+    )
+    parser.add_argument(
+        '--crop-cache-size',
+        type=int,
+        default=10000,
+        help='Maximum number of cached crop classifications (default: 10000)'
+    )
+    parser.add_argument(
+        '--crop-cache-distance',
+        type=int,
+        default=2,
+        help='Hamming distance between crop hashes still treated as the same crop (default: 2)'
+    )
+    parser.add_argument(
+        '--no-tracking',
+        action='store_true',
+        help='Classify every plant in every video frame instead of once per tracked plant'
+    )
+    parser.add_argument(
+        '--reclassify-every',
+        type=int,
+        default=15,
+        help='Processed frames after which a tracked plant is classified again (default: 15)'
+    )
     parser.add_argument(
         '--save-video',
         action='store_true',
@@ -932,6 +1755,9 @@ def main():
     
     args = parser.parse_args()
     
+    if args.workers > 1 and args.adaptive_skip:
+        parser.error('--workers cannot be combined with --adaptive-skip')
+    
     # Load class names if provided
     disease_class_names = None
     if args.classes:
@@ -941,6 +1767,16 @@ def main():
         else:
             disease_class_names = [name.strip() for name in args.classes.split(',')]
     
+    # Crop classification cache, persisted between runs when a path is given
+    crop_cache = None
+    if args.crop_cache:
+        crop_cache = CropClassificationCache(
+            max_size=args.crop_cache_size,
+            max_distance=args.crop_cache_distance,
+            path=args.crop_cache,
+            model_id=os.path.realpath(args.disease_model)
+        )
+    
     # Initialize detector
     detector = UnifiedAgriculturalDetector(
         weed_model_path=args.weed_model,
@@ -948,8 +1784,41 @@ def main():
         disease_model_path=args.disease_model,
         disease_class_names=disease_class_names,
         conf_threshold=args.conf,
-        plant_detector_model=args.plant_detector
+        plant_detector_model=args.plant_detector,
+        parallel=args.parallel,
+        max_threads=args.threads,
+        batch_size=args.batch_size,
+        backend=args.backend,
+        tile_size=args.tile_size,
+        tile_overlap=args.tile_overlap,
+        max_tiles=args.max_tiles,
+        latency_target_ms=args.latency_target,
+        allowed_imgsz=tuple(args.imgsz_choices),
+        track_plants=not args.no_tracking,
+        reclassify_every=args.reclassify_every,
+        crop_cache=crop_cache
     )
+    configure_torch_threads(detector.init_kwargs)
+    
+    if args.check_parity:
+        if not args.image:
+            parser.error('--check-parity requires --image')
+        image = cv2.imread(args.image)
+        if image is None:
+            raise ValueError(f"Could not load image: {args.image}")
+        parity = detector.check_backend_parity(image)
+        print(json.dumps(parity, indent=2))
+        return
+    
+    if args.check_sharding:
+        if not args.video or args.workers < 2:
+            parser.error('--check-sharding requires --video and --workers of at least 2')
+        parity = detector.check_sharding_parity(args.video, args.workers,
+                                                frame_skip=args.frame_skip,
+                                                sample_interval=args.sample_interval,
+                                                seek_threshold=args.seek_threshold)
+        print(json.dumps(parity, indent=2))
+        return
     
     # Process image, video file, or live video
     if args.image:
@@ -965,7 +1834,18 @@ def main():
             output_dir=args.output_dir,
             frame_skip=args.frame_skip,
             save_annotated_video=True,
-            save_curated_images=True
+            save_curated_images=True,
+            sampler=AdaptiveFrameSampler(
+                min_interval=args.min_interval,
+                max_interval=args.max_interval,
+                motion_threshold=args.motion_threshold,
+                method=args.motion_method
+            ) if args.adaptive_skip else None,
+            sample_interval=args.sample_interval,
+            seek_threshold=args.seek_threshold,
+            workers=args.workers,
+            checkpoint_interval=args.checkpoint_interval,
+            resume=not args.no_resume
         )
         print(f"\n✅ Video analysis complete! Check {args.output_dir} for results.")
     else:
@@ -986,6 +1866,11 @@ def main():
             save_video=args.save_video,
             output_path=output_path
         )
+    
+    if crop_cache is not None:
+        crop_cache.save()
+        stats = crop_cache.stats()
+        print(f"💾 Crop cache: {stats['size']} entries, {stats['hit_rate']:.1%} hit rate - saved to {args.crop_cache}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,265 @@
+"""
+Checkpoints for resumable video analysis
+A long video job periodically writes its progress (next frame to read,
+running aggregates, curated frames, partial detections) to a checkpoint file
+in its output directory. The file is keyed by a hash of the video content and
+the analysis settings, so a restarted job on the same video resumes from the
+last checkpoint instead of frame 0. Checkpoints are plain JSON built from the
+state() methods of the job's components, so loading one never runs code.
+
+The annotated video is written as MP4 segments that are closed at every
+checkpoint and joined into the output video when the job finishes, since a
+half-written MP4 cannot be appended to.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from detection_set import FrameDetections, LabelVocabulary
+
+
+CHECKPOINT_FILE_VERSION = 4
+
+# Video hash: file size plus this many evenly spaced chunks of the file
+HASH_SAMPLES = 16
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def video_hash(video_path: str) -> str:
+    """
+    Content hash of a video file
+
+    Only the size and a few evenly spaced chunks are read, so hashing a
+    multi-gigabyte flight takes milliseconds; an upload of the same video
+    under another name gets the same hash.
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(video_path, 'rb') as f:
+        if size <= HASH_SAMPLES * HASH_CHUNK_BYTES:
+            digest.update(f.read())
+        else:
+            for i in range(HASH_SAMPLES):
+                f.seek((size - HASH_CHUNK_BYTES) * i // (HASH_SAMPLES - 1))
+                digest.update(f.read(HASH_CHUNK_BYTES))
+    return digest.hexdigest()
+
+
+def frame_data_state(frame_data: Dict) -> Dict:
+    """JSON form of a frame dictionary with detections (see frame_data_from_state)"""
+    return {**frame_data, 'detections': frame_data['detections'].state()}
+
+
+def frame_data_from_state(state: Dict, vocabulary: LabelVocabulary) -> Dict:
+    """Recreate a frame dictionary from frame_data_state(), with disease labels in vocabulary"""
+    return {**state, 'detections': FrameDetections.from_state(state['detections'], vocabulary)}
+
+
+class JobCheckpoint:
+    """Checkpoint file of one video job in an output directory"""
+
+    def __init__(self, output_dir: str, video_hash: str, settings: Dict):
+        """
+        Initialize the checkpoint
+
+        Args:
+            output_dir: Directory the checkpoint (and video segments) are written to
+            video_hash: Hash of the video (see video_hash())
+            settings: Analysis settings that change the results (JSON-serializable);
+                      a checkpoint written with different settings is ignored
+        """
+        self.output_dir = output_dir
+        self.video_hash = video_hash
+        # As read back from the file (tuples become lists)
+        self.settings = json.loads(json.dumps(settings))
+        self.path = os.path.join(output_dir, f"checkpoint_{video_hash[:16]}.json")
+        self.segment_dir = os.path.join(output_dir, f"checkpoint_{video_hash[:16]}_segments")
+        self.saves = 0
+
+    def load(self) -> Optional[Dict]:
+        """
+        Read the saved job state
+
+        Returns:
+            State passed to save(), or None if there is no usable checkpoint
+        """
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+        if not isinstance(data, dict) or data.get('version') != CHECKPOINT_FILE_VERSION:
+            print(f"⚠️  Ignoring checkpoint with unsupported version: {self.path}")
+            return None
+        if data.get('video_hash') != self.video_hash or data.get('settings') != self.settings:
+            print(f"⚠️  Ignoring checkpoint written with different settings: {self.path}")
+            return None
+        return data['state']
+
+    def save(self, state: Dict) -> str:
+        """
+        Write the job state (atomically, so a crash keeps the previous checkpoint)
+
+        Args:
+            state: JSON-serializable job state
+
+        Returns:
+            Path of the written file
+        """
+        data = {
+            'version': CHECKPOINT_FILE_VERSION,
+            'video_hash': self.video_hash,
+            'settings': self.settings,
+            'state': state
+        }
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.saves += 1
+        return self.path
+
+    def clear(self):
+        """Remove the checkpoint and its video segments (after the job finished)"""
+        for path in (self.path, f"{self.path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(self.segment_dir, ignore_errors=True)
+
+
+class SegmentedVideoWriter:
+    """VideoWriter replacement that writes MP4 segments and joins them on release()"""
+
+    def __init__(self,
+                 output_path: str,
+                 fps: float,
+                 size: Tuple[int, int],
+                 segment_dir: str,
+                 segments: Optional[List[str]] = None):
+        """
+        Initialize the writer
+
+        Args:
+            output_path: Final video file (MP4)
+            fps: Frame rate
+            size: (width, height) of the frames
+            segment_dir: Directory for the segment files
+            segments: Finished segments of an earlier run to continue after
+        """
+        self.output_path = output_path
+        self.fps = fps
+        self.size = size
+        self.segment_dir = segment_dir
+        self.segments: List[str] = list(segments or [])
+
+        self._writer: Optional[cv2.VideoWriter] = None
+        self._segment_path: Optional[str] = None
+        self._segment_frames = 0
+
+    def write(self, frame: np.ndarray):
+        if self._writer is None:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            self._segment_path = os.path.join(self.segment_dir, f"segment_{len(self.segments):05d}.mp4")
+            self._writer = open_video_writer(self._segment_path, self.fps, self.size)
+            self._segment_frames = 0
+        self._writer.write(frame)
+        self._segment_frames += 1
+
+    def finish_segment(self) -> List[str]:
+        """
+        Close the current segment (call before saving a checkpoint)
+
+        Returns:
+            Finished segments, to store in the checkpoint
+        """
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+            if self._segment_frames:
+                self.segments.append(self._segment_path)
+        return list(self.segments)
+
+    def release(self):
+        """Join all segments into the output video (without re-encoding) and delete them"""
+        self.finish_segment()
+        if len(self.segments) == 1:
+            os.replace(self.segments[0], self.output_path)
+        elif self.segments:
+            concat_videos(self.segments, self.output_path)
+            for segment_path in self.segments:
+                os.remove(segment_path)
+        self.segments = []
+
+
+def open_video_writer(path: str, fps: float, size: Tuple[int, int]) -> cv2.VideoWriter:
+    """
+    Open an MP4 (mp4v) video writer
+
+    Raises:
+        IOError: If OpenCV cannot write the file (missing codec, bad path)
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    if not writer.isOpened():
+        raise IOError(f"Could not open video writer: {path}")
+    return writer
+
+
+def concat_videos(paths: List[str], output_path: str):
+    """
+    Join MP4 files of the same codec and size into one
+
+    The streams are copied by ffmpeg's concat demuxer, so nothing is decoded
+    or re-encoded. Without ffmpeg on the PATH the frames are decoded and
+    written again, which is slower and loses quality.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is not None:
+        list_path = f"{output_path}.segments.txt"
+        with open(list_path, 'w') as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        try:
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                            '-i', list_path, '-c', 'copy', output_path], check=True)
+        finally:
+            os.remove(list_path)
+        return
+
+    print("⚠️  ffmpeg not found, re-encoding video segments to join them")
+    cap = cv2.VideoCapture(paths[0])
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    writer = open_video_writer(output_path, fps, size)
+    try:
+        for path in paths:
+            cap = cv2.VideoCapture(path)
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        writer.release()
@@ -0,0 +1,587 @@
+"""
+Drone video analysis job
+A VideoAnalysisJob is one run of process_video_file. Decoding, inference
+and annotation/encoding of different frames run as pipeline stages on
+separate threads; the job's running state is checkpointed so that an
+interrupted run can be resumed.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from farm_report import FarmReportAccumulator
+from frame_curation import FrameCurator
+from frame_sampler import AdaptiveFrameSampler, FrameGrabber, seek_frame
+from plant_tracker import PlantTracker
+from sharded_video import ShardedVideoDetector, merge_sampling_stats, merge_tracking_stats
+from video_checkpoint import (JobCheckpoint, SegmentedVideoWriter, frame_data_from_state, frame_data_state,
+                              open_video_writer, video_hash)
+from video_pipeline import PipelineStage, format_stage_stats
+
+
+class VideoAnalysisJob:
+    """Analysis of one drone video (see UnifiedAgriculturalDetector.process_video_file)"""
+
+    def __init__(self,
+                 detector,
+                 video_path: str,
+                 output_dir: str = "drone_analysis",
+                 frame_skip: int = 1,
+                 save_annotated_video: bool = True,
+                 save_curated_images: bool = True,
+                 sampler: Optional[AdaptiveFrameSampler] = None,
+                 sample_interval: Optional[float] = None,
+                 seek_threshold: Optional[int] = None,
+                 queue_size: int = 8,
+                 lazy_curation: bool = True,
+                 workers: int = 1,
+                 checkpoint_interval: Optional[float] = None,
+                 resume: bool = True):
+        """
+        Initialize the job; the video is opened by run()
+
+        Args:
+            detector: UnifiedAgriculturalDetector running the models
+            Other arguments: see UnifiedAgriculturalDetector.process_video_file
+        """
+        if workers > 1 and sampler is not None:
+            raise ValueError("Sharded analysis (workers > 1) does not support the motion sampler")
+
+        self.detector = detector
+        self.video_path = video_path
+        self.output_dir = output_dir
+        self.base_name = Path(video_path).stem
+        self.frame_skip = frame_skip
+        self.save_annotated_video = save_annotated_video
+        self.save_curated_images = save_curated_images
+        self.sampler = sampler
+        self.sample_interval = sample_interval
+        self.seek_threshold = seek_threshold
+        self.queue_size = queue_size
+        self.workers = workers
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        # Without an annotated video, frames only need drawing if they are curated
+        self.render_curated_later = lazy_curation and not save_annotated_video
+
+        # Video properties (read by run())
+        self.cap = None
+        self.fps = 30
+        self.width = 0
+        self.height = 0
+        self.total_frames = 0
+
+        # Running state of the pass (saved in checkpoints). Curated frames are
+        # selected on the fly so only the current top frames are kept in memory
+        self.start_frame = 0
+        self.processed_frames = 0
+        self.farm_report = FarmReportAccumulator()
+        self.curator = FrameCurator(top_n=5)
+        # Plant ids continue after the ones used before the checkpoint
+        self.next_track_id = 0
+        self.tracker = None
+        self.grabber = None
+        self.sharded = None
+        # Statistics of the parts of the video before the checkpoint that are
+        # not contained in the resumed tracker/sampler
+        self.tracking_before = None
+        self.frame_sampling_before = None
+
+        self.checkpoint = None
+        self.resume_state = None
+        self.video_writer = None
+        # Set on the annotate thread when a checkpoint is due; the decode and
+        # inference threads then attach their state to the frames they pass on
+        self.checkpoint_due = threading.Event()
+
+    def run(self) -> Dict:
+        """
+        Process the video and save the report, annotated video and curated images
+
+        Returns:
+            Dictionary with complete analysis results
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        print(f"🚁 Processing drone video: {self.video_path}")
+
+        self._open_video()
+        try:
+            self._open_checkpoint()
+            self._open_writer()
+            self._setup_detection()
+            if self.resume_state is not None:
+                self._restore(self.resume_state)
+            self._process_frames()
+        finally:
+            self.cap.release()
+
+        if self.video_writer:
+            self.video_writer.release()
+            print(f"✅ Annotated video saved")
+        return self._finish()
+
+    def _open_video(self):
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video file: {self.video_path}")
+
+        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 30
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        print(f"📹 Video: {self.width}x{self.height} @ {self.fps} FPS, {self.total_frames} frames")
+
+    def _open_checkpoint(self):
+        """Create the job's checkpoint and load the state of an earlier run"""
+        if not self.checkpoint_interval:
+            return
+
+        # Checkpoints are keyed by the video content and everything that changes the results
+        sampler = self.sampler
+        self.checkpoint = JobCheckpoint(self.output_dir, video_hash(self.video_path), {
+            'job': 'process_video_file',
+            'detector': self.detector.checkpoint_settings(),
+            'frame_skip': self.frame_skip,
+            'sample_interval': self.sample_interval,
+            'sampler': (sampler.method, sampler.min_interval, sampler.max_interval,
+                        sampler.motion_threshold) if sampler is not None else None,
+            'save_annotated_video': self.save_annotated_video
+        })
+        if self.resume:
+            self.resume_state = self.checkpoint.load()
+        if self.resume_state is not None:
+            self.start_frame = self.resume_state['next_frame']
+            print(f"♻️  Resuming from checkpoint: frame {self.start_frame}, "
+                  f"{self.resume_state['processed_frames']} frames already processed")
+
+    def _open_writer(self):
+        if not self.save_annotated_video:
+            return
+
+        output_video_path = os.path.join(self.output_dir, f"{self.base_name}_annotated.mp4")
+        size = (self.width, self.height)
+        if self.checkpoint is not None:
+            # Written in segments that survive an interruption
+            segments = self.resume_state['video_segments'] if self.resume_state is not None else None
+            self.video_writer = SegmentedVideoWriter(output_video_path, self.fps, size,
+                                                     self.checkpoint.segment_dir, segments=segments)
+        else:
+            self.video_writer = open_video_writer(output_video_path, self.fps, size)
+        print(f"💾 Saving annotated video to: {output_video_path}")
+
+    def _setup_detection(self):
+        """Create the frame grabber and the plant tracker or worker processes"""
+        # Fixed-step and time-based sampling skip frames without decoding them;
+        # the motion sampler needs every frame
+        if self.sampler is None:
+            self.grabber = FrameGrabber(self.cap, frame_skip=self.frame_skip,
+                                        interval_seconds=self.sample_interval,
+                                        seek_threshold=self.seek_threshold, start_frame=self.start_frame)
+
+        # Plants are tracked across the sampled frames, either here or in worker
+        # processes (one video range each, without tracking, since a track
+        # cannot span two ranges)
+        if self.workers > 1:
+            if self.detector.new_tracker() is not None:
+                print("⚠️  Plant tracking is off when the video is split between workers")
+            init_kwargs = self.detector.init_kwargs
+            self.sharded = ShardedVideoDetector(init_kwargs, self.workers,
+                                                max_threads=init_kwargs['max_threads'])
+        else:
+            self.tracker = self.detector.new_tracker()
+
+    def _restore(self, state: Dict):
+        """Continue from the state saved in a checkpoint"""
+        self.processed_frames = state['processed_frames']
+        self.farm_report = FarmReportAccumulator.from_snapshot(state['farm_report'])
+        self.next_track_id = state['next_track_id']
+        # Curated frames come back without images; they are rendered after the pass
+        vocabulary = self.detector.disease_labels
+        self.curator = FrameCurator.from_state(
+            state['curator'], lambda frame_state: frame_data_from_state(frame_state, vocabulary))
+
+        if self.sampler is not None:
+            # The sampler continues exactly where it stopped
+            self.sampler = AdaptiveFrameSampler.from_state(state['sampler'])
+        else:
+            self.frame_sampling_before = state['frame_sampling']
+
+        if self.tracker is not None and state['tracker'] is not None:
+            self.tracker = PlantTracker.from_state(state['tracker'])
+            self.tracking_before = state['tracking_before']
+        else:
+            self.tracking_before = state['tracking']
+            if self.tracker is not None:
+                self.tracker.next_track_id = self.next_track_id
+
+    def decode(self) -> Iterator[Tuple[int, np.ndarray, Optional[Dict]]]:
+        """
+        Read the sampled frames (decode thread)
+
+        Yields:
+            (frame_number, image, state) where state is the sampling state
+            right after the frame while a checkpoint is due, otherwise None
+        """
+        if self.grabber is not None:
+            for frame_number, frame in self.grabber:
+                state = {'frame_sampling': self.grabber.stats()} if self.checkpoint_due.is_set() else None
+                yield frame_number, frame, state
+            return
+
+        frame_number = seek_frame(self.cap, self.start_frame)
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            if self.sampler.should_process(frame_number, frame):
+                state = None
+                if self.checkpoint_due.is_set():
+                    state = {'sampler': self.sampler.state(), 'frame_sampling': self.sampler.stats()}
+                yield frame_number, frame, state
+            frame_number += 1
+
+    def infer(self,
+              decoded: Optional[Iterable[Tuple[int, np.ndarray, Optional[Dict]]]]
+              ) -> Iterator[Tuple[int, np.ndarray, Dict, Dict, Dict, Optional[Dict]]]:
+        """
+        Run the models on the decoded frames (inference thread)
+
+        Args:
+            decoded: Output of decode(); may be None in sharded analysis when
+                     frames are not drawn during the pass
+
+        Yields:
+            (frame_number, image, detections, area_stats, yield_stats, state)
+            where state is the complete checkpoint state right after the
+            frame (sampling and tracker), or None
+        """
+        # Sampling states of the frames waiting in the current inference batch;
+        # only used on this thread
+        pending = {}
+
+        def frames():
+            for frame_number, frame, state in decoded:
+                if state is not None:
+                    pending[frame_number] = state
+                yield frame_number, frame
+
+        # The tracker is updated a batch at a time; its state matches a
+        # frame only if that frame is the last one it has seen
+        tracker = self.tracker
+        tracked_frames = tracker.frame_index + 1 if tracker is not None else 0
+        for frame_count, frame, detections in self._detect(frames() if decoded is not None else None):
+            tracked_frames += 1
+            state = pending.pop(frame_count, None)
+            if state is not None and (tracker is None or tracker.frame_index + 1 == tracked_frames):
+                state['tracker'] = tracker.state() if tracker is not None else None
+                state['tracking'] = tracker.stats() if tracker is not None else None
+            else:
+                state = None
+
+            # Calculate area coverage
+            area_stats = self.detector.calculate_area_coverage(detections, (self.height, self.width))
+
+            # Estimate yield for this frame
+            yield_stats = self.detector.estimate_yield(area_stats, detections)
+            yield frame_count, frame, detections, area_stats, yield_stats, state
+
+    def _detect(self, frames: Optional[Iterable[Tuple[int, np.ndarray]]]):
+        """Detections of the sampled frames, from this process or the worker processes"""
+        if self.sharded is None:
+            yield from self.detector.detect_stream(frames, tracker=self.tracker)
+            return
+
+        # Frames are decoded here only if they are drawn during the pass
+        frames = iter(frames) if frames is not None else None
+        for frame_count, detections in self.sharded.detect(self.video_path, self.frame_skip,
+                                                           self.sample_interval, self.seek_threshold,
+                                                           self.detector.disease_labels,
+                                                           start_frame=self.start_frame):
+            frame = None
+            if frames is not None:
+                frame_number, frame = next(frames)
+                if frame_number != frame_count:
+                    raise RuntimeError(f"Decoded frame {frame_number} does not match "
+                                       f"worker result for frame {frame_count}")
+            yield frame_count, frame, detections
+
+    def annotate(self,
+                 frame_count: int,
+                 frame: Optional[np.ndarray],
+                 detections: Dict,
+                 area_stats: Dict,
+                 yield_stats: Dict):
+        """Add an analyzed frame to the report, annotated video and curated frames (annotate thread)"""
+        # Accumulate statistics
+        self.farm_report.add(detections, area_stats, yield_stats)
+        if len(detections['diseases']):
+            self.next_track_id = max(self.next_track_id, int(detections['diseases'].plant_ids.max()) + 1)
+
+        frame_data = {
+            'frame_number': frame_count,
+            'detections': detections,
+            'area_stats': area_stats,
+            'yield_stats': yield_stats
+        }
+
+        if self.render_curated_later:
+            # Only the frame number and detections are kept; curated
+            # frames are decoded and annotated again after the pass
+            self.curator.offer(frame_data, dict)
+        else:
+            # Draw detections and statistics on frame
+            annotated_frame = self.detector.annotate_video_frame(frame, frame_data, self.total_frames)
+
+            # Save annotated frame to video
+            if self.video_writer:
+                self.video_writer.write(annotated_frame)
+
+            # Offer frame for curation (images are copied only if it is kept)
+            self.curator.offer(
+                frame_data,
+                lambda: {'frame': frame.copy(), 'annotated_frame': annotated_frame.copy()}
+            )
+
+        self.processed_frames += 1
+
+    def save_checkpoint(self, next_frame: int, state: Optional[Dict]):
+        """
+        Save the job's progress up to next_frame (annotate thread)
+
+        Args:
+            next_frame: First frame not yet added by annotate()
+            state: Sampling and tracker state the inference stage attached to
+                   frame next_frame - 1 (None in sharded analysis)
+        """
+        checkpoint_tracker = None
+        checkpoint_sampler = None
+        if state is None:
+            # Sharded: shards still running are not counted yet
+            frame_sampling = self.frame_sampling_stats()
+            if frame_sampling is not None:
+                frame_sampling.update(frames_seen=next_frame,
+                                      frames_analyzed=self.processed_frames,
+                                      frames_skipped=next_frame - self.processed_frames)
+        elif 'sampler' in state:
+            checkpoint_sampler = state['sampler']
+            frame_sampling = state['frame_sampling']
+        else:
+            frame_sampling = merge_sampling_stats([self.frame_sampling_before, state['frame_sampling']])
+        tracking = self.tracking_before
+        if state is not None and state['tracker'] is not None:
+            checkpoint_tracker = state['tracker']
+            tracking = merge_tracking_stats([self.tracking_before, state['tracking']])
+        self.checkpoint.save({
+            'next_frame': next_frame,
+            'processed_frames': self.processed_frames,
+            'farm_report': self.farm_report.snapshot(),
+            'next_track_id': self.next_track_id,
+            'curator': self.curator.state(frame_data_state),
+            'tracker': checkpoint_tracker,
+            'tracking_before': self.tracking_before,
+            'tracking': tracking,
+            'sampler': checkpoint_sampler,
+            'frame_sampling': frame_sampling,
+            'video_segments': self.video_writer.finish_segment() if self.video_writer is not None else None
+        })
+
+    def _process_frames(self):
+        """Run the decode -> inference -> annotate pipeline over the video"""
+        # The annotate stage runs on this thread; the decode queue holds at
+        # least two inference batches so batching never starves
+        decode_stage = None
+        if self.sharded is None or not self.render_curated_later:
+            decode_stage = PipelineStage('decode', self.decode(),
+                                         maxsize=max(self.queue_size, 2 * self.detector.batch_size))
+        inference_stage = PipelineStage('inference', self.infer(decode_stage),
+                                        maxsize=self.queue_size, upstream=decode_stage)
+        stages = [stage for stage in (decode_stage, inference_stage) if stage is not None]
+
+        print("\n🔄 Processing frames...")
+        resumed_frames = self.processed_frames
+        start_time = time.time()
+        last_checkpoint = start_time
+        try:
+            for frame_count, frame, detections, area_stats, yield_stats, state in inference_stage:
+                self.annotate(frame_count, frame, detections, area_stats, yield_stats)
+
+                # Checkpoints are saved at a frame that the sampler and tracker have
+                # seen exactly up to. The pipeline threads run ahead of this one, so
+                # once a checkpoint is due they attach their state to the frames they
+                # pass on, and it is saved at the first frame that has a complete state.
+                if self.checkpoint is not None and time.time() - last_checkpoint >= self.checkpoint_interval:
+                    self.checkpoint_due.set()
+                if self.checkpoint_due.is_set() and (self.sharded is not None or state is not None):
+                    self.save_checkpoint(frame_count + 1, state)
+                    self.checkpoint_due.clear()
+                    last_checkpoint = time.time()
+
+                # Progress update
+                if self.processed_frames % 30 == 0:
+                    self._print_progress(frame_count, stages, self.processed_frames - resumed_frames,
+                                         time.time() - start_time)
+        finally:
+            inference_stage.close()
+
+        elapsed = time.time() - start_time
+        print(f"  Pipeline: {format_stage_stats(stages, 'annotate', self.processed_frames - resumed_frames, elapsed)}")
+
+    def _print_progress(self, frame_count: int, stages: List[PipelineStage], frames_done: int, elapsed: float):
+        fps_actual = frames_done / elapsed
+        if self.sampler is not None:
+            # Sampling rate so far, since the sampler's interval varies
+            frames_per_sample = (frame_count + 1) / self.processed_frames
+            progress = (frame_count + 1) * 100 / max(1, self.total_frames)
+        else:
+            frames_per_sample = self.grabber.step
+            progress = self.processed_frames * 100 / max(1, self.total_frames / self.grabber.step)
+        remaining = (self.total_frames - frame_count) / (fps_actual * frames_per_sample) if fps_actual > 0 else 0
+        print(f"  Processed {self.processed_frames} frames ({progress:.1f}%) - "
+              f"ETA: {remaining:.1f}s")
+        print(f"    {format_stage_stats(stages, 'annotate', frames_done, elapsed)}")
+
+    def frame_sampling_stats(self) -> Optional[Dict]:
+        """Frame sampling statistics of the whole job so far"""
+        if self.sampler is not None:
+            return self.sampler.stats()
+        stats = self.sharded.frame_sampling_stats() if self.sharded is not None else self.grabber.stats()
+        return merge_sampling_stats([self.frame_sampling_before, stats])
+
+    def tracking_stats(self) -> Optional[Dict]:
+        """Plant tracking statistics of the whole job so far"""
+        stats = self.tracker.stats() if self.tracker is not None else None
+        return merge_tracking_stats([self.tracking_before, stats])
+
+    def render_curated_frames(self, curated: Dict[str, List[Dict]]):
+        """
+        Decode and annotate the curated frames after a pass that skipped drawing
+
+        Seeks to each selected frame (in frame order; frames curated in
+        several categories are read once) and adds 'frame' and
+        'annotated_frame' to its frame data. Frames that already have
+        their images are left alone.
+        """
+        selected = {}
+        for frames in curated.values():
+            for frame_data in frames:
+                if 'annotated_frame' not in frame_data:
+                    selected.setdefault(frame_data['frame_number'], []).append(frame_data)
+        if not selected:
+            return
+
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not reopen video file: {self.video_path}")
+
+        position = 0
+        can_seek = True
+        try:
+            for frame_number in sorted(selected):
+                if frame_number != position and can_seek:
+                    can_seek = cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                    if can_seek:
+                        position = frame_number
+                # Backend cannot seek: grab forward instead
+                while position < frame_number and cap.grab():
+                    position += 1
+                ret, frame = cap.read()
+                if not ret or position != frame_number:
+                    raise ValueError(f"Could not read curated frame {frame_number} of {self.video_path}")
+                position += 1
+
+                annotated_frame = None
+                for frame_data in selected[frame_number]:
+                    if annotated_frame is None:
+                        annotated_frame = self.detector.annotate_video_frame(frame, frame_data, self.total_frames)
+                    frame_data['frame'] = frame
+                    frame_data['annotated_frame'] = annotated_frame
+        finally:
+            cap.release()
+
+    def _finish(self) -> Dict:
+        """Save the curated images and the report after the pass"""
+        output_dir = self.output_dir
+
+        # Frame averages and detection totals
+        summary = self.farm_report.video_report()
+
+        # Get curated images
+        print("\n📸 Selecting curated images...")
+        curated = self.curator.curated()
+        if self.save_curated_images:
+            # Frames kept without images (lazy curation or from a checkpoint)
+            self.render_curated_frames(curated)
+
+        # Save curated images
+        curated_dir = os.path.join(output_dir, "curated_images")
+        os.makedirs(curated_dir, exist_ok=True)
+
+        if self.save_curated_images:
+            for category in ('worst_infected', 'most_weeds', 'healthiest'):
+                for i, frame_data in enumerate(curated[category]):
+                    path = os.path.join(curated_dir, f"{category}_{i+1}_frame_{frame_data['frame_number']}.jpg")
+                    cv2.imwrite(path, frame_data['annotated_frame'])
+
+            print(f"✅ Saved {len(curated['worst_infected']) + len(curated['most_weeds']) + len(curated['healthiest'])} curated images")
+
+        crop_cache = self.detector.crop_cache
+        checkpoint = self.checkpoint
+        # Generate summary report
+        report = {
+            'video_path': self.video_path,
+            'video_info': {
+                'width': self.width,
+                'height': self.height,
+                'fps': self.fps,
+                'total_frames': self.total_frames,
+                'processed_frames': self.processed_frames
+            },
+            'area_coverage': summary['area_coverage'],
+            'yield_estimation': summary['yield_estimation'],
+            'curated_images': {
+                'worst_infected_count': len(curated['worst_infected']),
+                'most_weeds_count': len(curated['most_weeds']),
+                'healthiest_count': len(curated['healthiest']),
+                'curated_dir': curated_dir
+            },
+            'detection_summary': summary['detection_summary'],
+            'tracking': self.tracking_stats(),
+            'crop_cache': crop_cache.stats() if crop_cache is not None else None,
+            'frame_sampling': self.frame_sampling_stats(),
+            'checkpoint': {
+                'resumed_from_frame': self.start_frame if self.resume_state is not None else None,
+                'checkpoints_saved': checkpoint.saves
+            } if checkpoint is not None else None,
+            'output_files': {
+                'annotated_video': os.path.join(output_dir, f"{self.base_name}_annotated.mp4") if self.save_annotated_video else None,
+                'curated_images_dir': curated_dir,
+                'report_json': os.path.join(output_dir, f"{self.base_name}_report.json")
+            }
+        }
+
+        # Save report as JSON
+        report_path = report['output_files']['report_json']
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        # The job is complete; a new run starts from frame 0 again
+        if checkpoint is not None:
+            checkpoint.clear()
+
+        print(f"\n📊 Analysis Complete!")
+        print(f"   Good Crop: {report['area_coverage']['good_crop_percentage']:.2f}%")
+        print(f"   Bad Crop: {report['area_coverage']['bad_crop_percentage']:.2f}%")
+        print(f"   Weeds: {report['area_coverage']['weed_percentage']:.2f}%")
+        print(f"   Estimated Yield: {report['yield_estimation']['average_yield_per_acre']:.2f} bushels/acre "
+              f"({report['yield_estimation']['yield_percentage']:.1f}% of base)")
+        print(f"\n📄 Full report saved to: {report_path}")
+
+        return report
@@ -0,0 +1,156 @@
+"""
+Threaded pipeline stages for video processing
+A PipelineStage drains an iterator on its own thread into a bounded queue,
+so decoding, inference and annotation/encoding of different frames overlap.
+Stages keep item order and report their throughput and queue depth.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# Marks the end of a stage's output
+_END = object()
+
+
+class PipelineStage:
+    """Runs an iterator on a background thread, feeding a bounded queue"""
+
+    def __init__(self,
+                 name: str,
+                 source: Iterable,
+                 maxsize: int = 8,
+                 upstream: Optional['PipelineStage'] = None):
+        """
+        Initialize and start the stage
+
+        Args:
+            name: Stage name shown in progress output
+            source: Iterable producing the stage's items (runs on the stage thread)
+            maxsize: Maximum number of produced items waiting for the consumer
+            upstream: Stage the source reads from; time spent waiting for it is
+                      not counted as work of this stage
+        """
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.upstream = upstream
+
+        self._source = source
+        self._queue = queue.Queue(maxsize=self.maxsize)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+        # Statistics
+        self.items = 0
+        self.source_seconds = 0.0
+        self.consumer_wait_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """Put an item, giving up if the stage is stopped"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        iterator = iter(self._source)
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self.source_seconds += time.perf_counter() - start
+                self.items += 1
+                if not self._put(item):
+                    break
+        except BaseException as error:
+            self._error = error
+        finally:
+            self._put(_END)
+
+    def __iter__(self) -> Iterator:
+        """Yield the stage's items in order, re-raising an error of the stage thread"""
+        while True:
+            start = time.perf_counter()
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+            finally:
+                self.consumer_wait_seconds += time.perf_counter() - start
+            if item is None:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _END:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+    @property
+    def busy_seconds(self) -> float:
+        """Time the stage spent working (not waiting for its upstream stage)"""
+        waited = self.upstream.consumer_wait_seconds if self.upstream is not None else 0.0
+        return max(0.0, self.source_seconds - waited)
+
+    def stats(self) -> Dict:
+        """Items produced, throughput while busy and current queue depth"""
+        busy = self.busy_seconds
+        return {
+            'name': self.name,
+            'items': self.items,
+            'busy_seconds': round(busy, 2),
+            'items_per_second': round(self.items / busy, 1) if busy > 0 else 0.0,
+            'queue_depth': self._queue.qsize(),
+            'queue_size': self.maxsize
+        }
+
+    def close(self):
+        """Stop this stage and its upstream stages (e.g. when the consumer stops early)"""
+        stage = self
+        while stage is not None:
+            stage._stop.set()
+            stage = stage.upstream
+        self._thread.join()
+        if self.upstream is not None:
+            self.upstream.close()
+
+
+def format_stage_stats(stages: List[PipelineStage],
+                       consumer_name: str,
+                       consumer_items: int,
+                       elapsed_seconds: float) -> str:
+    """
+    One-line throughput summary of a pipeline
+
+    Args:
+        stages: Pipeline stages in order
+        consumer_name: Name of the final stage running on the calling thread
+        consumer_items: Items handled by the final stage
+        elapsed_seconds: Wall time since the pipeline started
+
+    Returns:
+        Text like "decode 210 fps [q 3/8] | inference 28 fps [q 0/8] | annotate 95 fps"
+    """
+    parts = []
+    for stage in stages:
+        stats = stage.stats()
+        parts.append(f"{stage.name} {stats['items_per_second']:.0f} fps "
+                     f"[q {stats['queue_depth']}/{stats['queue_size']}]")
+
+    consumer_busy = elapsed_seconds - (stages[-1].consumer_wait_seconds if stages else 0.0)
+    consumer_rate = consumer_items / consumer_busy if consumer_busy > 0 else 0.0
+    parts.append(f"{consumer_name} {consumer_rate:.0f} fps")
+    return " | ".join(parts)
@@ -7,6 +7,7 @@ from flask import Flask, request, jsonify
 import cv2
 import os
 import sys
+import time
 from datetime import datetime
 import logging
 import json
@@ -20,6 +21,13 @@ if not DEMO_MODE_FLAG:
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agricultural_detection_system'))
     try:
         from unified_agricultural_detector import UnifiedAgriculturalDetector
+        from frame_sampler import AdaptiveFrameSampler, FrameGrabber, sample_frame, sample_step, seek_frame
+        from sharded_video import ShardedVideoDetector, merge_sampling_stats, merge_tracking_stats
+        from crop_cache import CropClassificationCache
+        from farm_report import FarmReportAccumulator
+        from plant_tracker import PlantTracker
+        from video_checkpoint import (JobCheckpoint, SegmentedVideoWriter, frame_data_from_state, frame_data_state,
+                                      open_video_writer, video_hash)
     except ImportError:
         print("⚠️  Warning: Could not import UnifiedAgriculturalDetector - using DEMO MODE")
         DEMO_MODE_FLAG = True
@@ -46,6 +54,25 @@ PEST_MODEL = BASE_DIR / 'agricultural_detection_system' / 'runs' / 'detect' / 'p
 DISEASE_MODEL = BASE_DIR / 'agricultural_detection_system' / 'plant-disease-tensorflow2-plant-disease-v1' / 'plant_disease_model.h5'
 DISEASE_CLASSES = BASE_DIR / 'agricultural_detection_system' / 'plant_village_classes.txt'
 
+# Model loading: lazy loading defers it to the first request, warm-up runs one
+# dummy inference per model at load time so the first video is not slower
+LAZY_LOAD_MODELS = os.environ.get('LAZY_LOAD_MODELS', 'False').lower() == 'true'
+WARMUP_MODELS = os.environ.get('WARMUP_MODELS', 'True').lower() == 'true'
+
+# Crop classification cache, persisted between videos of the same field (optional)
+CROP_CACHE_PATH = os.environ.get('CROP_CACHE_PATH')
+CROP_CACHE_SIZE = int(os.environ.get('CROP_CACHE_SIZE', '10000'))
+
+# Worker processes per video (each runs its own detector on a range of the video)
+VIDEO_WORKERS = int(os.environ.get('VIDEO_WORKERS', '1'))
+
+# Seconds between checkpoints of a video job (default 0 = off); a restarted
+# job on the same video resumes from its last checkpoint
+VIDEO_CHECKPOINT_INTERVAL = float(os.environ.get('VIDEO_CHECKPOINT_INTERVAL', '0'))
+
+# Checkpoints are kept in this server-side directory, not in a request's output_dir
+VIDEO_CHECKPOINT_DIR = os.environ.get('VIDEO_CHECKPOINT_DIR', str(Path(__file__).parent / 'video_checkpoints'))
+
 
 def generate_demo_results() -> dict:
     """
@@ -178,13 +205,24 @@ def initialize_detector():
             logger.warning(f"⚠️  Disease model not found - skipping disease detection")
             disease_classes = None
         
+        crop_cache = None
+        if CROP_CACHE_PATH and disease_model_path:
+            crop_cache = CropClassificationCache(
+                max_size=CROP_CACHE_SIZE,
+                path=CROP_CACHE_PATH,
+                model_id=os.path.realpath(disease_model_path)
+            )
+        
         detector = UnifiedAgriculturalDetector(
             weed_model_path=str(WEED_MODEL),
             pest_model_path=str(PEST_MODEL),
             disease_model_path=disease_model_path,
             disease_class_names=disease_classes,
             conf_threshold=0.25,
-            plant_detector_model=None
+            plant_detector_model=None,
+            lazy_load=LAZY_LOAD_MODELS,
+            warmup=WARMUP_MODELS,
+            crop_cache=crop_cache
         )
         
         logger.info("✅ Detector initialized successfully!")
@@ -232,53 +270,190 @@ def process_video(video_path: str, options: dict) -> dict:
     
     frame_skip = options.get('frame_skip', 5)  # Process every 5th frame
     save_video = options.get('save_video', True)
+    
+    # Motion-aware sampling: analyze a frame when the scene changed enough
+    sampler = None
+    if options.get('adaptive_sampling', False):
+        sampler = AdaptiveFrameSampler(
+            min_interval=options.get('min_interval', 1),
+            max_interval=options.get('max_interval', 15),
+            motion_threshold=options.get('motion_threshold'),
+            method=options.get('motion_method', 'diff')
+        )
     output_dir = Path(options.get('output_dir', 'outputs'))
     output_dir.mkdir(exist_ok=True)
     
+    # Periodic checkpoints, keyed by the video content and the settings
+    checkpoint_interval = options.get('checkpoint_interval', VIDEO_CHECKPOINT_INTERVAL)
+    checkpoint = None
+    resume_state = None
+    if checkpoint_interval:
+        checkpoint = JobCheckpoint(VIDEO_CHECKPOINT_DIR, video_hash(video_path), {
+            'job': 'ai_service',
+            'detector': detector.checkpoint_settings(),
+            'frame_skip': frame_skip,
+            'sample_interval': options.get('sample_interval'),
+            'sampler': (sampler.method, sampler.min_interval, sampler.max_interval,
+                        sampler.motion_threshold) if sampler is not None else None,
+            'save_video': save_video
+        })
+        if options.get('resume', True):
+            resume_state = checkpoint.load()
+        if resume_state is not None:
+            logger.info(f"♻️  Resuming from checkpoint: frame {resume_state['next_frame']}, "
+                        f"{resume_state['processed_frames']} frames already processed")
+    start_frame = resume_state['next_frame'] if resume_state is not None else 0
+    
     # Prepare output video writer
     output_video_path = None
     writer = None
     if save_video:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         output_video_path = output_dir / f'annotated_{timestamp}.mp4'
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        writer = cv2.VideoWriter(str(output_video_path), fourcc, fps, (width, height))
+        if checkpoint is not None:
+            # Written in segments that survive an interruption
+            writer = SegmentedVideoWriter(
+                str(output_video_path), fps, (width, height), checkpoint.segment_dir,
+                segments=resume_state['video_segments'] if resume_state is not None else None
+            )
+        else:
+            writer = open_video_writer(str(output_video_path), fps, (width, height))
     
     # Process frames
     frame_detections = []
-    class_counts = {}
-    frame_idx = 0
+    farm_report = FarmReportAccumulator()
     processed_frames = 0
     
-    logger.info(f"⚙️  Processing {total_frames} frames (skip={frame_skip})...")
+    # Plant ids continue after the ones used before the checkpoint
+    next_track_id = 0
+    
+    if resume_state is not None:
+        frame_detections = [frame_data_from_state(frame_state, detector.disease_labels)
+                            for frame_state in resume_state['frame_detections']]
+        farm_report = FarmReportAccumulator.from_snapshot(resume_state['farm_report'])
+        processed_frames = resume_state['processed_frames']
+        next_track_id = resume_state['next_track_id']
+        if sampler is not None:
+            # The sampler continues exactly where it stopped
+            sampler = AdaptiveFrameSampler.from_state(resume_state['sampler'])
+    
+    # Frames are detected in batches. Skipped frames wait in the same buffer
+    # so the annotated video is still written in order.
+    batch_size = options.get('batch_size', detector.batch_size)
+    pending_frames = []
+    pending_selected = 0
+    
+    # Long videos can be split between worker processes (fixed-step or
+    # time-based sampling only); results come back in frame order. The
+    # workers do not track plants, since a track cannot span two shards.
+    workers = options.get('workers', VIDEO_WORKERS)
+    sharded = None
+    sharded_detections = None
+    if workers > 1 and sampler is None:
+        if detector.new_tracker() is not None:
+            logger.warning("⚠️  Plant tracking is off when the video is split between workers")
+        sharded = ShardedVideoDetector(detector.init_kwargs, workers,
+                                       max_threads=detector.init_kwargs['max_threads'])
+        sharded_detections = sharded.detect(
+            video_path,
+            frame_skip=frame_skip,
+            interval_seconds=options.get('sample_interval'),
+            seek_threshold=options.get('seek_threshold'),
+            vocabulary=detector.disease_labels,
+            start_frame=start_frame
+        )
+    
+    # Plants are tracked across frames so each one is classified once, not every frame
+    tracker = detector.new_tracker() if sharded is None else None
+    
+    # Statistics of the parts of the video before the checkpoint that are not
+    # contained in the resumed tracker/sampler
+    tracking_before = None
+    frame_sampling_before = None
+    if resume_state is not None:
+        if tracker is not None and resume_state['tracker'] is not None:
+            tracker = PlantTracker.from_state(resume_state['tracker'])
+            tracking_before = resume_state['tracking_before']
+        else:
+            tracking_before = resume_state['tracking']
+            if tracker is not None:
+                tracker.next_track_id = next_track_id
+        if sampler is None:
+            frame_sampling_before = resume_state['frame_sampling']
+    
+    # Fixed-step and time-based sampling (one frame every sample_interval seconds).
+    # Without an output video the skipped frames are never needed, so they are
+    # passed with grab()/seek instead of being decoded and converted.
+    grabber = None
+    if sampler is None:
+        grabber = FrameGrabber(
+            cap,
+            frame_skip=frame_skip,
+            interval_seconds=options.get('sample_interval'),
+            seek_threshold=options.get('seek_threshold'),
+            start_frame=start_frame
+        )
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    def sampled_frames():
+        if sharded is not None and not save_video:
+            # The workers decode their own frames; only the frame numbers are needed here
+            step = sample_step(cap.get(cv2.CAP_PROP_FPS), frame_skip, options.get('sample_interval'))
+            sample_index = 0
+            while sample_frame(sample_index, step) < start_frame:
+                sample_index += 1
+            while sample_frame(sample_index, step) < total_frames:
+                yield sample_frame(sample_index, step), None, True
+                sample_index += 1
+            return
+        if grabber is not None and not save_video:
+            for frame_idx, frame in grabber:
+                yield frame_idx, frame, True
+            return
+        # The grabber already positioned the video at start_frame
+        frame_idx = start_frame if grabber is not None else seek_frame(cap, start_frame)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if sampler is not None:
+                selected = sampler.should_process(frame_idx, frame)
+            else:
+                selected = grabber.selects(frame_idx)
+            yield frame_idx, frame, selected
+            frame_idx += 1
+    
+    def process_pending():
+        nonlocal processed_frames, next_track_id
         
-        # Process only selected frames
-        if frame_idx % frame_skip == 0:
-            # Run detection
-            detections = detector.detect_all(frame)
-            
-            # Aggregate counts
-            for weed in detections.get('weeds', []):
-                class_name = 'weed'
-                class_counts[class_name] = class_counts.get(class_name, 0) + 1
+        # Run detection on the whole batch at once
+        if sharded is None:
+            batch_detections = iter(detector.detect_batch(
+                [pending_frame for _, pending_frame, is_selected in pending_frames if is_selected],
+                tracker=tracker
+            ))
+        
+        for pending_idx, pending_frame, is_selected in pending_frames:
+            if not is_selected:
+                # Write original frame for skipped frames
+                writer.write(pending_frame)
+                continue
             
-            for pest in detections.get('pests', []):
-                class_name = 'pest_presence'
-                class_counts[class_name] = class_counts.get(class_name, 0) + 1
+            if sharded is None:
+                detections = next(batch_detections)
+            else:
+                detected_idx, detections = next(sharded_detections)
+                if detected_idx != pending_idx:
+                    raise Exception(f"Worker result for frame {detected_idx} does not match frame {pending_idx}")
             
-            for disease in detections.get('diseases', []):
-                class_name = disease.get('class_name', 'diseased_crop')
-                class_counts[class_name] = class_counts.get(class_name, 0) + 1
+            # Aggregate counts
+            farm_report.add(detections)
+            if len(detections['diseases']):
+                next_track_id = max(next_track_id, int(detections['diseases'].plant_ids.max()) + 1)
             
-            # Store frame detections
+            # Store frame detections (compact until the results are serialized)
             frame_detections.append({
-                'frame_number': frame_idx,
-                'timestamp': frame_idx / fps,
+                'frame_number': pending_idx,
+                'timestamp': pending_idx / fps,
                 'detections': detections
             })
             
@@ -286,136 +461,118 @@ def process_video(video_path: str, options: dict) -> dict:
             
             # Draw detections on frame
             if save_video:
-                annotated_frame = detector.draw_detections(frame.copy(), detections)
+                annotated_frame = detector.draw_detections(pending_frame.copy(), detections)
                 writer.write(annotated_frame)
-        elif save_video:
-            # Write original frame for skipped frames
-            writer.write(frame)
-        
-        frame_idx += 1
+    
+    if sampler is not None:
+        skip_description = "adaptive"
+        if workers > 1:
+            logger.warning("⚠️  Adaptive sampling runs in a single process; ignoring workers")
+    elif options.get('sample_interval'):
+        skip_description = f"{options['sample_interval']}s"
+    else:
+        skip_description = frame_skip
+    logger.info(f"⚙️  Processing {total_frames} frames (skip={skip_description}, batch={batch_size})...")
+    
+    def frame_sampling_stats():
+        if sampler is not None:
+            return sampler.stats()
+        stats = sharded.frame_sampling_stats() if sharded is not None else grabber.stats()
+        return merge_sampling_stats([frame_sampling_before, stats])
+    
+    def tracking_stats():
+        stats = tracker.stats() if tracker is not None else None
+        return merge_tracking_stats([tracking_before, stats])
+    
+    def save_checkpoint(next_frame):
+        frame_sampling = frame_sampling_stats()
+        if sharded is not None and frame_sampling is not None:
+            # Shards still running are not counted yet
+            frame_sampling.update(frames_seen=next_frame,
+                                  frames_analyzed=processed_frames,
+                                  frames_skipped=next_frame - processed_frames)
+        checkpoint.save({
+            'next_frame': next_frame,
+            'processed_frames': processed_frames,
+            'farm_report': farm_report.snapshot(),
+            'frame_detections': [frame_data_state(frame_data) for frame_data in frame_detections],
+            'next_track_id': next_track_id,
+            'tracker': tracker.state() if tracker is not None else None,
+            'tracking_before': tracking_before,
+            'tracking': tracking_stats(),
+            'sampler': sampler.state() if sampler is not None else None,
+            'frame_sampling': frame_sampling,
+            'video_segments': writer.finish_segment() if writer is not None else None
+        })
+    
+    frames_seen = 0
+    last_checkpoint = time.time()
+    try:
+        for frame_idx, frame, selected in sampled_frames():
+            # Process only selected frames
+            if selected or save_video:
+                pending_frames.append((frame_idx, frame, selected))
+                pending_selected += int(selected)
+            
+            # Progress logging
+            if (frame_idx + 1) // 100 > frames_seen // 100:
+                progress = ((frame_idx + 1) / total_frames) * 100
+                logger.info(f"  Progress: {progress:.1f}% ({frame_idx + 1}/{total_frames})")
+            frames_seen = frame_idx + 1
+            
+            if pending_selected >= batch_size:
+                process_pending()
+                pending_frames = []
+                pending_selected = 0
+                
+                if checkpoint is not None and time.time() - last_checkpoint >= checkpoint_interval:
+                    save_checkpoint(frame_idx + 1)
+                    last_checkpoint = time.time()
         
-        # Progress logging
-        if frame_idx % 100 == 0:
-            progress = (frame_idx / total_frames) * 100
-            logger.info(f"  Progress: {progress:.1f}% ({frame_idx}/{total_frames})")
+        if pending_frames:
+            process_pending()
+    finally:
+        if sharded_detections is not None:
+            sharded_detections.close()
     
     cap.release()
     if writer:
         writer.release()
     
-    logger.info(f"✅ Video processing complete! Processed {processed_frames} frames")
-    
-    # Parse detection counts from YOLO output
-    weeds_detected = class_counts.get('weed', 0)
-    healthy_crops = class_counts.get('healthy_crop', 0) + class_counts.get('Healthy', 0)
-    unhealthy_crops = class_counts.get('unhealthy_crop', 0) + class_counts.get('Unhealthy', 0)
-    diseases_detected = sum(v for k, v in class_counts.items() if 'disease' in k.lower() or 'corn' in k.lower() or 'tomato' in k.lower())
-    
-    total_detections = sum(class_counts.values())
-    
-    # Calculate area coverage percentages
-    total_crop_area = max(1, healthy_crops + unhealthy_crops + weeds_detected)
-    good_crop_area = (healthy_crops / total_crop_area) * 100
-    bad_crop_area = (unhealthy_crops / total_crop_area) * 100
-    weed_coverage = (weeds_detected / total_crop_area) * 100
-    disease_coverage = (diseases_detected / total_crop_area) * 100
-    
-    # Calculate yield estimation
-    yield_estimation = max(0, min(100, good_crop_area - (weed_coverage * 0.5) - (disease_coverage * 0.3)))
-    
-    # Calculate health score
-    health_score = max(0, min(100, good_crop_area - (bad_crop_area * 0.5) - (weed_coverage * 0.3)))
-    
-    # Determine farm health status
-    if health_score >= 80:
-        farm_health_status = 'EXCELLENT'
-    elif health_score >= 60:
-        farm_health_status = 'GOOD'
-    elif health_score >= 40:
-        farm_health_status = 'FAIR'
-    elif health_score >= 20:
-        farm_health_status = 'POOR'
-    else:
-        farm_health_status = 'CRITICAL'
-    
-    # Calculate detection coverage
-    frames_with_detections = sum(1 for fd in frame_detections if fd['detections'].get('weeds') or fd['detections'].get('pests') or fd['detections'].get('diseases'))
-    detection_coverage = (frames_with_detections / max(1, processed_frames)) * 100
-    
-    # Generate recommendations based on REAL detections
-    recommendations = []
-    if weed_coverage > 30:
-        recommendations.append('⚠️ WARNING: Significant weed infestation detected - Implement weed control measures')
-    elif weed_coverage > 15:
-        recommendations.append('Apply targeted weed control in affected areas')
-    
-    if disease_coverage > 20:
-        recommendations.append('⚠️ WARNING: Disease presence detected in crops - Apply disease treatment protocols')
-    elif disease_coverage > 10:
-        recommendations.append('Monitor diseased crops for spread prevention')
-    
-    if bad_crop_area > 40:
-        recommendations.append('Investigate causes of crop health decline')
-        recommendations.append('Consider soil testing and nutrient analysis')
+    if detector.crop_cache is not None:
+        detector.crop_cache.save()
     
-    if class_counts.get('pest_presence', 0) > 10:
-        recommendations.append('Investigate pest presence and consider pest control measures')
-    
-    if health_score < 40:
-        recommendations.append('Review irrigation and fertilization practices')
+    logger.info(f"✅ Video processing complete! Processed {processed_frames} frames")
     
-    if not recommendations:
-        recommendations.append('✅ Crops appear healthy - continue regular monitoring')
+    # Report sections built from the running totals
+    analysis = farm_report.service_analysis()
     
     # Build results with REAL YOLO metrics
     results = {
         'video_path': video_path,
         'output_video_path': str(output_video_path) if output_video_path else None,
         'json_path': None,
-        'total_detections': total_detections,
-        'class_counts': class_counts,
-        'frame_detections': frame_detections,
-        'analysis': {
-            'total_detections': total_detections,
-            'healthy_crops': healthy_crops,
-            'unhealthy_crops': unhealthy_crops,
-            'weeds_detected': weeds_detected,
-            'diseases_detected': diseases_detected,
-            'health_score': round(health_score, 1),
-            'yield_estimation': round(yield_estimation, 1),
-            'farm_health_status': farm_health_status,
-            'detection_coverage': round(detection_coverage, 1),
-            'area_coverage': {
-                'good_crop_area': round(good_crop_area, 2),
-                'bad_crop_area': round(bad_crop_area, 2),
-                'weed_coverage': round(weed_coverage, 2),
-                'disease_coverage': round(disease_coverage, 2)
-            },
-            'recommendations': recommendations,
-            'crop_health_issues': {
-                'diseased_crops': diseases_detected,
-                'total_health_issues': diseases_detected + unhealthy_crops,
-                'healthy_crops': healthy_crops,
-                'severity': 'low' if health_score > 70 else 'medium' if health_score > 40 else 'high'
-            },
-            'pest_infestations': {
-                'pest_presence': class_counts.get('pest_presence', 0),
-                'total_pest_issues': class_counts.get('pest_presence', 0),
-                'infestation_level': 'low' if class_counts.get('pest_presence', 0) < 20 else 'medium' if class_counts.get('pest_presence', 0) < 50 else 'high'
-            },
-            'weed_growth': {
-                'weeds': weeds_detected,
-                'total_weeds': weeds_detected,
-                'infestation_level': 'low' if weed_coverage < 20 else 'medium' if weed_coverage < 40 else 'high'
-            }
-        },
+        'total_detections': analysis['total_detections'],
+        'class_counts': farm_report.class_counts(),
+        'frame_detections': [
+            {**frame_data, 'detections': frame_data['detections'].to_dict()}
+            for frame_data in frame_detections
+        ],
+        'analysis': analysis,
         'video_info': {
             'fps': fps,
             'width': width,
             'height': height,
             'total_frames': total_frames,
             'processed_frames': processed_frames
-        }
+        },
+        'tracking': tracking_stats(),
+        'crop_cache': detector.crop_cache.stats() if detector.crop_cache is not None else None,
+        'frame_sampling': frame_sampling_stats(),
+        'checkpoint': {
+            'resumed_from_frame': start_frame if resume_state is not None else None,
+            'checkpoints_saved': checkpoint.saves
+        } if checkpoint is not None else None
     }
     
     # Save JSON report
@@ -424,16 +581,22 @@ def process_video(video_path: str, options: dict) -> dict:
         json.dump(results, f, indent=2, default=str)
     results['json_path'] = str(json_path)
     
+    # The job is complete; a new upload of the video starts from frame 0 again
+    if checkpoint is not None:
+        checkpoint.clear()
+    
     return results
 
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
+    real_detector = detector is not None and detector != "DEMO"
     return jsonify({
         'status': 'healthy',
         'mode': 'demo' if DEMO_MODE else 'production',
         'detector_loaded': detector is not None,
+        'models': detector.model_status_report() if real_detector else None,
         'demo_input_video': DEMO_INPUT_VIDEO if DEMO_MODE else None,
         'demo_output_video': DEMO_OUTPUT_VIDEO if DEMO_MODE else None,
         'timestamp': datetime.utcnow().isoformat()